@@ -0,0 +1,51 @@
+'''
+Micro-benchmark for formation planning: time to assign the drones to the slots, to check the separation of all paths and to plan a formation change of the whole swarm.
+
+Usage: python -m benchmark.formation [drones ...]
+'''
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flightoperator.formation import assign, find_conflicts, grid, plan_formation  # noqa: E402
+
+REPETITIONS = 5
+
+
+def measure(function):
+    '''
+    Return the median time of the function in ms
+    '''
+    durations = []
+    for _ in range(REPETITIONS):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return sorted(durations)[len(durations) // 2] * 1000
+
+
+def main(argv):
+    counts = [int(argument) for argument in argv] or [10, 50, 100, 200]
+    random.seed(0)
+
+    print('drones   assign ms   check ms   plan ms   conflicts')
+    for count in counts:
+        # The swarm moves from a grid on the ground to a shifted, shuffled grid in the air
+        starts = grid(count, 80, height=0)
+        slots = grid(count, 90, origin=(-150, -150), height=150)
+        random.shuffle(slots)
+
+        plan = plan_formation(starts, slots)
+        print('{:>6}  {:>10.1f}  {:>9.1f}  {:>8.1f}  {:>10}'.format(
+            count,
+            measure(lambda: assign(starts, slots)),
+            measure(lambda: find_conflicts(plan.paths, plan.separation)),
+            measure(lambda: plan_formation(starts, slots)),
+            len(plan.conflicts)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
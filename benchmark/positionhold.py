@@ -0,0 +1,58 @@
+'''
+Benchmark for the position hold: simulated drones fly over mission pads and are held by a single PositionHold. Reports the corrections per second, the latency from parsing a state string to the new rc setpoint and the share of one core the control loop needs.
+
+Usage: python -m benchmark.positionhold [drones ...] [--seconds 5] [--state-rate 10]
+'''
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flightoperator.operator import Operator  # noqa: E402
+from simulator.swarm import SimulatedSwarm  # noqa: E402
+
+
+def measure(drones, seconds, state_rate):
+    '''
+    Hold all drones at a position next to their takeoff point and return the statistics of the position hold
+    '''
+    with SimulatedSwarm(drones, state_rate=state_rate) as simulator:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            operator = Operator()
+            operator.scan_for_drones([ip + '/32' for ip in simulator.ips])
+            operator.execute_command('takeoff')
+            position_hold = operator.hold_position()
+            for tello in operator.swarm:
+                position_hold.hold(tello, (30, -20, 100))
+
+        time.sleep(seconds)
+        statistics = position_hold.statistics()
+        statistics['load'] = position_hold.compute_time.mean() * position_hold.compute_time.count / 1e9 / seconds
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            position_hold.stop()
+            operator.close()
+            del operator
+    return statistics
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measure the position hold against the simulator')
+    parser.add_argument('drones', type=int, nargs='*', default=[10, 50, 100])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--state-rate', type=float, default=10.0)
+    arguments = parser.parse_args(argv)
+
+    print('drones  corrections/s  latency p50 ms  p99 ms  compute us  load')
+    for drones in arguments.drones:
+        statistics = measure(drones, arguments.seconds, arguments.state_rate)
+        print('{:>6}  {:>13.0f}  {:>14.3f}  {:>6.3f}  {:>10.1f}  {:>4.1%}'.format(
+            drones, statistics['corrections'] / arguments.seconds, statistics.get('latency_p50_ms', 0.0),
+            statistics.get('latency_p99_ms', 0.0), statistics.get('compute_p50_us', 0.0), statistics['load']))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
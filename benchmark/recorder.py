@@ -0,0 +1,58 @@
+'''
+Benchmark for the telemetry recorder: cost of recording a 30 minute flight of 30 drones at 10 Hz and time to load the recording.
+
+Usage: python -m benchmark.recorder [drones] [minutes]
+'''
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drone.recorder import RECORDING_COLUMNS, TelemetryRecorder, TelemetryRecording  # noqa: E402
+from drone.staterecord import parse_state  # noqa: E402
+
+STATE_STRING = (b'mid:-1;x:0;y:0;z:0;mpry:0,0,0;pitch:0;roll:0;yaw:0;vgx:0;vgy:0;vgz:0;'
+                b'templ:83;temph:85;tof:10;h:0;bat:88;baro:193.77;time:0;'
+                b'agx:-5.00;agy:0.00;agz:-998.00;\r\n')
+
+
+def main(argv):
+    drones = int(argv[0]) if len(argv) > 0 else 30
+    minutes = float(argv[1]) if len(argv) > 1 else 30.0
+    packets = int(minutes * 60 * 10)
+
+    names = ['192.168.10.' + str(i + 2) for i in range(drones)]
+    record = parse_state(STATE_STRING, 0.0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = TelemetryRecorder(os.path.join(directory, 'flight'))
+        start = time.perf_counter()
+        for packet in range(packets):
+            record.timestamp = packet * 0.1
+            for name in names:
+                recorder.record(name, record)
+        recorder.close()
+        duration = time.perf_counter() - start
+
+        size = sum(os.path.getsize(path) for path in recorder.paths)
+        records = packets * drones
+        print('recorded {} records in {:.2f} s ({:.2f} us per record, {:.3f} % of a core at 10 Hz)'.format(
+            records, duration, duration / records * 1e6, duration / records * drones * 10 * 100))
+        print('files: {}  size: {:.1f} MB'.format(len(recorder.paths), size / 1e6))
+
+        start = time.perf_counter()
+        recording = TelemetryRecording(recorder.paths)
+        views = [recording.field(name, column) for name in recording.drones for column in RECORDING_COLUMNS]
+        duration = time.perf_counter() - start
+        print('loaded {} views of {} drones in {:.3f} s'.format(len(views), len(recording.drones), duration))
+
+        heights = recording.field(names[0], 'height')
+        assert len(heights) == packets
+        del views, heights
+        recording.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,286 @@
+'''
+Benchmark suite for the swarm against simulated drones: acknowledgement latency, broadcast completion time, state packets parsed per second, discovery time and threads, file descriptors and memory per drone.
+
+The drones are simulated by `python -m simulator` in a separate process on 127.0.0.2, 127.0.0.3, ... Results are written as JSON and can be compared with a previous run to catch regressions.
+
+Usage: python -m benchmark.run [--drones 1 10 50 100 200] [--output results.json] [--compare previous.json]
+'''
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drone.state import State  # noqa: E402
+from drone.statereceiver import StateReceiver  # noqa: E402
+from flightoperator.discovery import DroneDiscovery  # noqa: E402
+from flightoperator.operator import Operator  # noqa: E402
+
+STATE_STRING = (b'mid:-1;x:0;y:0;z:0;mpry:0,0,0;pitch:0;roll:0;yaw:0;vgx:0;vgy:0;vgz:0;'
+                b'templ:83;temph:85;tof:10;h:0;bat:88;baro:193.77;time:0;'
+                b'agx:-5.00;agy:0.00;agz:-998.00;\r\n')
+
+# A metric is a regression if it is worse than the previous run by this fraction
+REGRESSION_THRESHOLD = 0.2
+
+# Metrics where a higher value is better. Lower is better for all others
+HIGHER_IS_BETTER = ('state_packets_per_second', 'discovery_found')
+
+
+def start_simulator(drones, latency):
+    '''
+    Start the simulator in a separate process, so its sockets and threads are not counted. Returns the process once the drones answer
+    '''
+    environment = dict(os.environ, PYTHONIOENCODING='utf-8')
+    simulator = subprocess.Popen(
+        [sys.executable, '-u', '-m', 'simulator', '-n', str(drones), '--latency', str(latency)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.PIPE, env=environment)
+    simulator.stdout.readline()
+    return simulator
+
+
+def stop_simulator(simulator):
+    simulator.send_signal(signal.SIGINT)
+    try:
+        simulator.wait(5)
+    except subprocess.TimeoutExpired:
+        simulator.kill()
+        simulator.wait()
+
+
+def resources():
+    '''
+    Return the number of threads, open file descriptors and the resident memory in KiB of this process. File descriptors and memory are only available on Linux
+    '''
+    descriptors = None
+    rss = None
+    if os.path.isdir('/proc/self/fd'):
+        descriptors = len(os.listdir('/proc/self/fd'))
+        with open('/proc/self/statm') as statm:
+            rss = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    return {'threads': threading.active_count(), 'fds': descriptors, 'rss_kb': rss}
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure_bring_up(operator, ips):
+    '''
+    Initialize all drones and return the threads, file descriptors and memory added per drone
+    '''
+    before = resources()
+    operator.scan_for_drones([ip + '/32' for ip in ips])
+    after = resources()
+
+    per_drone = {}
+    for name in before:
+        if before[name] is None:
+            per_drone[name] = None
+        else:
+            per_drone[name] = (after[name] - before[name]) / max(1, len(operator.swarm))
+    return per_drone
+
+
+def measure_ack_latency(operator, commands):
+    '''
+    Send commands to each drone one after another and return the percentiles of the acknowledgement latency in ms
+    '''
+    swarm = operator.swarm
+    for tello in swarm:
+        for _ in range(commands):
+            tello.send_command('battery?')
+
+    latencies = sorted(entry.duration * 1000 for tello in swarm
+                       for entry in list(tello.log)[-commands:] if entry.duration is not None)
+    return {
+        'p50': percentile(latencies, 0.5),
+        'p90': percentile(latencies, 0.9),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1]
+    }
+
+
+def measure_broadcast(operator, counts, repetitions):
+    '''
+    Return the median time in seconds of Operator.execute_command for each swarm size
+    '''
+    swarm = operator.swarm
+    results = {}
+    for count in counts:
+        operator.swarm = swarm[:count]
+        durations = []
+        for _ in range(repetitions):
+            start = time.perf_counter()
+            operator.execute_command('battery?')
+            durations.append(time.perf_counter() - start)
+        results[str(count)] = sorted(durations)[len(durations) // 2]
+    operator.swarm = swarm
+    return results
+
+
+def measure_state_rate(ips, packets_per_drone, port=18890, window=200):
+    '''
+    Send state strings from the addresses of the drones to a separate StateReceiver. At most window packets are in flight, so the socket buffer does not overflow and the parse rate is measured. Returns the state packets parsed per second and the number of dropped packets
+    '''
+    receiver = StateReceiver('127.0.0.1', port)
+    senders = []
+    for ip in ips:
+        receiver.register(ip, State())
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.bind((ip, 0))
+        senders.append(sender)
+
+    total = packets_per_drone * len(senders)
+    sent = 0
+    start = time.perf_counter()
+    for _ in range(packets_per_drone):
+        for sender in senders:
+            while sent - receiver.packets_received - receiver.packets_dropped >= window:
+                time.sleep(0.0001)
+            sender.sendto(STATE_STRING, ('127.0.0.1', port))
+            sent += 1
+
+    # Wait until all packets are parsed. Lost packets are given up after a second
+    deadline = time.perf_counter() + 1.0
+    while receiver.packets_received + receiver.packets_dropped < total and time.perf_counter() < deadline:
+        time.sleep(0.0001)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'state_packets_per_second': receiver.packets_received / elapsed,
+        'state_packets_dropped': total - receiver.packets_received
+    }
+    receiver.close()
+    for sender in senders:
+        sender.close()
+    return result
+
+
+def measure_discovery(network):
+    '''
+    Return the time in seconds to scan the network and the number of drones found
+    '''
+    start = time.perf_counter()
+    found = list(DroneDiscovery([network], timeout=0.5).scan())
+    return time.perf_counter() - start, len(found)
+
+
+def flatten(metrics, prefix=''):
+    '''
+    Return the nested metrics as dict of dotted names to values
+    '''
+    flat = {}
+    for name, value in metrics.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, prefix + name + '.'))
+        elif isinstance(value, (int, float)):
+            flat[prefix + name] = value
+    return flat
+
+
+def compare(metrics, previous_path, threshold=REGRESSION_THRESHOLD):
+    '''
+    Print the change of each metric to the previous run. Returns the names of the regressed metrics
+    '''
+    with open(previous_path, 'r', encoding='utf-8') as previous_file:
+        previous = flatten(json.load(previous_file)['metrics'])
+
+    regressions = []
+    print('\nmetric                               previous       current   change')
+    for name, value in sorted(flatten(metrics).items()):
+        if name not in previous or not previous[name]:
+            continue
+        change = (value - previous[name]) / abs(previous[name])
+        worse = -change if name.split('.')[0] in HIGHER_IS_BETTER else change
+        marker = ''
+        if worse > threshold:
+            marker = '  ❗'
+            regressions.append(name)
+        print('{:<34}  {:>10.3f}  {:>12.3f}  {:>+6.0%}{}'.format(name, previous[name], value, change, marker))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmark.run', description=__doc__.split('\n')[1])
+    parser.add_argument('--drones', type=int, nargs='+', default=[1, 10, 50, 100, 200],
+                        help='swarm sizes for the broadcast benchmark')
+    parser.add_argument('--latency', type=float, default=0.005, help='response latency of the simulated drones')
+    parser.add_argument('--commands', type=int, default=20, help='commands per drone for the latency benchmark')
+    parser.add_argument('--repetitions', type=int, default=11, help='broadcasts per swarm size')
+    parser.add_argument('--packets', type=int, default=200, help='state packets per drone')
+    parser.add_argument('--output', default=None, help='path of the JSON results')
+    parser.add_argument('--compare', default=None, help='JSON results of a previous run')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='fraction by which a metric has to be worse to count as regression')
+    arguments = parser.parse_args(argv)
+
+    started = datetime.now()
+    drones = max(arguments.drones)
+    simulator = start_simulator(drones, arguments.latency)
+    ips = ['127.0.0.' + str(index + 2) for index in range(drones)]
+    metrics = {}
+
+    try:
+        # The operator prints every command. Only the results are of interest here
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            operator = Operator()
+
+            # The latencies are measured with 'battery?', which has to reach the drones
+            operator.query_cache = None
+            metrics['per_drone'] = measure_bring_up(operator, ips)
+            metrics['ack_latency_ms'] = measure_ack_latency(operator, arguments.commands)
+            metrics['broadcast_s'] = measure_broadcast(operator, sorted(arguments.drones), arguments.repetitions)
+            operator.close()
+
+            # Release the drones while the output is still redirected
+            del operator
+            gc.collect()
+
+        metrics.update(measure_state_rate(ips, arguments.packets))
+        metrics['discovery_s'], metrics['discovery_found'] = measure_discovery('127.0.0.0/24')
+    finally:
+        stop_simulator(simulator)
+
+    print(json.dumps(metrics, indent=2))
+
+    results = {
+        'started': started.isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'drones': drones,
+        'latency': arguments.latency,
+        'metrics': metrics
+    }
+    output = arguments.output
+    if output is None:
+        output = os.path.join('log', 'benchmark-' + started.isoformat().replace(':', '-') + '.json')
+    directory = os.path.dirname(output)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(output, 'w', encoding='utf-8') as out:
+        json.dump(results, out, indent=2)
+    print('✅  Results saved to ' + output)
+
+    if arguments.compare is not None:
+        regressions = compare(metrics, arguments.compare, arguments.threshold)
+        if regressions:
+            print('❌  ' + str(len(regressions)) + ' metrics regressed by more than ' +
+                  '{:.0%}'.format(arguments.threshold))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,157 @@
+'''
+Benchmark for Tello.send_command: CPU usage and acknowledgement latency while N drones wait for slow commands.
+
+Each fake drone listens on its own loopback address (127.0.0.2, 127.0.0.3, ...) on port 8889 and answers every command after a fixed delay.
+The benchmark is run once with the previous busy-spin waiting loop and once with the event-driven waiting of the LogEntry.
+
+Usage: python -m benchmark.send_command [drones ...]
+'''
+import contextlib
+import heapq
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drone.logentry import LogEntry  # noqa: E402
+from drone.response import Response  # noqa: E402
+from drone.statereceiver import StateReceiver  # noqa: E402
+from drone.tello import Tello  # noqa: E402
+from drone.transport import CommandTransport  # noqa: E402
+
+RESPONSE_DELAY = 0.5
+COMMANDS_PER_DRONE = 4
+
+
+class FakeDrones:
+    '''
+    Answers Tello commands for several loopback addresses from a single thread. Each response is delayed by RESPONSE_DELAY seconds.
+    '''
+
+    def __init__(self, count, delay=RESPONSE_DELAY):
+        self.delay = delay
+        self.selector = selectors.DefaultSelector()
+        self.sockets = []
+        for i in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(('127.0.0.' + str(i + 2), 8889))
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ)
+            self.sockets.append(sock)
+        self.pending = []
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    @property
+    def ips(self):
+        return [sock.getsockname()[0] for sock in self.sockets]
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        for sock in self.sockets:
+            sock.close()
+
+    def _serve(self):
+        while self.running:
+            timeout = 0.01
+            if self.pending:
+                timeout = min(timeout, max(0, self.pending[0][0] - time.monotonic()))
+            for key, _ in self.selector.select(timeout):
+                data, address = key.fileobj.recvfrom(1024)
+                if data == b'sn?':
+                    answer = b'SN' + key.fileobj.getsockname()[0].encode('utf-8')
+                else:
+                    answer = b'ok'
+                heapq.heappush(self.pending, (time.monotonic() + self.delay,
+                                              id(data), key.fileobj, answer, address))
+
+            now = time.monotonic()
+            while self.pending and self.pending[0][0] <= now:
+                _, _, sock, answer, address = heapq.heappop(self.pending)
+                sock.sendto(answer, address)
+
+
+class BusySpinTello(Tello):
+    '''
+    Tello with the previous waiting strategy: poll the log entry until the response arrived.
+    '''
+
+    def send_command(self, command):
+        if command == 'sn?' and self.tello_sn is not None:
+            return Response('b\'' + self.tello_sn)
+
+        self.pending = LogEntry(command, self.command_counter)
+        self.log.append(self.pending)
+        self.command_counter += 1
+        self.transport.sendto(command.encode('utf-8'), self.tello_address)
+
+        start = time.time()
+        while not self.log[-1].got_response():
+            if time.time() - start > self.MAX_TIME_OUT:
+                return Response('b\'error timeout')
+        return self.log[-1].response
+
+
+def run(tello_class, drones, fake_drones):
+    '''
+    Send COMMANDS_PER_DRONE commands to each drone in parallel and measure the process CPU time and the acknowledgement latency
+    '''
+    transport = CommandTransport()
+    state_receiver = StateReceiver()
+    swarm = [tello_class(ip, send_keepalives=False, transport=transport,
+                         state_receiver=state_receiver)
+             for ip in fake_drones.ips[:drones]]
+
+    def fly(tello):
+        for _ in range(COMMANDS_PER_DRONE):
+            tello.send_command('takeoff')
+
+    threads = [threading.Thread(target=fly, args=(tello,)) for tello in swarm]
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    latencies = sorted(entry.duration - RESPONSE_DELAY
+                       for tello in swarm for entry in list(tello.log)[2:])
+    for tello in swarm:
+        tello.close_connection()
+    transport.close()
+    state_receiver.close()
+
+    return {
+        'cpu': cpu,
+        'wall': wall,
+        'p50': latencies[len(latencies) // 2],
+        'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def main(argv):
+    counts = [int(arg) for arg in argv] or [1, 5, 10, 20]
+    fake_drones = FakeDrones(max(counts))
+
+    print('drones  strategy    cpu [s]  cpu/wall  ack p50 [ms]  ack p99 [ms]')
+    for count in counts:
+        for name, tello_class in (('busy-spin', BusySpinTello), ('event', Tello)):
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                result = run(tello_class, count, fake_drones)
+            print('{:>6}  {:<10}  {:>7.2f}  {:>8.2f}  {:>12.2f}  {:>12.2f}'.format(
+                count, name, result['cpu'], result['cpu'] / result['wall'],
+                result['p50'] * 1000, result['p99'] * 1000))
+
+    fake_drones.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
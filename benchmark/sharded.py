@@ -0,0 +1,66 @@
+'''
+Benchmark for the sharded operator: brings up simulated drones on a growing number of worker processes and measures the broadcast duration and skew and the state strings received per second. Broadcasts and state parsing only scale if there is a core for each worker.
+
+Usage: python -m benchmark.sharded [--drones 100] [--workers 1 2 4] [--repetitions 20]
+'''
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flightoperator.sharded import ShardedOperator  # noqa: E402
+from simulator.swarm import SimulatedSwarm  # noqa: E402
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else float('nan')
+
+
+def measure(ips, workers, repetitions, seconds=2.0):
+    '''
+    Return the bring-up time, the median broadcast duration and skew in ms and the state strings received per second
+    '''
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        operator = ShardedOperator(workers=workers)
+        report = operator.bring_up(ips, deadline=10.0)
+
+        broadcasts = [operator.execute_command('battery?') for _ in range(repetitions)]
+
+        received = sum(statistics['received'] for statistics in operator.statistics())
+        time.sleep(seconds)
+        received = sum(statistics['received'] for statistics in operator.statistics()) - received
+        operator.close()
+
+    return {
+        'ready': len(report['ready']),
+        'bring_up_s': report['duration'],
+        'broadcast_ms': median([broadcast['duration'] for broadcast in broadcasts]) * 1000,
+        'skew_ms': median([broadcast['skew'] for broadcast in broadcasts if broadcast['skew'] is not None]) * 1000,
+        'states_per_s': received / seconds
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measure the sharded operator against the simulator')
+    parser.add_argument('--drones', type=int, default=100)
+    parser.add_argument('--workers', type=int, nargs='*', default=[1, 2, 4])
+    parser.add_argument('--repetitions', type=int, default=20)
+    parser.add_argument('--state-rate', type=float, default=10.0)
+    arguments = parser.parse_args(argv)
+
+    print(str(os.cpu_count()) + ' cores, ' + str(arguments.drones) + ' drones')
+    print('workers  ready  bring-up s  broadcast ms  skew ms  states/s')
+    with SimulatedSwarm(arguments.drones, state_rate=arguments.state_rate) as simulator:
+        for workers in arguments.workers:
+            result = measure(simulator.ips, workers, arguments.repetitions)
+            print('{:>7}  {:>5}  {:>10.2f}  {:>12.2f}  {:>7.3f}  {:>8.0f}'.format(
+                workers, result['ready'], result['bring_up_s'], result['broadcast_ms'],
+                result['skew_ms'], result['states_per_s']))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
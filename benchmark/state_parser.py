@@ -0,0 +1,102 @@
+'''
+Micro-benchmark for parsing Tello state strings: state strings parsed per second by the previous string based parser and by drone.staterecord.parse_state.
+
+Usage: python -m benchmark.state_parser [packets]
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drone.state import State  # noqa: E402
+from drone.staterecord import parse_state  # noqa: E402
+
+STATE_STRING = (b'mid:-1;x:0;y:0;z:0;mpry:0,0,0;pitch:0;roll:0;yaw:0;vgx:0;vgy:0;vgz:0;'
+                b'templ:83;temph:85;tof:10;h:0;bat:88;baro:193.77;time:0;'
+                b'agx:-5.00;agy:0.00;agz:-998.00;\r\n')
+
+
+class LegacyState:
+    '''
+    The previous parser of State._state_thread for a single received (bytes, address) tuple
+    '''
+
+    def update(self, response):
+        statelist = str(response).split(';')
+
+        # Remove first two characters
+        statelist[0] = statelist[0][3:]
+
+        stateswitcher = {
+            'mid': 'mid',
+            'x': 'mx',
+            'y': 'my',
+            'z': 'mz',
+            'mpry': 'mpry',
+            'pitch': 'pitch',
+            'roll': 'roll',
+            'yaw': 'yaw',
+            'vgx': 'vgx',
+            'vgy': 'vgy',
+            'vgz': 'vgz',
+            'agx': 'agx',
+            'agy': 'agy',
+            'agz': 'agz',
+            'templ': 'templ',
+            'temph': 'temph',
+            'tof': 'tof_in_cm',
+            'h': 'height',
+            'bat': 'battery',
+            'baro': 'barometer',
+            'time': 'motor_time'
+        }
+
+        self.friendlyname = ''
+        for entry in statelist:
+
+            # Continue if the last attribute has been parsed
+            if entry.startswith('\\r\\n\''):
+                continue
+
+            # Set values to the corresponding attributes
+            identifier = entry.split(':')[0]
+            value = entry.split(':')[1]
+
+            attribute = stateswitcher[identifier]
+
+            setattr(self, attribute, value)
+            self.friendlyname += identifier
+            self.friendlyname += ' : '
+            self.friendlyname += value
+            self.friendlyname += '\n'
+
+
+def measure(parse, packets):
+    '''
+    Return the number of state strings parsed per second
+    '''
+    start = time.perf_counter()
+    for _ in range(packets):
+        parse()
+    return packets / (time.perf_counter() - start)
+
+
+def main(argv):
+    packets = int(argv[0]) if argv else 100000
+
+    legacy = LegacyState()
+    state = State()
+    results = (
+        ('legacy', measure(lambda: legacy.update((STATE_STRING, ('192.168.10.1', 8889))), packets)),
+        ('parse_state', measure(lambda: parse_state(STATE_STRING), packets)),
+        ('State.update', measure(lambda: state.update(STATE_STRING), packets)),
+    )
+
+    print('parser        packets/s   speedup')
+    for name, rate in results:
+        print('{:<12}  {:>9.0f}   {:>6.1f}x'.format(name, rate, rate / results[0][1]))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
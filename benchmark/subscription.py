@@ -0,0 +1,65 @@
+'''
+Micro-benchmark for state subscriptions: time State.update needs per state string with different numbers and kinds of subscribers, and whether a slow subscriber holds back a fast one.
+
+Usage: python -m benchmark.subscription [packets]
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drone.state import State  # noqa: E402
+
+STATE_STRINGS = [('mid:-1;x:0;y:0;z:0;mpry:0,0,0;pitch:0;roll:0;yaw:0;vgx:0;vgy:0;vgz:0;'
+                  'templ:83;temph:85;tof:10;h:' + str(height) + ';bat:88;baro:193.77;time:0;'
+                  'agx:-5.00;agy:0.00;agz:-998.00;\r\n').encode('utf-8') for height in range(0, 100, 10)]
+
+
+def measure(state, packets):
+    '''
+    Return the time State.update takes per state string in microseconds. The height changes with every 10th string
+    '''
+    start = time.perf_counter()
+    for index in range(packets):
+        state.update(STATE_STRINGS[index // 10 % len(STATE_STRINGS)])
+    return (time.perf_counter() - start) / packets * 1e6
+
+
+def main(argv):
+    packets = int(argv[0]) if argv else 50000
+
+    def fast(key, record):
+        pass
+
+    def slow(key, record):
+        time.sleep(0.1)
+
+    setups = (
+        ('no subscribers', []),
+        ('1 subscriber', [dict(callback=fast, changes_only=False)]),
+        ('10 subscribers', [dict(callback=fast, changes_only=False)] * 10),
+        ('1 changes only', [dict(callback=fast, fields=('height',))]),
+        ('1 at 10 Hz', [dict(callback=fast, changes_only=False, max_rate=10)]),
+        ('fast and slow', [dict(callback=fast, changes_only=False), dict(callback=slow, changes_only=False)]),
+    )
+
+    print('subscribers         us/packet   added  delivered')
+    baseline = None
+    for name, subscribers in setups:
+        state = State()
+        subscriptions = [state.subscribe(**arguments) for arguments in subscribers]
+        duration = measure(state, packets)
+
+        # Let the delivery threads catch up before counting
+        time.sleep(0.2)
+        for subscription in subscriptions:
+            subscription.close()
+        delivered = ', '.join(str(subscription.delivered) for subscription in subscriptions[:2]) or '-'
+        if baseline is None:
+            baseline = duration
+        print('{:<18}  {:>8.2f}  {:>+6.2f}  {}'.format(name, duration, duration - baseline, delivered))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,375 @@
+import asyncio
+from collections import deque
+import time
+from drone.logentry import LogEntry
+from drone.rtt import RttEstimator, plausible_response
+from drone.state import State
+from drone.response import Response
+
+# State endpoints shared by the drones of an event loop which have none of their own: (loop, port) -> [future of the StateProtocol, references]
+_shared_endpoints = {}
+
+
+class _CommandProtocol(asyncio.DatagramProtocol):
+    '''
+    Datagram endpoint for the command connection. Hands every acknowledge to the owning drone
+    '''
+
+    def __init__(self, tello):
+        self.tello = tello
+
+    def datagram_received(self, data, address):
+        self.tello._receive(data, address)
+
+    def error_received(self, exc):
+        print('❗  Caught exception socket.error: ' + str(exc))
+
+
+class StateProtocol(asyncio.DatagramProtocol):
+    '''
+    Datagram endpoint for the state stream of several drones. Hands each state string to the State registered for the source ip
+    '''
+
+    def __init__(self):
+        self.transport = None
+
+        # Registered drone states by ip address
+        self.states = {}
+
+        # Optional TelemetryRecorder for the state of all drones
+        self.recorder = None
+
+        # Counters
+        self.packets_received = 0
+        self.packets_unknown = 0
+        self.packets_invalid = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def register(self, tello_ip, state):
+        '''
+        Route the state strings from the given ip address to the state
+        '''
+        self.states[tello_ip] = state
+
+    def unregister(self, tello_ip, state):
+        '''
+        Stop routing state strings to the given state
+        '''
+        if self.states.get(tello_ip) is state:
+            del self.states[tello_ip]
+
+    def datagram_received(self, data, address):
+        self.packets_received += 1
+
+        state = self.states.get(address[0])
+        if state is None:
+            self.packets_unknown += 1
+            return
+
+        try:
+            state.update(data)
+        except (KeyError, IndexError, ValueError):
+            self.packets_invalid += 1
+            return
+
+        if self.recorder is not None:
+            self.recorder.record(address[0], state.record)
+
+    def close(self):
+        '''
+        Close the endpoint
+        '''
+        self.states = {}
+        if self.transport is not None:
+            self.transport.close()
+
+
+async def open_state_endpoint(local_ip='0.0.0.0', local_port=8890):
+    '''
+    Listen to the state stream on the running event loop. Returns the StateProtocol of the endpoint
+    '''
+    loop = asyncio.get_running_loop()
+    try:
+        _, protocol = await loop.create_datagram_endpoint(
+            StateProtocol, local_addr=(local_ip, local_port))
+    except OSError as exc:
+        raise OSError(exc.errno, 'Can not listen to the state on port ' + str(local_port) + ' (' + str(exc.strerror) +
+                      '). Drones of one process have to share a state endpoint, pass it as state_protocol') from exc
+    return protocol
+
+
+async def acquire_state_endpoint(local_port=8890):
+    '''
+    Return the StateProtocol on the given port which is shared by all drones of the running event loop without an endpoint of their own. Each call needs a release_state_endpoint()
+    '''
+    key = (asyncio.get_running_loop(), local_port)
+    shared = _shared_endpoints.get(key)
+    if shared is None:
+        # Drones connecting concurrently wait for the same endpoint
+        shared = _shared_endpoints[key] = [asyncio.ensure_future(open_state_endpoint(local_port=local_port)), 0]
+    shared[1] += 1
+    try:
+        return await shared[0]
+    except OSError:
+        shared[1] -= 1
+        if _shared_endpoints.get(key) is shared:
+            del _shared_endpoints[key]
+        raise
+
+
+def release_state_endpoint(protocol, local_port=8890):
+    '''
+    Release an endpoint of acquire_state_endpoint(). The last release closes it
+    '''
+    key = (asyncio.get_running_loop(), local_port)
+    shared = _shared_endpoints.get(key)
+    if shared is None or not shared[0].done() or shared[0].result() is not protocol:
+        return
+    shared[1] -= 1
+    if shared[1] > 0:
+        return
+    del _shared_endpoints[key]
+    protocol.close()
+
+
+class AsyncTello:
+    '''
+    Tello drone driven by an asyncio event loop instead of threads. Behaves like drone.tello.Tello but all I/O has to be awaited:
+
+        tello = AsyncTello('192.168.10.1')
+        await tello.connect()
+        await tello.send('takeoff')
+    '''
+
+    def __init__(self, tello_ip='192.168.10.1', send_keepalives=True, debug=False, state_protocol=None, log_sink=None, query_cache=None):
+
+        # Server information
+        self.local_ip = ''
+        self.local_port = 0
+        self.transport = None
+
+        # Drone information
+        self.tello_ip = tello_ip
+        self.tello_port = 8889
+        self.tello_address = (self.tello_ip, self.tello_port)
+        self.tello_sn = None
+
+        # Drone state. Without an endpoint of the swarm the drone uses the endpoint on port 8890 shared by the event loop
+        self.state = State()
+        self.state_protocol = state_protocol
+        self.owns_state_protocol = state_protocol is None
+
+        # Debug and log. Only the most recent entries are kept in memory, completed entries are passed to the log sink
+        self.LOG_HISTORY = 100
+        self.log = deque(maxlen=self.LOG_HISTORY)
+        self.log_sink = log_sink
+
+        # Optional QueryCache which answers read commands like 'battery?' from the state
+        self.query_cache = query_cache
+        self.command_counter = 0
+        self.debug = debug
+
+        # Future and LogEntry of the command waiting for an acknowledge. Answers to a command which timed out are expected until abandoned_until_ns
+        self.pending = None
+        self.pending_entry = None
+        self.abandoned_until_ns = 0
+        self.stale_responses = 0
+
+        # Maximum time to wait for an acknowledgement. Otherwise abort the flight.
+        self.MAX_TIME_OUT = 10.0
+
+        # The timeout of each command follows the round trip times measured for its class
+        self.rtt = RttEstimator(self.MAX_TIME_OUT)
+
+        # Initialize drone
+        self.MAX_INITIALIZATION_ITERATIONS = 5
+
+        # Task for keep-alive-messages. They are only sent to an idle drone, from a separate endpoint which discards the replies
+        self.KEEPALIVE_INTERVAL = 5.0
+        self.send_keepalives = send_keepalives
+        self.keepalive_task = None
+        self.keepalive_transport = None
+        self.last_command = time.monotonic()
+
+    @property
+    def __tello_address__(self):
+        return self.tello_address
+
+    @property
+    def __state__(self):
+        return self.state
+
+    @property
+    def __log__(self):
+        return self.log
+
+    async def connect(self):
+        '''
+        Open the command and state endpoints on the running event loop, initialize the drone and start sending keep-alive-messages. Returns True if the drone is in SDK mode
+        '''
+        loop = asyncio.get_running_loop()
+
+        # An empty local ip binds to all interfaces like the thread-based sockets
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _CommandProtocol(self), local_addr=(self.local_ip or '0.0.0.0', self.local_port))
+        if self.owns_state_protocol:
+            self.state_protocol = await acquire_state_endpoint()
+        self.state_protocol.register(self.tello_ip, self.state)
+
+        is_connected = await self.init_drone()
+
+        if self.send_keepalives:
+            self.keepalive_transport, _ = await loop.create_datagram_endpoint(
+                asyncio.DatagramProtocol, local_addr=(self.local_ip or '0.0.0.0', 0))
+            self.keepalive_task = loop.create_task(self._keepalive())
+        return is_connected
+
+    async def init_drone(self):
+        '''
+        Initialize the Tello drone with 'command' and retrieve and store the serial number. Returns True if the drone is in SDK mode
+        '''
+        response = Response()
+        counter = 0
+        while (not response.success() and counter < self.MAX_INITIALIZATION_ITERATIONS):
+            response = await self.send('command')
+            counter += 1
+
+        if response.success():
+            response = await self.send('sn?')
+            if response.success():
+                self.state.is_connected = True
+                self.tello_sn = response.returnvalue
+        return self.state.is_connected
+
+    async def send(self, command):
+        '''
+        Send a command to the tello drone and wait until the acknowledge is received or the maximum timeout is reached
+        :param command: (str) the command to send
+        '''
+
+        # If we try to receive the serial number return the stored value if it exists
+        if command == 'sn?' and self.tello_sn != None:
+            if self.debug:
+                print('✅ Serial Number: ' + self.tello_sn)
+            return Response('b\'' + self.tello_sn)
+
+        # Read commands are answered from a fresh state string if possible
+        if self.query_cache is not None:
+            response = self.query_cache.answer(command, self)
+            if response is not None:
+                if self.debug:
+                    print('✅ ' + command + ' from the state: ' + response.returnvalue)
+                return response
+
+        # Stores the current command and an id in the log
+        entry = LogEntry(command, self.command_counter)
+        entry.timeout = self.rtt.timeout(command)
+        entry.ambiguous = entry.start_ns < self.abandoned_until_ns
+        self.command_counter += 1
+        self.log.append(entry)
+        self.pending = asyncio.get_running_loop().create_future()
+        self.pending_entry = entry
+        self.last_command = time.monotonic()
+
+        # Send command as utf-8 to the specified tello address
+        self.transport.sendto(command.encode('utf-8'), self.tello_address)
+        if self.debug:
+            print('📶  Sending command: ' + str(command) +
+                  ' to  ' + str(self.tello_ip))
+
+        try:
+            response = await asyncio.wait_for(self.pending, entry.timeout)
+        except asyncio.TimeoutError:
+            self.rtt.timed_out(command)
+            self.abandoned_until_ns = time.monotonic_ns() + int(entry.timeout * 1e9)
+            if self.debug:
+                print('❌  Timeout of ' + '{:.2f}'.format(entry.timeout) + ' s exceeded for command ' +
+                      command + ' for ' + self.tello_ip)
+            return Response('b\'error timeout')
+        finally:
+            self.pending = None
+            self.pending_entry = None
+            if self.log_sink is not None:
+                self.log_sink.write(self.tello_ip, entry, self.tello_sn)
+
+        # Karn's algorithm: only unambiguous answers are used for the estimate
+        if not entry.ambiguous:
+            self.rtt.sample(command, entry.duration)
+
+        if response.success():
+            print('✅  Succeeded command ' + command +
+                  ' for ' + self.tello_ip)
+        else:
+            print('❌  Failed command ' + command +
+                  ' for ' + self.tello_ip)
+
+        return response
+
+    # Same name as the thread-based Tello
+    send_command = send
+
+    async def close_connection(self):
+        '''
+        Stops the keepalive task and closes the endpoints
+        '''
+        self.send_keepalives = False
+        self.state.is_connected = False
+        if self.keepalive_task is not None:
+            self.keepalive_task.cancel()
+        if self.keepalive_transport is not None:
+            self.keepalive_transport.close()
+        if self.transport is not None:
+            self.transport.close()
+        if self.state_protocol is not None:
+            self.state_protocol.unregister(self.tello_ip, self.state)
+            if self.owns_state_protocol:
+                self.owns_state_protocol = False
+                release_state_endpoint(self.state_protocol)
+
+    async def enable_missionpads(self):
+        '''
+        Notifies the Tello drone that missionpads are enabled and updates the state
+        '''
+        if (await self.send('mon')).success():
+            self.state.missionpads_enabled = True
+
+    async def disable_missionpads(self):
+        '''
+        Notifies the Tello drone that missionpads are disabled and updates the state
+        '''
+        if (await self.send('moff')).success():
+            self.state.missionpads_enabled = False
+
+    async def _keepalive(self):
+        '''
+        Send dummy command ('sn?') to the drone to keep the connection alive once it has been idle for KEEPALIVE_INTERVAL seconds
+        Runs as a task on the event loop
+        '''
+        while self.send_keepalives:
+            idle = time.monotonic() - self.last_command
+            if idle >= self.KEEPALIVE_INTERVAL:
+                # A pending command keeps the drone busy until it is answered
+                if self.pending is None:
+                    self.keepalive_transport.sendto('sn?'.encode('utf-8'), self.tello_address)
+                idle = 0.0
+            await asyncio.sleep(self.KEEPALIVE_INTERVAL - idle)
+
+    def _receive(self, data, address):
+        '''
+        Called by the command endpoint for each response of the Tello drone
+        '''
+        response = Response(data)
+
+        if self.debug:
+            print('Response from ' + address[0] + ': ' + str(response))
+
+        # Only the pending command can be answered. Late answers to commands which timed out are dropped if they do not fit the pending command
+        entry = self.pending_entry
+        if entry is None or self.pending.done() or not plausible_response(entry.command, response, entry.ambiguous):
+            self.stale_responses += 1
+            return
+
+        entry.add_response(response)
+        self.pending.set_result(response)
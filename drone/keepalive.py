@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import select
+import socket
+import threading
+import time
+
+
+class KeepaliveScheduler:
+    '''
+    Keeps the connections of many drones alive from a single thread. A drone which has not been sent a command for interval seconds receives 'sn?' so it does not land on its own. Drones which are busy with real commands cost nothing.
+
+    Keepalives are sent from a separate socket. Their replies arrive there and are discarded unparsed, so they never reach the command transport or the LogEntry of a command.
+    '''
+
+    def __init__(self, interval=5.0, local_ip=''):
+        self.KEEPALIVE_INTERVAL = interval
+        self.KEEPALIVE_COMMAND = b'sn?'
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((local_ip, 0))
+        self.socket.setblocking(False)
+
+        # Due times in monotonic ns as (due, order, tello). Entries of unregistered drones are dropped when they are due
+        self.heap = []
+        self.order = itertools.count()
+        self.drones = set()
+        self.lock = threading.Lock()
+
+        # Counters
+        self.keepalives_sent = 0
+        self.replies_discarded = 0
+
+        self.is_running = True
+        self.keepalive_thread = threading.Thread(target=self._keepalive_thread)
+        self.keepalive_thread.daemon = True
+        self.keepalive_thread.start()
+
+    @property
+    def __drones__(self):
+        return self.drones
+
+    def register(self, tello):
+        '''
+        Send keepalives to the drone once it is idle. The idle time is taken from tello.last_command_ns
+        '''
+        interval_ns = int(self.KEEPALIVE_INTERVAL * 1e9)
+        with self.lock:
+            self.drones.add(tello)
+            heapq.heappush(self.heap, (time.monotonic_ns() + interval_ns, next(self.order), tello))
+
+    def unregister(self, tello):
+        '''
+        Stop sending keepalives to the drone
+        '''
+        with self.lock:
+            self.drones.discard(tello)
+
+    def close(self):
+        '''
+        Stop the thread and close the socket
+        '''
+        if not self.is_running:
+            return
+        self.is_running = False
+
+        # Wake the thread from select
+        try:
+            self.socket.sendto(b'', ('127.0.0.1', self.socket.getsockname()[1]))
+        except OSError:
+            pass
+        if threading.current_thread() is not self.keepalive_thread:
+            self.keepalive_thread.join(self.KEEPALIVE_INTERVAL)
+        self.socket.close()
+
+    def _send_due(self, now):
+        '''
+        Send keepalives to the idle drones whose due time has passed and return the time in seconds until the next one is due
+        '''
+        interval_ns = int(self.KEEPALIVE_INTERVAL * 1e9)
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                _, _, tello = heapq.heappop(self.heap)
+                if tello not in self.drones:
+                    continue
+
+                # Commands reset the timer. A pending command keeps the drone busy until it is answered
+                if tello.pending is not None:
+                    due = now + interval_ns
+                else:
+                    due = tello.last_command_ns + interval_ns
+                if due <= now:
+                    try:
+                        self.socket.sendto(self.KEEPALIVE_COMMAND, tello.tello_address)
+                        self.keepalives_sent += 1
+                    except OSError:
+                        pass
+                    due = now + interval_ns
+                heapq.heappush(self.heap, (due, next(self.order), tello))
+
+            if not self.heap:
+                return self.KEEPALIVE_INTERVAL
+            return max(0.0, (self.heap[0][0] - now) / 1e9)
+
+    def _keepalive_thread(self):
+        '''
+        Send the keepalives when they are due and discard their replies
+        Runs as a thread until the scheduler is closed
+        '''
+        while self.is_running:
+            timeout = self._send_due(time.monotonic_ns())
+            try:
+                readable, _, _ = select.select([self.socket], [], [], timeout)
+            except (OSError, ValueError):
+                break
+
+            # Replies are only drained, their content is of no interest
+            while readable:
+                try:
+                    self.socket.recv(1024)
+                    self.replies_discarded += 1
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError:
+                    if self.socket.fileno() == -1:
+                        return
+                    break
@@ -1,4 +1,6 @@
 from datetime import datetime
+import threading
+import time
 
 
 class LogEntry:
@@ -11,14 +13,26 @@ class LogEntry:
         self.end_time = None
         self.duration = None
 
-    def add_response(self, response):
+        # Monotonic timestamps in nanoseconds for durations and metrics. Not affected by changes of the wall clock
+        self.start_ns = time.monotonic_ns()
+        self.end_ns = None
+
+        # Time in seconds the drone waits for the response. A response is ambiguous if a late answer to an earlier command could have been taken for it
+        self.timeout = None
+        self.ambiguous = False
+
+        # Signalled by the receive thread once the response arrived
+        self.completed = threading.Event()
+
+    def add_response(self, response, received_ns=None):
         self.response = response
+        self.end_ns = time.monotonic_ns() if received_ns is None else received_ns
         self.end_time = datetime.now()
         self.duration = self.get_duration()
+        self.completed.set()
 
     def get_duration(self):
-        diff = self.end_time - self.start_time
-        return diff.total_seconds()
+        return (self.end_ns - self.start_ns) / 1e9
 
     @property
     def __response__(self):
@@ -30,6 +44,28 @@ class LogEntry:
         else:
             return True
 
+    def wait_for_response(self, timeout=None):
+        '''
+        Block until the response has been added or the timeout (in seconds) is reached. Returns True if a response was received
+        '''
+        return self.completed.wait(timeout)
+
+    def to_dict(self):
+        '''
+        Return the entry as dict of JSON serializable values
+        '''
+        return {
+            'id': self.id,
+            'command': self.command,
+            'response': None if self.response is None else self.response.returnvalue,
+            'start_time': self.start_time.isoformat(),
+            'end_time': None if self.end_time is None else self.end_time.isoformat(),
+            'duration': self.duration,
+            'timeout': self.timeout,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns
+        }
+
     def __repr__(self):
         string = ''
         string += 'id: ' + str(self.id)
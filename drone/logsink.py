@@ -0,0 +1,78 @@
+import json
+import os
+import queue
+import threading
+
+
+class LogSink:
+    '''
+    Appends completed log entries of all drones as JSON lines to a file. The file is written by a background thread which flushes after each batch, so the log survives a crash of the flight script.
+    '''
+
+    def __init__(self, path):
+
+        # Maximum number of lines written between two flushes
+        self.BATCH_SIZE = 256
+
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.queue = queue.SimpleQueue()
+        self.entries_written = 0
+
+        # Thread for writing the log
+        self.is_closed = False
+        self.write_thread = threading.Thread(target=self._write_thread)
+        self.write_thread.daemon = True
+        self.write_thread.start()
+
+    @property
+    def __path__(self):
+        return self.path
+
+    def write(self, drone, entry, serial_number=None):
+        '''
+        Queue the given LogEntry of the drone (its ip address) for writing. The serial number is None before the handshake
+        '''
+        if self.is_closed:
+            return
+        line = entry.to_dict()
+        line['drone'] = drone
+        line['serial_number'] = serial_number
+        self.queue.put(line)
+
+    def close(self):
+        '''
+        Write the queued entries and close the file
+        '''
+        if self.is_closed:
+            return
+        self.is_closed = True
+        self.queue.put(None)
+        self.write_thread.join()
+
+    def _write_thread(self):
+        '''
+        Write queued entries to the file
+        Runs as a thread, writes all entries queued at once and flushes the file afterwards
+        '''
+        with open(self.path, 'a', encoding='utf-8') as out:
+            while True:
+                batch = [self.queue.get()]
+                while len(batch) < self.BATCH_SIZE:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                closing = None in batch
+                for line in batch:
+                    if line is not None:
+                        out.write(json.dumps(line) + '\n')
+                        self.entries_written += 1
+                out.flush()
+
+                if closing:
+                    break
@@ -0,0 +1,276 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+# Bits of the sub-buckets of the latency histograms. Each power of two is split into 2^7 buckets, so recorded values are exact to 1 %
+SUB_BUCKET_BITS = 7
+
+# Upper bounds in seconds of the buckets exported to Prometheus
+PROMETHEUS_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0)
+
+# Counters of each drone and command. Stale responses answered a command which had already timed out, cache hits are queries answered from the state without a round trip
+COUNTERS = ('commands', 'timeouts', 'retries', 'errors', 'stale', 'cache_hits', 'cache_misses')
+
+# Key of the values of the whole swarm in SwarmMetrics.snapshot()
+SWARM = 'swarm'
+
+
+class LatencyHistogram:
+    '''
+    HDR-style histogram of latencies in nanoseconds. Buckets grow exponentially with linear sub-buckets, so any latency from nanoseconds to hours is recorded with a relative error of 1 % in a few hundred buckets. Only used buckets are stored.
+    '''
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+
+    def record(self, value):
+        '''
+        Add a latency in nanoseconds
+        '''
+        index = _bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other):
+        '''
+        Add the values of another histogram, e.g. to combine the latencies of several drones
+        '''
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.minimum is not None and (self.minimum is None or other.minimum < self.minimum):
+            self.minimum = other.minimum
+        if other.maximum is not None and (self.maximum is None or other.maximum > self.maximum):
+            self.maximum = other.maximum
+
+    def percentile(self, percent):
+        '''
+        Return the latency in nanoseconds below which the given percentage of the values lie
+        '''
+        if self.count == 0:
+            return None
+        rank = max(1, int(self.count * percent / 100.0 + 0.5))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(_bucket_upper_bound(index), self.maximum)
+        return self.maximum
+
+    def mean(self):
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+    def cumulative_counts(self, bounds):
+        '''
+        Return the number of values up to each bound in nanoseconds
+        '''
+        counts = [0] * len(bounds)
+        for index, count in self.buckets.items():
+            upper = _bucket_upper_bound(index)
+            for position, bound in enumerate(bounds):
+                if upper <= bound:
+                    counts[position] += count
+        return counts
+
+
+class SwarmMetrics:
+    '''
+    Latency histograms and counters of the commands of all drones, keyed by drone (ip address) and command verb (e.g. 'go', 'battery?'). The serial number of a drone is known only after the handshake, so it is kept apart and exported as a label. Read with snapshot() or as Prometheus text with serve().
+    '''
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+
+        # Serial number of each drone, set with identify()
+        self.serial_numbers = {}
+        self.lock = threading.Lock()
+        self.server = None
+
+    def observe(self, drone, command, latency_ns):
+        '''
+        Record the latency in nanoseconds between sending the command and receiving its response
+        '''
+        key = (drone, _verb(command))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(latency_ns)
+
+    def count(self, drone, command, name, increment=1):
+        '''
+        Increase the counter with the given name (see COUNTERS) of the drone and command
+        '''
+        key = (drone, _verb(command))
+        with self.lock:
+            counters = self.counters.get(key)
+            if counters is None:
+                counters = self.counters[key] = dict.fromkeys(COUNTERS, 0)
+            counters[name] += increment
+
+    def identify(self, drone, serial_number):
+        '''
+        Store the serial number of the drone. It labels all metrics of the drone, including those recorded before
+        '''
+        with self.lock:
+            self.serial_numbers[drone] = serial_number
+
+    def histogram(self, drone, command):
+        '''
+        Return the LatencyHistogram of the drone and command or None
+        '''
+        return self.histograms.get((drone, _verb(command)))
+
+    def snapshot(self):
+        '''
+        Return the current counters and latency percentiles in ms as dict: drone -> command -> values. The key SWARM holds the values of all drones together
+        '''
+        snapshot = {}
+        with self.lock:
+            swarm_counters = {}
+            for (drone, verb), counters in self.counters.items():
+                snapshot.setdefault(drone, {})[verb] = dict(counters)
+                totals = swarm_counters.setdefault(verb, dict.fromkeys(COUNTERS, 0))
+                for name, value in counters.items():
+                    totals[name] += value
+
+            swarm_histograms = {}
+            for (drone, verb), histogram in self.histograms.items():
+                values = snapshot.setdefault(drone, {}).setdefault(verb, dict.fromkeys(COUNTERS, 0))
+                _add_percentiles(values, histogram)
+                if verb not in swarm_histograms:
+                    swarm_histograms[verb] = LatencyHistogram()
+                swarm_histograms[verb].merge(histogram)
+
+        if swarm_counters or swarm_histograms:
+            snapshot[SWARM] = swarm_counters
+            for verb, histogram in swarm_histograms.items():
+                _add_percentiles(swarm_counters.setdefault(verb, dict.fromkeys(COUNTERS, 0)), histogram)
+        return snapshot
+
+    def to_prometheus(self):
+        '''
+        Return all metrics in the Prometheus text format
+        '''
+        bounds = [int(bound * 1e9) for bound in PROMETHEUS_BUCKETS]
+        lines = []
+        with self.lock:
+            lines.append('# HELP dronella_command_latency_seconds Time between sending a command and receiving its response')
+            lines.append('# TYPE dronella_command_latency_seconds histogram')
+            for (drone, verb), histogram in sorted(self.histograms.items()):
+                labels = self._labels(drone, verb)
+                counts = histogram.cumulative_counts(bounds)
+                for bound, count in zip(PROMETHEUS_BUCKETS, counts):
+                    lines.append('dronella_command_latency_seconds_bucket{' + labels + ',le="' +
+                                 repr(bound) + '"} ' + str(count))
+                lines.append('dronella_command_latency_seconds_bucket{' + labels + ',le="+Inf"} ' +
+                             str(histogram.count))
+                lines.append('dronella_command_latency_seconds_sum{' + labels + '} ' + repr(histogram.total / 1e9))
+                lines.append('dronella_command_latency_seconds_count{' + labels + '} ' + str(histogram.count))
+
+            for name in COUNTERS:
+                metric = 'dronella_' + ('commands' if name == 'commands' else 'command_' + name) + '_total'
+                lines.append('# TYPE ' + metric + ' counter')
+                for (drone, verb), counters in sorted(self.counters.items()):
+                    lines.append(metric + '{' + self._labels(drone, verb) + '} ' + str(counters[name]))
+        return '\n'.join(lines) + '\n'
+
+    def _labels(self, drone, verb):
+        '''
+        Prometheus labels of the drone and command. Requires the lock
+        '''
+        return ('drone="' + _escape(drone) + '",serial_number="' + _escape(self.serial_numbers.get(drone, '')) +
+                '",command="' + _escape(verb) + '"')
+
+    def serve(self, port=9100, address='127.0.0.1'):
+        '''
+        Serve the metrics as Prometheus text on http://address:port/metrics from a background thread
+        '''
+        if self.server is not None:
+            return self.server
+
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes are not printed
+                pass
+
+        self.server = ThreadingHTTPServer((address, port), MetricsHandler)
+        self.server.daemon_threads = True
+        server_thread = threading.Thread(target=self.server.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+        return self.server
+
+    def close(self):
+        '''
+        Stop the HTTP endpoint
+        '''
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def _bucket_index(value):
+    '''
+    Index of the bucket of a value: values below 2^(SUB_BUCKET_BITS + 1) have their own bucket, above each power of two has 2^SUB_BUCKET_BITS buckets
+    '''
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    if shift <= 0:
+        return value
+    return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+
+def _bucket_upper_bound(index):
+    '''
+    Largest value which falls into the bucket with the given index
+    '''
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    if shift <= 0:
+        return index
+    mantissa = index - (shift << SUB_BUCKET_BITS)
+    return ((mantissa + 1) << shift) - 1
+
+
+def _add_percentiles(values, histogram):
+    '''
+    Add the latency percentiles in ms of the histogram to the values
+    '''
+    values['p50_ms'] = histogram.percentile(50) / 1e6
+    values['p90_ms'] = histogram.percentile(90) / 1e6
+    values['p99_ms'] = histogram.percentile(99) / 1e6
+    values['max_ms'] = histogram.maximum / 1e6
+    values['mean_ms'] = histogram.mean() / 1e6
+
+
+def _verb(command):
+    return command.split(' ', 1)[0]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
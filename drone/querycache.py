@@ -0,0 +1,88 @@
+import time
+from drone.response import Response
+
+
+def _integer(value):
+    return str(int(value))
+
+
+# Answer of each read command built from a StateRecord in the format of the drone. The state has the height and the time of flight distance in cm, the drone answers in dm and mm
+QUERIES = {
+    'battery?': (('battery',), lambda record: _integer(record.battery)),
+    'height?': (('height',), lambda record: _integer(record.height / 10) + 'dm'),
+    'tof?': (('tof_in_cm',), lambda record: _integer(record.tof_in_cm * 10) + 'mm'),
+    'baro?': (('barometer',), lambda record: '{:.2f}'.format(record.barometer)),
+    'temp?': (('templ', 'temph'), lambda record: _integer(record.templ) + '~' + _integer(record.temph) + 'C'),
+    'attitude?': (('pitch', 'roll', 'yaw'), lambda record: 'pitch:' + _integer(record.pitch) + ';roll:' +
+                  _integer(record.roll) + ';yaw:' + _integer(record.yaw) + ';'),
+    'acceleration?': (('agx', 'agy', 'agz'), lambda record: 'agx:' + '{:.2f}'.format(record.agx) + ';agy:' +
+                      '{:.2f}'.format(record.agy) + ';agz:' + '{:.2f}'.format(record.agz) + ';'),
+    'time?': (('motor_time',), lambda record: _integer(record.motor_time) + 's'),
+}
+
+
+class QueryCache:
+    '''
+    Answers read commands like 'battery?' from the last state string of the drone instead of a round trip. A query is only answered if the state string is at most max_age seconds old and has all values of the answer, otherwise it is sent to the drone. The cache can be shared by all drones of a swarm:
+
+        cache = QueryCache(max_age=0.5)
+        response = cache.answer('battery?', tello)   # None if the state is too old
+    '''
+
+    def __init__(self, max_age=0.5, metrics=None):
+        self.MAX_AGE = max_age
+
+        # Optional SwarmMetrics which count the hits and misses of each drone
+        self.metrics = metrics
+
+        # Hits and misses of each query
+        self.hits = dict.fromkeys(QUERIES, 0)
+        self.misses = dict.fromkeys(QUERIES, 0)
+
+    @property
+    def __max_age__(self):
+        return self.MAX_AGE
+
+    def is_cached(self, command):
+        '''
+        Return True if the command can be answered from the state
+        '''
+        return command in QUERIES
+
+    def answer(self, command, tello):
+        '''
+        Return the Response to the read command from the state of the drone, or None if the command is no cached query or the state is too old
+        '''
+        query = QUERIES.get(command)
+        if query is None:
+            return None
+        fields, answer = query
+
+        record = tello.state.record
+        is_fresh = record.timestamp is not None and time.monotonic() - record.timestamp <= self.MAX_AGE
+        if not is_fresh or any(getattr(record, field) is None for field in fields):
+            self.misses[command] += 1
+            self._count(tello, command, 'cache_misses')
+            return None
+
+        self.hits[command] += 1
+        self._count(tello, command, 'cache_hits')
+        return Response('b\'' + answer(record))
+
+    def statistics(self):
+        '''
+        Return the hits, misses and the hit rate of all queries and of each query
+        '''
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else None,
+            'queries': dict((command, {'hits': self.hits[command], 'misses': self.misses[command]})
+                            for command in QUERIES if self.hits[command] or self.misses[command])
+        }
+
+    def _count(self, tello, command, name):
+        if self.metrics is not None:
+            self.metrics.count(tello.tello_ip, command, name)
@@ -0,0 +1,154 @@
+import threading
+import time
+
+
+class RcChannel:
+    '''
+    Joystick setpoint of a single drone. set() only stores the newest values, the RcController sends them at its rate
+    '''
+
+    def __init__(self, tello):
+        self.tello = tello
+        self.command = b'rc 0 0 0 0'
+        self.setpoint = (0, 0, 0, 0)
+        self.updated = time.monotonic()
+
+        # The drone hovers until the first setpoint
+        self.is_stalled = True
+
+        # Counters
+        self.sent = 0
+        self.stalls = 0
+
+    @property
+    def __setpoint__(self):
+        return self.setpoint
+
+    def set(self, roll, pitch, throttle, yaw):
+        '''
+        Set the velocities left/right, forward/backward, up/down and the yaw rate from -100 to 100. Replaces the previous setpoint
+        '''
+        setpoint = tuple(max(-100, min(100, int(round(value)))) for value in (roll, pitch, throttle, yaw))
+        command = ('rc ' + ' '.join(str(value) for value in setpoint)).encode('utf-8')
+
+        # The controller reads the command before the time, so a new command never looks stalled
+        self.updated = time.monotonic()
+        self.setpoint = setpoint
+        self.command = command
+
+    def stop(self):
+        '''
+        Hover in place
+        '''
+        self.set(0, 0, 0, 0)
+
+
+class RcController:
+    '''
+    Sends the rc setpoints of many drones at a fixed rate from a single thread. The rc command is never answered by the drone, so nothing waits for an acknowledge and no LogEntry is written. If a setpoint is not updated for stall_timeout seconds the drone is sent 'rc 0 0 0 0' and hovers until the next update.
+
+        controller = RcController(rate=30)
+        channel = controller.channel(tello)
+        channel.set(0, 40, 0, 0)
+    '''
+
+    def __init__(self, rate=20.0, stall_timeout=0.5):
+        self.RATE = rate
+        self.STALL_TIMEOUT = stall_timeout
+        self.HOVER_COMMAND = b'rc 0 0 0 0'
+
+        # Channels by drone. Replaced on change, so the send thread iterates without a lock
+        self.channels = {}
+        self.lock = threading.Lock()
+
+        # Ticks which started later than one period after their due time
+        self.ticks = 0
+        self.late_ticks = 0
+
+        self.is_running = True
+        self.send_thread = threading.Thread(target=self._send_thread)
+        self.send_thread.daemon = True
+        self.send_thread.start()
+
+    @property
+    def __channels__(self):
+        return self.channels
+
+    def channel(self, tello):
+        '''
+        Return the RcChannel of the drone. The drone hovers until the first setpoint
+        '''
+        with self.lock:
+            channel = self.channels.get(tello)
+            if channel is None:
+                channel = RcChannel(tello)
+                channels = dict(self.channels)
+                channels[tello] = channel
+                self.channels = channels
+        return channel
+
+    def remove(self, tello):
+        '''
+        Stop sending setpoints to the drone. It is told to hover first
+        '''
+        with self.lock:
+            channels = dict(self.channels)
+            channel = channels.pop(tello, None)
+            self.channels = channels
+        if channel is not None:
+            self._send(channel, self.HOVER_COMMAND)
+
+    def close(self):
+        '''
+        Stop the thread and let all drones hover
+        '''
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.send_thread.join()
+        for channel in self.channels.values():
+            self._send(channel, self.HOVER_COMMAND)
+        self.channels = {}
+
+    def _send(self, channel, command):
+        tello = channel.tello
+        try:
+            tello.transport.sendto(command, tello.tello_address)
+        except OSError:
+            return
+        channel.sent += 1
+
+        # The stream keeps the connection alive, no keepalives are needed
+        tello.last_command_ns = time.monotonic_ns()
+
+    def _send_thread(self):
+        '''
+        Send the newest setpoint of each drone once per period. Ticks are due at fixed times, so the rate does not drift
+        Runs as a thread until the controller is closed
+        '''
+        period = 1.0 / self.RATE
+        due = time.monotonic()
+        while self.is_running:
+            now = time.monotonic()
+            if now < due:
+                time.sleep(due - now)
+                now = time.monotonic()
+            elif now - due > period:
+                # Skip the missed ticks instead of sending a burst
+                self.late_ticks += 1
+                due = now
+
+            for channel in self.channels.values():
+                command = channel.command
+                if now - channel.updated > self.STALL_TIMEOUT:
+                    if not channel.is_stalled:
+                        channel.is_stalled = True
+                        channel.stalls += 1
+                        print('❗  Rc setpoint of ' + channel.tello.tello_ip + ' stalled, hovering')
+                    command = self.HOVER_COMMAND
+                elif channel.is_stalled:
+                    channel.is_stalled = False
+                self._send(channel, command)
+
+            self.ticks += 1
+            due += period
@@ -0,0 +1,328 @@
+from array import array
+import mmap
+import os
+import struct
+import threading
+from drone.telemetry import TELEMETRY_COLUMNS
+
+# Columns of a recording. Each row holds the monotonic receive time and the state values
+RECORDING_COLUMNS = ('timestamp',) + TELEMETRY_COLUMNS
+
+# File header: magic, version, rows per block, number of columns, length of the column names
+FILE_HEADER = struct.Struct('<8sHHHH')
+FILE_MAGIC = b'DRONELLA'
+FILE_VERSION = 1
+
+# Block header: kind, drone index, valid rows, padding. Keeps the values of a block 8 byte aligned
+BLOCK_HEADER = struct.Struct('<4sHHQ')
+DRONE_BLOCK = b'DRON'
+DATA_BLOCK = b'DATA'
+
+# Length of the drone name in a drone block
+NAME_LENGTH = 64
+
+# Missing values are stored as NaN
+NAN = float('nan')
+
+
+class TelemetryRecorder:
+    '''
+    Append-only recorder for the state of all drones. Values are collected in fixed-size column blocks per drone and appended to a binary file with large buffered writes. Files are rotated when they reach max_file_size.
+
+    File layout: a file header with the column names, then blocks. A drone block maps a drone index to its name, a data block holds block_rows rows of one drone column by column as doubles in the byte order of the machine.
+    '''
+
+    def __init__(self, path_prefix, block_rows=64, max_file_size=256 * 1024 * 1024, buffer_size=1024 * 1024):
+        self.path_prefix = path_prefix
+        self.block_rows = block_rows
+        self.max_file_size = max_file_size
+        self.buffer_size = buffer_size
+
+        # Drone name -> index, block of values and number of filled rows
+        self.drones = {}
+        self.blocks = []
+        self.rows = []
+
+        # Current file and the drones declared in it
+        self.file_index = -1
+        self.file = None
+        self.file_size = 0
+        self.declared = set()
+        self.paths = []
+
+        # Attribute of the StateRecord and offset of its column in a block
+        self._scalar_columns = [(name, RECORDING_COLUMNS.index(name) * block_rows)
+                                for name in RECORDING_COLUMNS if not name.startswith('mpry_')]
+        self._mpry_offset = RECORDING_COLUMNS.index('mpry_pitch') * block_rows
+
+        self.lock = threading.Lock()
+        self._open_next_file()
+
+    @property
+    def __paths__(self):
+        return self.paths
+
+    def record(self, name, record):
+        '''
+        Append the values of the StateRecord for the drone with the given name (e.g. its ip address)
+        '''
+        with self.lock:
+            if self.file is None:
+                return
+
+            index = self.drones.get(name)
+            if index is None:
+                index = len(self.blocks)
+                self.drones[name] = index
+                self.blocks.append(array('d', bytes(8 * self.block_rows * len(RECORDING_COLUMNS))))
+                self.rows.append(0)
+
+            block = self.blocks[index]
+            row = self.rows[index]
+
+            for attribute, offset in self._scalar_columns:
+                value = getattr(record, attribute)
+                block[offset + row] = NAN if value is None else value
+
+            mpry = record.mpry
+            for position in range(3):
+                block[self._mpry_offset + position * self.block_rows + row] = \
+                    NAN if mpry is None else mpry[position]
+
+            row += 1
+            self.rows[index] = row
+            if row == self.block_rows:
+                self._write_block(name, index)
+
+    def flush(self):
+        '''
+        Write the partially filled blocks of all drones and flush the file
+        '''
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        '''
+        Write the remaining values and close the file
+        '''
+        with self.lock:
+            if self.file is None:
+                return
+            self._flush()
+            self.file.close()
+            self.file = None
+
+    def _flush(self):
+        '''
+        Write all partially filled blocks. Requires the lock
+        '''
+        for name, index in self.drones.items():
+            if self.rows[index] > 0:
+                self._write_block(name, index)
+        self.file.flush()
+
+    def _write_block(self, name, index):
+        '''
+        Append the block of the drone to the file. Requires the lock
+        '''
+        if name not in self.declared:
+            encoded = name.encode('utf-8')[:NAME_LENGTH]
+            self._write(BLOCK_HEADER.pack(DRONE_BLOCK, index, 0, 0) +
+                        encoded + bytes(NAME_LENGTH - len(encoded)))
+            self.declared.add(name)
+
+        self._write(BLOCK_HEADER.pack(DATA_BLOCK, index, self.rows[index], 0))
+        self._write(self.blocks[index])
+        self.rows[index] = 0
+
+        if self.file_size >= self.max_file_size:
+            self.file.close()
+            self._open_next_file()
+
+    def _write(self, data):
+        self.file.write(data)
+        self.file_size += memoryview(data).nbytes
+
+    def _open_next_file(self):
+        '''
+        Start a new file with the header. Drones are declared again in each file, so every file can be read on its own
+        '''
+        self.file_index += 1
+        path = self.path_prefix + '-' + str(self.file_index).zfill(4) + '.tlm'
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.file = open(path, 'wb', buffering=self.buffer_size)
+        self.file_size = 0
+        self.declared = set()
+        self.paths.append(path)
+
+        names = ','.join(RECORDING_COLUMNS).encode('utf-8')
+        header = FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, self.block_rows,
+                                  len(RECORDING_COLUMNS), len(names)) + names
+
+        # Pad the header so that all values are 8 byte aligned
+        self._write(header + bytes(-len(header) % 8))
+
+
+class ColumnView:
+    '''
+    Values of one field of one drone in a recording. Consists of memoryviews into the memory-mapped files, nothing is copied until values are read
+    '''
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.length = sum(len(segment) for segment in segments)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for segment in self.segments:
+            yield from segment
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self.length))]
+
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('column index out of range')
+
+        for segment in self.segments:
+            if index < len(segment):
+                return segment[index]
+            index -= len(segment)
+
+    def tolist(self):
+        values = []
+        for segment in self.segments:
+            values.extend(segment.tolist())
+        return values
+
+    def toarray(self):
+        '''
+        Copy the values into a single array
+        '''
+        values = array('d')
+        for segment in self.segments:
+            values.frombytes(segment)
+        return values
+
+
+class TelemetryRecording:
+    '''
+    Memory-mapped reader for the files of a TelemetryRecorder. Only the block headers are read when the recording is opened:
+
+        recording = TelemetryRecording(recorder.paths)
+        heights = recording.field('192.168.10.2', 'height')
+    '''
+
+    def __init__(self, paths):
+        if isinstance(paths, str):
+            paths = [paths]
+
+        self.files = []
+        self.maps = []
+        self.views = []
+        self.columns = None
+
+        # Drone name -> list of (memoryview of the values, rows per block, valid rows)
+        self.blocks = {}
+
+        for path in paths:
+            self._open(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def drones(self):
+        return list(self.blocks.keys())
+
+    def field(self, drone, name):
+        '''
+        Return a ColumnView of the field of the given drone
+        '''
+        column = self.columns.index(name)
+        segments = []
+        for values, block_rows, rows in self.blocks.get(drone, []):
+            start = column * block_rows
+            segments.append(values[start:start + rows])
+        return ColumnView(segments)
+
+    def fields(self, drone):
+        '''
+        Return ColumnViews of all fields of the given drone as dict
+        '''
+        return {name: self.field(drone, name) for name in self.columns}
+
+    def close(self):
+        '''
+        Unmap the files. Views of the recording can not be used afterwards
+        '''
+        self.blocks = {}
+        for view in self.views:
+            view.release()
+        for memory in self.maps:
+            try:
+                memory.close()
+            except BufferError:
+                # Still exported by a view. Unmapped when the view is released
+                pass
+        for file in self.files:
+            file.close()
+        self.maps = []
+        self.views = []
+        self.files = []
+
+    def _open(self, path):
+        file = open(path, 'rb')
+        memory = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.files.append(file)
+        self.maps.append(memory)
+
+        magic, version, block_rows, column_count, names_length = FILE_HEADER.unpack_from(memory, 0)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            raise ValueError(path + ' is not a telemetry recording')
+
+        offset = FILE_HEADER.size
+        columns = tuple(bytes(memory[offset:offset + names_length]).decode('utf-8').split(','))
+        if self.columns is None:
+            self.columns = columns
+        elif self.columns != columns:
+            raise ValueError(path + ' has different columns')
+        offset += names_length
+        offset += -offset % 8
+
+        view = memoryview(memory)
+        self.views.append(view)
+        block_size = 8 * block_rows * column_count
+        names = {}
+
+        # A truncated last block (e.g. after a crash) is ignored
+        while offset + BLOCK_HEADER.size <= len(memory):
+            kind, index, rows, _ = BLOCK_HEADER.unpack_from(memory, offset)
+            offset += BLOCK_HEADER.size
+
+            if kind == DRONE_BLOCK:
+                if offset + NAME_LENGTH > len(memory):
+                    break
+                names[index] = bytes(memory[offset:offset + NAME_LENGTH]).rstrip(b'\0').decode('utf-8')
+                self.blocks.setdefault(names[index], [])
+                offset += NAME_LENGTH
+
+            elif kind == DATA_BLOCK:
+                if offset + block_size > len(memory):
+                    break
+                values = view[offset:offset + block_size].cast('d')
+                self.blocks[names[index]].append((values, block_rows, rows))
+                offset += block_size
+
+            else:
+                raise ValueError(path + ' is corrupted at byte ' + str(offset))
@@ -0,0 +1,149 @@
+import math
+import threading
+
+# Classes of commands with different response times. Queries are answered at once, settings after a short delay and maneuvers once the drone completed them
+QUERY = 'query'
+SETTING = 'setting'
+MOTION = 'motion'
+
+SETTING_COMMANDS = ('command', 'speed', 'mon', 'moff', 'mdirection', 'streamon', 'streamoff',
+                    'wifi', 'ap', 'stop', 'emergency')
+
+# Speed of the drone in cm/s until a 'speed' command is sent
+DEFAULT_SPEED = 50.0
+
+# Time in seconds for maneuvers which do not depend on a distance
+MANEUVER_DURATIONS = {'takeoff': 5.0, 'land': 4.0, 'flip': 2.0}
+
+# Maneuvers of a real drone take longer than their distance at full speed (acceleration, wind, a low battery), so the expected duration is stretched by this factor
+DURATION_MARGIN = 1.5
+
+# Smoothing factors and variance multiplier of RFC 6298
+ALPHA = 0.125
+BETA = 0.25
+K = 4
+
+
+def command_class(command):
+    '''
+    Return the class of the command: QUERY, SETTING or MOTION
+    '''
+    verb = command.split(' ', 1)[0]
+    if verb.endswith('?'):
+        return QUERY
+    if verb in SETTING_COMMANDS:
+        return SETTING
+    return MOTION
+
+
+def expected_duration(command, speed=DEFAULT_SPEED):
+    '''
+    Return the time in seconds the drone needs for the maneuver of the command at the given speed in cm/s
+    '''
+    tokens = command.split()
+    verb = tokens[0]
+    try:
+        if verb in MANEUVER_DURATIONS:
+            return MANEUVER_DURATIONS[verb]
+        if verb in ('up', 'down', 'left', 'right', 'forward', 'back'):
+            return int(tokens[1]) / speed
+        if verb in ('cw', 'ccw'):
+            return int(tokens[1]) / 90.0
+        if verb in ('go', 'jump'):
+            return math.sqrt(sum(int(value) ** 2 for value in tokens[1:4])) / int(tokens[4])
+        if verb == 'curve':
+            return 1.6 * math.sqrt(sum(int(value) ** 2 for value in tokens[4:7])) / int(tokens[7])
+    except (IndexError, ValueError, ZeroDivisionError):
+        pass
+    return 0.0
+
+
+def plausible_response(command, response, ambiguous=False):
+    '''
+    Check if the response can be the answer to the command. Responses of the drone carry no id, so a late answer to an earlier command is recognized by its form: queries are answered with a value, all other commands with 'ok'. A maneuver sent while the answer to an earlier command may still arrive is only answered by 'ok', an error could be the refusal of a drone which is still busy with the earlier maneuver
+    '''
+    value = response.returnvalue
+    if value is None:
+        return False
+    if value.startswith('error'):
+        return not (ambiguous and command_class(command) == MOTION)
+    if command_class(command) == QUERY:
+        return value != 'ok'
+    return value == 'ok'
+
+
+class RttEstimator:
+    '''
+    Smoothed round trip time and its variation per command class of a drone as in RFC 6298. The timeout of a command is srtt + 4 * rttvar, plus the expected duration of maneuvers. Each timeout doubles the timeouts of the class until the next answer arrives.
+
+    Fast acks of short moves shrink the estimate of the MOTION class, while a land or flip can take seconds longer than expected. Maneuvers therefore wait at least MIN_MOTION_SLACK seconds on top of DURATION_MARGIN times their expected duration, and the backoff starts from that slack.
+    '''
+
+    def __init__(self, max_timeout=10.0):
+        self.MIN_TIMEOUT = 0.2
+        self.MIN_MOTION_SLACK = max_timeout / 2
+        self.MAX_TIMEOUT = max_timeout
+        self.MAX_BACKOFF = 8
+
+        # Timeouts before the first answer of a class
+        self.INITIAL_TIMEOUTS = {QUERY: 1.0, SETTING: 3.0, MOTION: max_timeout}
+
+        # Command class -> (srtt, rttvar) in seconds and backoff factor
+        self.estimates = {}
+        self.backoff = {}
+        self.speed = DEFAULT_SPEED
+        self.lock = threading.Lock()
+
+    def timeout(self, command):
+        '''
+        Return the time in seconds to wait for the answer to the command
+        '''
+        kind = command_class(command)
+        with self.lock:
+            estimate = self.estimates.get(kind)
+            if estimate is None:
+                timeout = self.INITIAL_TIMEOUTS[kind]
+            else:
+                srtt, rttvar = estimate
+                timeout = srtt + max(0.01, K * rttvar)
+            minimum = self.MIN_MOTION_SLACK if kind == MOTION else self.MIN_TIMEOUT
+            timeout = min(self.MAX_TIMEOUT, max(minimum, timeout) * self.backoff.get(kind, 1))
+
+        if kind == MOTION:
+            timeout += DURATION_MARGIN * expected_duration(command, self.speed)
+        return timeout
+
+    def sample(self, command, rtt):
+        '''
+        Update the estimate with the round trip time in seconds of an answered command. The expected duration of maneuvers is not part of the estimate
+        '''
+        kind = command_class(command)
+        if kind == MOTION:
+            rtt = max(0.0, rtt - expected_duration(command, self.speed))
+
+        with self.lock:
+            estimate = self.estimates.get(kind)
+            if estimate is None:
+                self.estimates[kind] = (rtt, rtt / 2)
+            else:
+                srtt, rttvar = estimate
+                rttvar = (1 - BETA) * rttvar + BETA * abs(srtt - rtt)
+                srtt = (1 - ALPHA) * srtt + ALPHA * rtt
+                self.estimates[kind] = (srtt, rttvar)
+            self.backoff[kind] = 1
+
+    def timed_out(self, command):
+        '''
+        Double the timeouts of the class of the command, up to MAX_BACKOFF times
+        '''
+        kind = command_class(command)
+        with self.lock:
+            self.backoff[kind] = min(self.MAX_BACKOFF, self.backoff.get(kind, 1) * 2)
+
+    def statistics(self):
+        '''
+        Return srtt, rttvar and backoff of each command class as dict
+        '''
+        with self.lock:
+            return {kind: {'srtt': srtt, 'rttvar': rttvar, 'backoff': self.backoff.get(kind, 1)}
+                    for kind, (srtt, rttvar) in self.estimates.items()}
@@ -0,0 +1,103 @@
+from multiprocessing import shared_memory
+import struct
+import time
+from drone.telemetry import NAN, TELEMETRY_COLUMNS
+
+# Layout of a slot: sequence number, timestamp and the telemetry columns as doubles
+SLOT_FORMAT = struct.Struct('<Qd' + 'd' * len(TELEMETRY_COLUMNS))
+SEQUENCE_FORMAT = struct.Struct('<Q')
+VALUES_FORMAT = struct.Struct('<d' + 'd' * len(TELEMETRY_COLUMNS))
+
+# Position of the split missionpad columns in StateRecord.mpry
+MPRY_COLUMNS = {'mpry_pitch': 0, 'mpry_roll': 1, 'mpry_yaw': 2}
+
+# Attempts to read a slot while it is written before giving up
+MAX_READ_ATTEMPTS = 1000
+
+
+class SharedTelemetry:
+    '''
+    Latest state record of many drones in a shared memory block, written by worker processes and read by the coordinator without pickling or locks. Each drone has a fixed slot guarded by a sequence lock: the writer makes the sequence number odd, writes the values and makes it even again. A reader retries while the number is odd or changed during the read. Each slot must only be written by a single thread.
+
+        telemetry = SharedTelemetry(capacity=256)
+        worker = SharedTelemetry(name=telemetry.name)   # in the worker process
+        worker.write(3, record)
+        telemetry.read(3)['height']
+    '''
+
+    def __init__(self, capacity=256, name=None):
+        self.owns_memory = name is None
+        if self.owns_memory:
+            self.memory = shared_memory.SharedMemory(create=True, size=capacity * SLOT_FORMAT.size)
+            self.memory.buf[:capacity * SLOT_FORMAT.size] = bytes(capacity * SLOT_FORMAT.size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name
+        self.capacity = self.memory.size // SLOT_FORMAT.size
+        self.buffer = self.memory.buf
+
+        # Sequence number of each slot written by this process
+        self.sequences = {}
+
+        # Reads which had to be repeated because the slot was written at the same time
+        self.retries = 0
+
+    def write(self, slot, record):
+        '''
+        Store the values of the StateRecord in the slot
+        '''
+        offset = slot * SLOT_FORMAT.size
+        sequence = self.sequences.get(slot)
+        if sequence is None:
+            sequence = SEQUENCE_FORMAT.unpack_from(self.buffer, offset)[0]
+            sequence += sequence & 1
+
+        mpry = record.mpry or (NAN, NAN, NAN)
+        values = [record.timestamp]
+        for name in TELEMETRY_COLUMNS:
+            if name in MPRY_COLUMNS:
+                values.append(mpry[MPRY_COLUMNS[name]])
+                continue
+            value = getattr(record, name)
+            values.append(NAN if value is None else value)
+
+        SEQUENCE_FORMAT.pack_into(self.buffer, offset, sequence + 1)
+        VALUES_FORMAT.pack_into(self.buffer, offset + SEQUENCE_FORMAT.size, *values)
+        SEQUENCE_FORMAT.pack_into(self.buffer, offset, sequence + 2)
+        self.sequences[slot] = sequence + 2
+
+    def read(self, slot):
+        '''
+        Return the last values of the slot as dict including the 'timestamp' and 'age' in seconds. Returns None if the slot was never written
+        '''
+        offset = slot * SLOT_FORMAT.size
+        for _ in range(MAX_READ_ATTEMPTS):
+            fields = SLOT_FORMAT.unpack_from(self.buffer, offset)
+            if fields[0] & 1 or SEQUENCE_FORMAT.unpack_from(self.buffer, offset)[0] != fields[0]:
+                self.retries += 1
+                continue
+            if fields[0] == 0:
+                return None
+
+            values = {'timestamp': fields[1], 'age': time.monotonic() - fields[1]}
+            for name, value in zip(TELEMETRY_COLUMNS, fields[2:]):
+                values[name] = value
+            return values
+        raise TimeoutError('slot ' + str(slot) + ' of the shared telemetry is written continuously')
+
+    def clear(self, slot):
+        '''
+        Mark the slot as never written
+        '''
+        offset = slot * SLOT_FORMAT.size
+        SEQUENCE_FORMAT.pack_into(self.buffer, offset, 0)
+        self.sequences.pop(slot, None)
+
+    def close(self):
+        '''
+        Detach from the shared memory. The creating process also frees it
+        '''
+        self.buffer = None
+        self.memory.close()
+        if self.owns_memory:
+            self.memory.unlink()
@@ -1,58 +1,36 @@
-import socket
-import threading
 import time
+from drone.staterecord import StateRecord, parse_state
+from drone.subscription import Subscription
+from drone.telemetry import TelemetryBuffer
 
 
 class State:
+    '''
+    State of a Tello drone. Filled with the state strings the StateReceiver gets from the drone
+    '''
 
-    def __init__(self):
+    def __init__(self, telemetry_capacity=600):
 
         # Missionpad variables
         self.missionpads_enabled = False
-        self.mid = None
-        self.mx = None
-        self.my = None
-        self.mz = None
-        self.mpry = None
-
-        # Drone inflight information
-        self.pitch = None
-        self.roll = None
-        self.yaw = None
-        self.vgx = None
-        self.vgy = None
-        self.vgz = None
-        self.agx = None
-        self.agy = None
-        self.agz = None
-
-        # Temperature information
-        self.templ = None
-        self.temph = None
-
-        # Position information
-        self.tof_in_cm = None
-        self.height = None
-
-        # Drone information
-        self.battery = None
-        self.barometer = None
-        self.motor_time = None
 
         # Connection information
         self.is_connected = False
 
-        self.local_ip = ''
-        self.local_port = 0
+        # Values of the last state string. Replaced as a whole for each state string
+        self.record = StateRecord()
 
-        self.socket = socket.socket(
-            socket.AF_INET, socket.SOCK_DGRAM)  # socket for receiving state
-        self.socket.bind((self.local_ip, self.local_port))
+        # Recent values for time window queries. 60 seconds at 10 Hz by default
+        self.telemetry = TelemetryBuffer(telemetry_capacity)
 
-        # thread for receiving state
-        self.state_thread = threading.Thread(target=self._state_thread)
-        self.state_thread.daemon = True
-        self.state_thread.start()
+        # Subscriptions which get each new record as (subscription, key). Replaced on change, so the receive thread iterates without a lock
+        self.subscriptions = ()
+
+    def __getattr__(self, name):
+        # Values like height or battery are read from the last record
+        if name in ('record', 'telemetry', 'subscriptions'):
+            raise AttributeError(name)
+        return getattr(self.record, name)
 
     @property
     def __missionpads_enabled__(self):
@@ -150,66 +128,40 @@ class State:
     def __is_connected__(self):
         return self.is_connected
 
-    def _state_thread(self):
+    @property
+    def __record__(self):
+        return self.record
+
+    @property
+    def __telemetry__(self):
+        return self.telemetry
+
+    @property
+    def __subscriptions__(self):
+        return self.subscriptions
+
+    def update(self, response):
+        '''
+        Parse a state string received from the Tello, replace the record with its values and store them in the telemetry buffer
         '''
-        Listen to the state of the Tello.
-        Runs as a thread, sets self.state to whatever the Tello last returned.
+        self.record = parse_state(response, time.monotonic())
+        self.telemetry.append(self.record)
+        for subscription, key in self.subscriptions:
+            subscription.offer(key, self.record)
+
+    def subscribe(self, callback, fields=None, changes_only=True, max_rate=None, key=None):
         '''
+        Call callback(key, record) from a separate thread for new state records, see drone.subscription.Subscription. The key defaults to this state. Returns the Subscription, close() ends it
+        '''
+        subscription = Subscription(callback, fields, changes_only, max_rate)
+        subscription.attach(self, key)
+        return subscription
+
+    def add_subscription(self, subscription, key):
+        self.subscriptions = self.subscriptions + ((subscription, key),)
 
-        while True:
-            try:
-                response = self.socket.recvfrom(1024)
-
-            except socket.error as exc:
-                print('❗ Caught exception socket.error: ' + exc)
-
-            statelist = str(response).split(';')
-
-            # Remove first two characters
-            statelist[0] = statelist[0][3:]
-
-            stateswitcher = {
-                'mid': 'mid',
-                'x': 'mx',
-                'y': 'my',
-                'z': 'mz',
-                'mpry': 'mpry',
-                'pitch': 'pitch',
-                'roll': 'roll',
-                'yaw': 'yaw',
-                'vgx': 'vgx',
-                'vgy': 'vgy',
-                'vgz': 'vgz',
-                'agx': 'agx',
-                'agy': 'agy',
-                'agz': 'agz',
-                'templ': 'templ',
-                'temph': 'temph',
-                'tof': 'tof_in_cm',
-                'h': 'height',
-                'bat': 'battery',
-                'baro': 'barometer',
-                'time': 'motor_time'
-            }
-
-            self.friendlyname = ''
-            for entry in statelist:
-
-                # Continue if the last attribute has been parsed
-                if entry.startswith('\\r\\n\''):
-                    continue
-
-                # Set values to the corresponding attributes
-                identifier = entry.split(':')[0]
-                value = entry.split(':')[1]
-
-                attribute = stateswitcher[identifier]
-
-                setattr(self, attribute, value)
-                self.friendlyname += identifier
-                self.friendlyname += ' : '
-                self.friendlyname += value
-                self.friendlyname += '\n'
+    def remove_subscription(self, subscription):
+        self.subscriptions = tuple(entry for entry in self.subscriptions if entry[0] is not subscription)
 
     def __repr__(self):
-        return self.friendlyname
+        return repr(self.record)
@@ -0,0 +1,208 @@
+import selectors
+import socket
+import struct
+import sys
+import threading
+import time
+
+# Socket option and control message for the kernel drop counter on Linux
+SO_RXQ_OVFL = 40
+
+# Receivers shared by the drones of the process which have none of their own: port -> [receiver, references]
+_shared_receivers = {}
+_shared_lock = threading.Lock()
+
+
+class StateReceiver:
+    '''
+    UDP socket for the state stream of several drones. The Tello drones push their state to port 8890 and a single thread hands each state string to the State registered for the source ip.
+    '''
+
+    def __init__(self, local_ip='', local_port=8890):
+
+        # Receive buffer of the socket. Holds several seconds of state for a large swarm
+        self.RECEIVE_BUFFER_SIZE = 1024 * 1024
+
+        # Maximum number of datagrams read in one batch before the thread checks whether it should stop
+        self.BATCH_SIZE = 256
+
+        # Server information
+        self.local_ip = local_ip
+        self.local_port = local_port
+        self.socket = socket.socket(
+            socket.AF_INET, socket.SOCK_DGRAM)  # socket for receiving state
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.RECEIVE_BUFFER_SIZE)
+        try:
+            self.socket.bind((self.local_ip, self.local_port))
+        except OSError as exc:
+            self.socket.close()
+            raise OSError(exc.errno, 'Can not listen to the state on port ' + str(self.local_port) + ' (' + exc.strerror +
+                          '). Drones of one process have to share a StateReceiver, pass it as state_receiver') from exc
+        self.socket.setblocking(False)
+
+        # Let the kernel report the number of datagrams it dropped because the receive buffer was full
+        self.reports_overflow = False
+        if sys.platform.startswith('linux'):
+            try:
+                self.socket.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+                self.reports_overflow = True
+            except OSError:
+                pass
+
+        # Registered drone states by ip address
+        self.states = {}
+
+        # Optional TelemetryRecorder for the state of all drones
+        self.recorder = None
+
+        # Counters
+        self.packets_received = 0
+        self.packets_unknown = 0
+        self.packets_invalid = 0
+        self.packets_overflowed = 0
+        self.packet_rate = 0.0
+        self._rate_start = time.monotonic()
+        self._rate_count = 0
+
+        # Thread for receiving the state of all drones
+        self.is_running = True
+        self.state_thread = threading.Thread(target=self._state_thread)
+        self.state_thread.daemon = True
+        self.state_thread.start()
+
+    @property
+    def __states__(self):
+        return self.states
+
+    @property
+    def __packet_rate__(self):
+        return self.packet_rate
+
+    @property
+    def packets_dropped(self):
+        '''
+        Number of state strings which did not reach a drone state
+        '''
+        return self.packets_unknown + self.packets_invalid + self.packets_overflowed
+
+    def register(self, tello_ip, state):
+        '''
+        Route the state strings from the given ip address to the state
+        '''
+        self.states[tello_ip] = state
+
+    def unregister(self, tello_ip, state):
+        '''
+        Stop routing state strings to the given state
+        '''
+        if self.states.get(tello_ip) is state:
+            del self.states[tello_ip]
+
+    def statistics(self):
+        '''
+        Return the packet counters of the receiver
+        '''
+        return {
+            'received': self.packets_received,
+            'rate': self.packet_rate,
+            'dropped': self.packets_dropped,
+            'unknown': self.packets_unknown,
+            'invalid': self.packets_invalid,
+            'overflowed': self.packets_overflowed,
+        }
+
+    def close(self):
+        '''
+        Stop the receive thread and close the socket
+        '''
+        self.is_running = False
+        self.state_thread.join()
+        self.states = {}
+        self.socket.close()
+
+    def _receive(self):
+        '''
+        Read a single datagram. Returns the payload and the source ip
+        '''
+        if not self.reports_overflow:
+            response, ip = self.socket.recvfrom(2048)
+            return response, ip
+
+        response, ancdata, _, ip = self.socket.recvmsg(2048, socket.CMSG_SPACE(4))
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL:
+                self.packets_overflowed = struct.unpack('I', data[:4])[0]
+        return response, ip
+
+    def _state_thread(self):
+        '''
+        Listen to the state of all Tello drones
+        Runs as a thread, waits for the socket to become readable and drains all queued datagrams
+        '''
+        selector = selectors.DefaultSelector()
+        selector.register(self.socket, selectors.EVENT_READ)
+
+        while self.is_running:
+            selector.select(0.5)
+
+            for _ in range(self.BATCH_SIZE):
+                try:
+                    response, ip = self._receive()
+                except BlockingIOError:
+                    break
+                except socket.error as exc:
+                    print('❗  Caught exception socket.error: ' + str(exc))
+                    break
+
+                self.packets_received += 1
+                self._rate_count += 1
+
+                state = self.states.get(ip[0])
+                if state is None:
+                    self.packets_unknown += 1
+                    continue
+
+                try:
+                    state.update(response)
+                except (KeyError, IndexError, ValueError):
+                    self.packets_invalid += 1
+                    continue
+
+                if self.recorder is not None:
+                    self.recorder.record(ip[0], state.record)
+
+            # Update the packet rate about once per second
+            now = time.monotonic()
+            if now - self._rate_start >= 1.0:
+                self.packet_rate = self._rate_count / (now - self._rate_start)
+                self._rate_start = now
+                self._rate_count = 0
+
+        selector.close()
+
+
+def acquire_state_receiver(local_port=8890):
+    '''
+    Return the StateReceiver on the given port which is shared by all drones of the process without a receiver of their own. Each call needs a release_state_receiver()
+    '''
+    with _shared_lock:
+        shared = _shared_receivers.get(local_port)
+        if shared is None:
+            shared = _shared_receivers[local_port] = [StateReceiver(local_port=local_port), 0]
+        shared[1] += 1
+        return shared[0]
+
+
+def release_state_receiver(receiver):
+    '''
+    Release a receiver of acquire_state_receiver(). The last release closes it
+    '''
+    with _shared_lock:
+        shared = _shared_receivers.get(receiver.local_port)
+        if shared is None or shared[0] is not receiver:
+            return
+        shared[1] -= 1
+        if shared[1] > 0:
+            return
+        del _shared_receivers[receiver.local_port]
+    receiver.close()
@@ -0,0 +1,146 @@
+class StateRecord:
+    '''
+    Typed values of a single state string of a Tello drone. Values missing in the state string are None
+    '''
+
+    __slots__ = (
+        # Missionpad variables
+        'mid', 'mx', 'my', 'mz', 'mpry',
+
+        # Drone inflight information
+        'pitch', 'roll', 'yaw', 'vgx', 'vgy', 'vgz', 'agx', 'agy', 'agz',
+
+        # Temperature information
+        'templ', 'temph',
+
+        # Position information
+        'tof_in_cm', 'height',
+
+        # Drone information
+        'battery', 'barometer', 'motor_time',
+
+        # Monotonic time the state string has been received
+        'timestamp'
+    )
+
+    def __init__(self, timestamp=None):
+        self.mid = None
+        self.mx = None
+        self.my = None
+        self.mz = None
+        self.mpry = None
+        self.pitch = None
+        self.roll = None
+        self.yaw = None
+        self.vgx = None
+        self.vgy = None
+        self.vgz = None
+        self.agx = None
+        self.agy = None
+        self.agz = None
+        self.templ = None
+        self.temph = None
+        self.tof_in_cm = None
+        self.height = None
+        self.battery = None
+        self.barometer = None
+        self.motor_time = None
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        # Formatted on demand only, parsing does not build any strings
+        string = ''
+        for identifier, (attribute, _) in STATE_FIELDS.items():
+            value = getattr(self, attribute)
+            if value is not None:
+                string += identifier.decode('utf-8') + ' : ' + str(value) + '\n'
+        return string
+
+
+def _parse_mpry(value):
+    '''
+    Convert the missionpad pitch, roll and yaw 'p,r,y' to a tuple of integers
+    '''
+    pitch, roll, yaw = value.split(b',')
+    return (int(pitch), int(roll), int(yaw))
+
+
+# Identifier in the state string -> (attribute of the StateRecord, conversion of the value)
+STATE_FIELDS = {
+    b'mid': ('mid', int),
+    b'x': ('mx', int),
+    b'y': ('my', int),
+    b'z': ('mz', int),
+    b'mpry': ('mpry', _parse_mpry),
+    b'pitch': ('pitch', int),
+    b'roll': ('roll', int),
+    b'yaw': ('yaw', int),
+    b'vgx': ('vgx', int),
+    b'vgy': ('vgy', int),
+    b'vgz': ('vgz', int),
+    b'templ': ('templ', int),
+    b'temph': ('temph', int),
+    b'tof': ('tof_in_cm', int),
+    b'h': ('height', int),
+    b'bat': ('battery', int),
+    b'baro': ('barometer', float),
+    b'time': ('motor_time', int),
+    b'agx': ('agx', float),
+    b'agy': ('agy', float),
+    b'agz': ('agz', float)
+}
+
+
+# Order of the identifiers in the state string of a Tello EDU
+_EDU_LAYOUT = [b'mid', b'x', b'y', b'z', b'mpry', b'pitch', b'roll', b'yaw',
+               b'vgx', b'vgy', b'vgz', b'templ', b'temph', b'tof', b'h',
+               b'bat', b'baro', b'time', b'agx', b'agy', b'agz']
+
+
+def parse_state(response, timestamp=None):
+    '''
+    Parse the bytes of a state string like b'pitch:0;roll:0;...;agz:-998.00;\\r\\n' into a new StateRecord. Unknown identifiers are skipped, invalid values raise a ValueError
+    '''
+    # Identifiers and values alternate after splitting at both separators
+    parts = response.replace(b':', b';').split(b';')
+
+    # Fast path for the usual order of the identifiers. Avoids a lookup per value
+    if parts[0:42:2] == _EDU_LAYOUT:
+        record = StateRecord.__new__(StateRecord)
+        record.mid = int(parts[1])
+        record.mx = int(parts[3])
+        record.my = int(parts[5])
+        record.mz = int(parts[7])
+        record.mpry = _parse_mpry(parts[9])
+        record.pitch = int(parts[11])
+        record.roll = int(parts[13])
+        record.yaw = int(parts[15])
+        record.vgx = int(parts[17])
+        record.vgy = int(parts[19])
+        record.vgz = int(parts[21])
+        record.templ = int(parts[23])
+        record.temph = int(parts[25])
+        record.tof_in_cm = int(parts[27])
+        record.height = int(parts[29])
+        record.battery = int(parts[31])
+        record.barometer = float(parts[33])
+        record.motor_time = int(parts[35])
+        record.agx = float(parts[37])
+        record.agy = float(parts[39])
+        record.agz = float(parts[41])
+        record.timestamp = timestamp
+        return record
+
+    record = StateRecord(timestamp)
+    fields = STATE_FIELDS
+
+    # The trailing \r\n has no value and is skipped
+    for identifier, value in zip(parts[0::2], parts[1::2]):
+        field = fields.get(identifier)
+        if field is None:
+            continue
+
+        attribute, conversion = field
+        setattr(record, attribute, conversion(value))
+
+    return record
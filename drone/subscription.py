@@ -0,0 +1,207 @@
+import asyncio
+from collections import deque
+import operator
+import threading
+import time
+from drone.staterecord import StateRecord
+
+# Fields compared for changes if a subscription has no field set
+ALL_FIELDS = tuple(field for field in StateRecord.__slots__ if field != 'timestamp')
+
+
+class Subscription:
+    '''
+    Delivers the state records of one or more drones to a callback(key, record) on a thread of its own. The receive thread only stores the newest record of each drone, so a slow callback never delays the state stream or other subscribers: records which arrive while the callback is busy are replaced by newer ones (latest wins).
+
+    With changes_only a record is only delivered if one of the fields differs from the last record of the drone. max_rate limits the deliveries per second of each drone.
+    '''
+
+    def __init__(self, callback=None, fields=None, changes_only=True, max_rate=None):
+        self.callback = callback
+        self.fields = tuple(fields) if fields else ALL_FIELDS
+        self.changes_only = changes_only
+        self.MIN_INTERVAL = 1.0 / max_rate if max_rate else 0.0
+        self._values_of = operator.attrgetter(*self.fields)
+
+        # Newest undelivered record and last offered values of each drone by key
+        self.pending = {}
+        self.last_values = {}
+        self.lock = threading.Lock()
+        self.states = []
+        self.is_closed = False
+
+        # Counters
+        self.offered = 0
+        self.unchanged = 0
+        self.coalesced = 0
+        self.delivered = 0
+        self.errors = 0
+
+        self._start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def __pending__(self):
+        return self.pending
+
+    def attach(self, state, key=None):
+        '''
+        Receive the records of the state. The callback gets the key (default: the state) with each record
+        '''
+        state.add_subscription(self, state if key is None else key)
+        self.states.append(state)
+
+    def offer(self, key, record):
+        '''
+        Called by the receive thread for each new record. Never blocks on the callback
+        '''
+        self.offered += 1
+        if self.changes_only:
+            values = self._values_of(record)
+            if self.last_values.get(key) == values:
+                self.unchanged += 1
+                return
+            self.last_values[key] = values
+
+        with self.lock:
+            if key in self.pending:
+                self.coalesced += 1
+            self.pending[key] = record
+        self._wake()
+
+    def statistics(self):
+        '''
+        Return the counters of the subscription
+        '''
+        return {
+            'offered': self.offered,
+            'unchanged': self.unchanged,
+            'coalesced': self.coalesced,
+            'delivered': self.delivered,
+            'errors': self.errors,
+        }
+
+    def close(self):
+        '''
+        Stop receiving records and end the delivery
+        '''
+        if self.is_closed:
+            return
+        self.is_closed = True
+        for state in self.states:
+            state.remove_subscription(self)
+        self.states = []
+        self._stop()
+
+    def _take(self):
+        '''
+        Return the pending records as list of (key, record) and clear them
+        '''
+        with self.lock:
+            batch = list(self.pending.items())
+            self.pending = {}
+        return batch
+
+    def _start(self):
+        self.wakeup = threading.Event()
+        self.deliver_thread = threading.Thread(target=self._deliver_thread)
+        self.deliver_thread.daemon = True
+        self.deliver_thread.start()
+
+    def _wake(self):
+        # Setting an event takes a lock, skipped while the thread has not consumed the last one
+        if not self.wakeup.is_set():
+            self.wakeup.set()
+
+    def _stop(self):
+        self.wakeup.set()
+        if threading.current_thread() is not self.deliver_thread:
+            self.deliver_thread.join()
+
+    def _deliver_thread(self):
+        '''
+        Pass the pending records to the callback, at most once per MIN_INTERVAL
+        Runs as a thread until the subscription is closed
+        '''
+        next_delivery = 0.0
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            if self.is_closed:
+                break
+
+            # Records arriving during the pause replace the pending ones
+            delay = next_delivery - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            batch = self._take()
+            if batch:
+                next_delivery = time.monotonic() + self.MIN_INTERVAL
+
+            for key, record in batch:
+                try:
+                    self.callback(key, record)
+                    self.delivered += 1
+                except Exception as exc:
+                    self.errors += 1
+                    print('❗  Caught exception in state subscription: ' + repr(exc))
+
+
+class AsyncSubscription(Subscription):
+    '''
+    Subscription which is read as asynchronous iterator on an event loop instead of a callback:
+
+        async for tello, record in swarm.subscribe(('height', 'battery'), max_rate=5):
+            print(tello.tello_ip, record.height)
+    '''
+
+    def __init__(self, fields=None, changes_only=True, max_rate=None, loop=None):
+        self.loop = loop or asyncio.get_running_loop()
+        super().__init__(None, fields, changes_only, max_rate)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.ready:
+            if self.is_closed:
+                raise StopAsyncIteration
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            if self.is_closed:
+                raise StopAsyncIteration
+
+            delay = self.next_delivery - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.is_scheduled = False
+            self.ready.extend(self._take())
+            if self.ready:
+                self.next_delivery = self.loop.time() + self.MIN_INTERVAL
+
+        self.delivered += 1
+        return self.ready.popleft()
+
+    def _start(self):
+        self.wakeup = asyncio.Event()
+        self.ready = deque()
+        self.next_delivery = 0.0
+        self.is_scheduled = False
+
+    def _wake(self):
+        # Records may be offered by a thread other than the one of the loop
+        if not self.is_scheduled:
+            self.is_scheduled = True
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    def _stop(self):
+        try:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        except RuntimeError:
+            # The loop is already closed
+            pass
@@ -0,0 +1,226 @@
+from array import array
+import math
+import operator
+import threading
+
+# Columns of the telemetry buffer. The missionpad pitch, roll and yaw of StateRecord.mpry are split into three columns
+TELEMETRY_COLUMNS = (
+    'mid', 'mx', 'my', 'mz', 'mpry_pitch', 'mpry_roll', 'mpry_yaw',
+    'pitch', 'roll', 'yaw', 'vgx', 'vgy', 'vgz', 'agx', 'agy', 'agz',
+    'templ', 'temph', 'tof_in_cm', 'height',
+    'battery', 'barometer', 'motor_time'
+)
+
+NAN = float('nan')
+
+
+class TelemetryBuffer:
+    '''
+    Ring buffer with the recent state values of a drone. Each column is a preallocated array of doubles next to a column of monotonic timestamps, so appending a record never allocates memory. Missing values are stored as NaN.
+    '''
+
+    def __init__(self, capacity=600):
+        self.capacity = capacity
+
+        # Number of records appended since the start
+        self.count = 0
+
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.columns = {}
+        for name in TELEMETRY_COLUMNS:
+            self.columns[name] = array('d', bytes(8 * capacity))
+
+        # Scalar attributes of the StateRecord and the column they are written to
+        self._scalar_columns = [(name, self.columns[name])
+                                for name in TELEMETRY_COLUMNS if not name.startswith('mpry_')]
+        self._mpry_columns = (self.columns['mpry_pitch'],
+                              self.columns['mpry_roll'], self.columns['mpry_yaw'])
+
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, record):
+        '''
+        Store the values of the given StateRecord
+        '''
+        with self.lock:
+            index = self.count % self.capacity
+            self.timestamps[index] = record.timestamp
+
+            for attribute, column in self._scalar_columns:
+                value = getattr(record, attribute)
+                column[index] = NAN if value is None else value
+
+            mpry = record.mpry
+            for position, column in enumerate(self._mpry_columns):
+                column[index] = NAN if mpry is None else mpry[position]
+
+            self.count += 1
+
+    def latest(self):
+        '''
+        Return the last stored values as dict including the 'timestamp'. Returns None if the buffer is empty
+        '''
+        with self.lock:
+            if self.count == 0:
+                return None
+
+            index = (self.count - 1) % self.capacity
+            values = {'timestamp': self.timestamps[index]}
+            for name, column in self.columns.items():
+                values[name] = column[index]
+        return values
+
+    def window(self, seconds, fields=None):
+        '''
+        Return the values of the last given seconds (relative to the last timestamp) as dict of arrays including the 'timestamp'
+        '''
+        fields = TELEMETRY_COLUMNS if fields is None else fields
+
+        with self.lock:
+            first, last = self._window_range(seconds)
+            values = {'timestamp': self._copy(self.timestamps, first, last)}
+            for name in fields:
+                values[name] = self._copy(self.columns[name], first, last)
+        return values
+
+    def downsample(self, hz, seconds=None, fields=None):
+        '''
+        Return the mean values in buckets of 1 / hz seconds as dict of arrays. The 'timestamp' of a bucket is its start. Buckets without values are left out
+        '''
+        fields = TELEMETRY_COLUMNS if fields is None else fields
+        seconds = math.inf if seconds is None else seconds
+        values = self.window(seconds, fields)
+
+        timestamps = values['timestamp']
+        result = {'timestamp': array('d')}
+        for name in fields:
+            result[name] = array('d')
+        if not timestamps:
+            return result
+
+        # Indices where a new bucket starts
+        bucket_length = 1.0 / hz
+        start = timestamps[0]
+        bounds = []
+        current = None
+        for index, timestamp in enumerate(timestamps):
+            bucket = int((timestamp - start) / bucket_length)
+            if bucket != current:
+                bounds.append(index)
+                result['timestamp'].append(start + bucket * bucket_length)
+                current = bucket
+        bounds.append(len(timestamps))
+
+        for name in fields:
+            column = values[name]
+            for first, last in zip(bounds, bounds[1:]):
+                result[name].append(_mean(column[first:last]))
+        return result
+
+    def mean(self, field, seconds=None):
+        '''
+        Return the mean of the field during the last given seconds. NaN values are ignored
+        '''
+        return _mean(self._values(field, seconds))
+
+    def min(self, field, seconds=None):
+        '''
+        Return the minimum of the field during the last given seconds. NaN values are ignored
+        '''
+        values = _valid(self._values(field, seconds))
+        return min(values) if values else NAN
+
+    def max(self, field, seconds=None):
+        '''
+        Return the maximum of the field during the last given seconds. NaN values are ignored
+        '''
+        values = _valid(self._values(field, seconds))
+        return max(values) if values else NAN
+
+    def slope(self, field, seconds=None):
+        '''
+        Return the change of the field per second during the last given seconds as least squares fit, e.g. the battery drain rate
+        '''
+        seconds = math.inf if seconds is None else seconds
+        values = self.window(seconds, (field,))
+
+        # Relative timestamps keep the sums small and precise
+        timestamps = values['timestamp']
+        samples = values[field]
+        if timestamps:
+            start = timestamps[0]
+            timestamps = array('d', [timestamp - start for timestamp in timestamps])
+        pairs = [(timestamp, value) for timestamp, value in zip(timestamps, samples)
+                 if value == value]
+        if len(pairs) < 2:
+            return NAN
+
+        timestamps = array('d', [pair[0] for pair in pairs])
+        samples = array('d', [pair[1] for pair in pairs])
+        count = len(pairs)
+        sum_t = sum(timestamps)
+        sum_v = sum(samples)
+        sum_tt = sum(map(operator.mul, timestamps, timestamps))
+        sum_tv = sum(map(operator.mul, timestamps, samples))
+
+        denominator = count * sum_tt - sum_t * sum_t
+        if denominator == 0:
+            return NAN
+        return (count * sum_tv - sum_t * sum_v) / denominator
+
+    def _values(self, field, seconds):
+        '''
+        Return the values of a single field during the last given seconds. All stored values if seconds is None
+        '''
+        seconds = math.inf if seconds is None else seconds
+        return self.window(seconds, (field,))[field]
+
+    def _window_range(self, seconds):
+        '''
+        Return the first and last logical index (last exclusive) of the records of the last given seconds. Requires the lock
+        '''
+        last = self.count
+        first = max(0, self.count - self.capacity)
+        if last == first:
+            return first, last
+
+        # Binary search in the ring for the first timestamp in the window. Timestamps are monotonic
+        start = self.timestamps[(last - 1) % self.capacity] - seconds
+        low, high = first, last - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamps[middle % self.capacity] < start:
+                low = middle + 1
+            else:
+                high = middle
+        return low, last
+
+    def _copy(self, column, first, last):
+        '''
+        Copy the logical range of a column into a new array. Requires the lock
+        '''
+        begin = first % self.capacity
+        end = begin + (last - first)
+        if end <= self.capacity:
+            return column[begin:end]
+        return column[begin:] + column[:end - self.capacity]
+
+
+def _valid(values):
+    '''
+    Remove NaN values
+    '''
+    return [value for value in values if value == value]
+
+
+def _mean(values):
+    '''
+    Mean without NaN values. NaN if no value is left
+    '''
+    values = _valid(values)
+    if not values:
+        return NAN
+    return math.fsum(values) / len(values)
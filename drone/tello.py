@@ -1,20 +1,26 @@
-import socket
-import threading
+from collections import deque
 import time
+from drone.keepalive import KeepaliveScheduler
 from drone.logentry import LogEntry
+from drone.rtt import RttEstimator, plausible_response
 from drone.state import State
+from drone.statereceiver import acquire_state_receiver, release_state_receiver
 from drone.response import Response
+from drone.transport import CommandTransport
 
 
 class Tello:
-    def __init__(self, tello_ip='192.168.10.1', send_keepalives=True, debug=False):
+    def __init__(self, tello_ip='192.168.10.1', send_keepalives=True, debug=False, transport=None, state_receiver=None, log_sink=None, metrics=None, keepalive=None, initialize=True, query_cache=None):
+
+        # Command connection. Without a shared transport the drone opens its own socket
+        self.owns_transport = transport is None
+        if self.owns_transport:
+            transport = CommandTransport()
+        self.transport = transport
 
         # Server information
-        self.local_ip = ''
-        self.local_port = 0
-        self.socket = socket.socket(
-            socket.AF_INET, socket.SOCK_DGRAM)  # socket for sending cmd
-        self.socket.bind((self.local_ip, self.local_port))
+        self.local_ip = self.transport.local_ip
+        self.local_port = self.transport.local_port
 
         # Drone information
         self.tello_ip = tello_ip
@@ -22,36 +28,63 @@ class Tello:
         self.tello_address = (self.tello_ip, self.tello_port)
         self.tello_sn = None
 
-        # Thread for receiving command acknowledges
-        self.receive_thread = threading.Thread(target=self._receive_thread)
-        self.receive_thread.daemon = True
-        self.receive_thread.start()
+        # Command acknowledges are received by the transport
+        self.transport.register(self)
 
-        # Drone state
+        # Drone state. Without a receiver of the swarm the drone uses the receiver on port 8890 shared by the process
         self.state = State()
-
-        # Debug and log
-        self.log = []
+        self.owns_state_receiver = state_receiver is None
+        if self.owns_state_receiver:
+            state_receiver = acquire_state_receiver()
+        self.state_receiver = state_receiver
+        self.state_receiver.register(self.tello_ip, self.state)
+
+        # Debug and log. Only the most recent entries are kept in memory, completed entries are passed to the log sink
+        self.LOG_HISTORY = 100
+        self.log = deque(maxlen=self.LOG_HISTORY)
+        self.log_sink = log_sink
+        self.command_counter = 0
         self.debug = debug
 
+        # Latency histograms and counters per command, usually shared by the swarm
+        self.metrics = metrics
+
+        # Optional QueryCache which answers read commands like 'battery?' from the state
+        self.query_cache = query_cache
+
         # Maximum time to wait for an acknowledgement. Otherwise abort the flight.
         self.MAX_TIME_OUT = 10.0
 
-        # Initialize drone
+        # The timeout of each command follows the round trip times measured for its class
+        self.rtt = RttEstimator(self.MAX_TIME_OUT)
+
+        # Command waiting for its response. Answers to a command which timed out are expected for another timeout period, until abandoned_until_ns. Such a late answer completes the abandoned entry if no other command is pending, see resume_command
+        self.pending = None
+        self.abandoned = None
+        self.abandoned_until_ns = 0
+        self.stale_responses = 0
+
+        # Time of the last command. Keepalives are only sent once the drone is idle
+        self.last_command_ns = time.monotonic_ns()
+
+        # Initialize drone. Without initialize the caller runs init_drone, e.g. for many drones concurrently
         self.MAX_INITIALIZATION_ITERATIONS = 5
-        self.init_drone()
+        if initialize:
+            self.init_drone()
 
-        # Thread for keep-alive-messages
-        self.KEEPALIVE_INTERVAL = 5.0
+        # Keep-alive-messages. Without a shared scheduler the drone runs its own
         self.send_keepalives = send_keepalives
-        self.keepalive_thread = threading.Thread(target=self._keepalive_thread)
-        self.keepalive_thread.daemon = True
-        self.keepalive_thread.start()
+        self.owns_keepalive = send_keepalives and keepalive is None
+        if self.owns_keepalive:
+            keepalive = KeepaliveScheduler()
+        self.keepalive = keepalive
+        if self.send_keepalives:
+            self.keepalive.register(self)
 
     def __del__(self):
-        socket.close()
-        print('⏲  Waiting for thread ' + self.tello_sn + ' to terminate...')
-        self.keepalive_thread.join(self.KEEPALIVE_INTERVAL)
+        # The constructor may have failed before all connections were set up
+        if hasattr(self, 'state'):
+            self.close_connection()
 
     @property
     def __tello_address__(self):
@@ -77,7 +110,10 @@ class Tello:
     @__local_ip__.setter
     def __local_ip__(self, local_ip):
         self.local_ip = local_ip
-        self.state.local_ip = local_ip
+
+    @property
+    def __transport__(self):
+        return self.transport
 
     @property
     def __state__(self):
@@ -91,19 +127,32 @@ class Tello:
     def __log__(self):
         return self.log
 
-    def init_drone(self):
+    def init_drone(self, deadline=None):
         '''
-        Initialize the Tello drone with 'command' and retrieve and store the serial number
+        Initialize the Tello drone with 'command' and retrieve and store the serial number. No command waits beyond the deadline on the monotonic clock. Returns True if the drone is in SDK mode
         '''
         response = Response()
         counter = 0
         while (not response.success() and counter < self.MAX_INITIALIZATION_ITERATIONS):
-            response = self.send_command('command')
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            response = self._init_command('command', deadline)
             counter += 1
 
-        if counter < self.MAX_INITIALIZATION_ITERATIONS:
-            self.state.is_connected = True
-            self.tello_sn = self.send_command('sn?').returnvalue
+        if response.success():
+            response = self._init_command('sn?', deadline)
+            if response.success():
+                self.state.is_connected = True
+                self.tello_sn = response.returnvalue
+                if self.metrics is not None:
+                    self.metrics.identify(self.tello_ip, self.tello_sn)
+        return self.state.is_connected
+
+    def _init_command(self, command, deadline):
+        entry = self.start_command(command)
+        if deadline is not None:
+            entry.timeout = max(0.0, min(entry.timeout, deadline - time.monotonic()))
+        return self.finish_command(entry)
 
     def send_command(self, command):
         '''
@@ -117,45 +166,120 @@ class Tello:
                 print('✅ Serial Number: ' + self.tello_sn)
             return Response('b\'' + self.tello_sn)
 
+        # Read commands are answered from a fresh state string if possible
+        if self.query_cache is not None:
+            response = self.query_cache.answer(command, self)
+            if response is not None:
+                if self.debug:
+                    print('✅ ' + command + ' from the state: ' + response.returnvalue)
+                return response
+
+        return self.finish_command(self.start_command(command))
+
+    def start_command(self, command):
+        '''
+        Send a command to the tello drone without waiting for the response. Returns the LogEntry to pass to finish_command
+        '''
         # Stores the current command and an id in the log
-        self.log.append(LogEntry(command, len(self.log)))
+        entry = LogEntry(command, self.command_counter)
+        entry.timeout = self.rtt.timeout(command)
+        entry.ambiguous = entry.start_ns < self.abandoned_until_ns
+        self.command_counter += 1
+        self.log.append(entry)
+        self.pending = entry
+        self.last_command_ns = entry.start_ns
+        if self.metrics is not None:
+            self.metrics.count(self.tello_ip, command, 'commands')
 
         # Send command as utf-8 to the specified tello address
-        self.socket.sendto(command.encode(
+        self.transport.sendto(command.encode(
             'utf-8'), self.tello_address)
         if self.debug:
             print('📶  Sending command: ' + str(command) +
                   ' to  ' + str(self.tello_ip))
+        return entry
 
-        # Start timer and wait for response
-        start = time.time()
-        while not self.log[-1].got_response():
-            now = time.time()
-            diff = now - start
-
-            # If the maximum timeout is reached try to land the drone
-            if diff > self.MAX_TIME_OUT:
-                if self.debug:
-                    print('❌  Max timeout exceeded for command ' +
-                          command + ' for ' + self.tello_ip)
-                return Response('b\'error timeout')
+    def finish_command(self, entry):
+        '''
+        Block until the response to the LogEntry of start_command is received or the timeout is reached. Returns the response
+        '''
+        command = entry.command
+
+        # Block until the receive thread signals the response or the timeout is reached
+        got_response = entry.wait_for_response(entry.timeout)
+        if self.pending is entry:
+            self.pending = None
+
+        if not got_response:
+            self.rtt.timed_out(command)
+            self.abandoned = entry
+            self.abandoned_until_ns = time.monotonic_ns() + int(entry.timeout * 1e9)
+        elif not entry.ambiguous:
+            # Karn's algorithm: only unambiguous answers are used for the estimate
+            self.rtt.sample(command, entry.duration)
+            if command.startswith('speed ') and entry.response.success():
+                self.rtt.speed = float(command.split()[1])
+
+        # Metrics and log are keyed by the ip address, which is known before the handshake
+        if self.log_sink is not None:
+            self.log_sink.write(self.tello_ip, entry, self.tello_sn)
+
+        if self.metrics is not None:
+            drone = self.tello_ip
+            if not got_response:
+                self.metrics.count(drone, command, 'timeouts')
+            else:
+                self.metrics.observe(drone, command, entry.end_ns - entry.start_ns)
+                if not entry.response.success():
+                    self.metrics.count(drone, command, 'errors')
+
+        if not got_response:
+            if self.debug:
+                print('❌  Timeout of ' + '{:.2f}'.format(entry.timeout) + ' s exceeded for command ' +
+                      command + ' for ' + self.tello_ip)
+            return Response('b\'error timeout')
 
-        if self.log[-1].response.success:
+        if entry.response.success():
             print('✅  Succeeded command ' + command +
                   ' for ' + self.tello_ip)
         else:
             print('❌  Failed command ' + command +
                   ' for ' + self.tello_ip)
 
-        return self.log[-1].response
+        return entry.response
+
+    def resume_command(self, entry):
+        '''
+        Wait once more for the response to the LogEntry of a command which timed out, e.g. a maneuver the drone is still flying. The command is not sent again. Returns the response
+        '''
+        # A late answer is not used for the round trip time
+        entry.ambiguous = True
+        if not entry.completed.is_set():
+            entry.timeout = self.rtt.timeout(entry.command)
+            self.pending = entry
+        return self.finish_command(entry)
 
     def close_connection(self):
         '''
-        Stops the keepalive connection and waits for the termination of the thread
+        Stops the keepalive connection and releases the command connection. Can be called more than once, also for a drone whose constructor failed
         '''
+        if getattr(self, 'send_keepalives', False):
+            self.keepalive.unregister(self)
+            if self.owns_keepalive:
+                self.owns_keepalive = False
+                self.keepalive.close()
         self.send_keepalives = False
         self.state.is_connected = False
-        self.socket.close()
+        self.transport.unregister(self)
+        if self.owns_transport:
+            self.owns_transport = False
+            self.transport.close()
+        state_receiver = getattr(self, 'state_receiver', None)
+        if state_receiver is not None:
+            state_receiver.unregister(self.tello_ip, self.state)
+            if self.owns_state_receiver:
+                self.owns_state_receiver = False
+                release_state_receiver(state_receiver)
 
     def enable_missionpads(self):
         '''
@@ -171,34 +295,27 @@ class Tello:
         if self.send_command('moff') != -1:
             self.state.missionpads_enabled = False
 
-    def _keepalive_thread(self):
+    def _receive(self, response, ip, received_ns=None):
         '''
-        Send dummy command ('sn?') to the drone to keep the connection alive
-        Runs as a thread
+        Handle a response from the Tello drone
+        Called by the receive thread of the transport, sets self.response to whatever the Tello last returned
         '''
-        while self.send_keepalives:
-            command = 'sn?'
-            self.socket.sendto(command.encode(
-                'utf-8'), self.tello_address)
-            time.sleep(self.KEEPALIVE_INTERVAL)
-
-    def _receive_thread(self):
-        '''
-        Listen to responses from the Tello drone
-        Runs as a thread, sets self.response to whatever the Tello last returned
-        '''
-        while True:
-            try:
-                response, ip = self.socket.recvfrom(4096)
-            except socket.error as exc:
-                print('❗  Caught exception socket.error: ' + str(exc))
-
-            self.response = Response(response)
-
-            # Skip output if keepalive message was sent
-            if (self.response.returnvalue == self.tello_sn):
-                continue
+        self.response = Response(response)
 
+        if self.debug:
+            print('Response from ' + ip[0] + ': ' + str(self.response))
+
+        # Only the pending command can be answered. Late answers to commands which timed out are dropped if they do not fit the pending command
+        entry = self.pending
+        if entry is None and self.abandoned is not None and time.monotonic_ns() < self.abandoned_until_ns:
+            entry = self.abandoned
+        if entry is None or entry.completed.is_set() or not plausible_response(entry.command, self.response, entry.ambiguous):
+            self.stale_responses += 1
+            if self.metrics is not None:
+                command = entry.command if entry is not None else 'unknown'
+                self.metrics.count(self.tello_ip, command, 'stale')
             if self.debug:
-                print('Response from ' + ip[0] + ': ' + str(self.response))
-            self.log[-1].add_response(self.response)
+                print('❗  Dropped stale response ' + str(self.response) + ' from ' + ip[0])
+            return
+
+        entry.add_response(self.response, received_ns)
@@ -0,0 +1,94 @@
+import socket
+import threading
+import time
+
+
+class CommandTransport:
+    '''
+    UDP socket for the commands of several drones. Every drone sends through the same socket and a single thread hands the acknowledges to the drone registered for the source ip.
+    '''
+
+    def __init__(self, local_ip='', local_port=0):
+
+        # Server information
+        self.local_ip = local_ip
+        self.local_port = local_port
+        self.socket = socket.socket(
+            socket.AF_INET, socket.SOCK_DGRAM)  # socket for sending cmd
+        self.socket.bind((self.local_ip, self.local_port))
+
+        # Registered drones by ip address
+        self.drones = {}
+
+        # Thread for receiving command acknowledges of all drones
+        self.is_closed = False
+        self.receive_thread = threading.Thread(target=self._receive_thread)
+        self.receive_thread.daemon = True
+        self.receive_thread.start()
+
+    @property
+    def __drones__(self):
+        return self.drones
+
+    def register(self, tello):
+        '''
+        Route the acknowledges from the ip address of the given drone to it
+        '''
+        self.drones[tello.tello_ip] = tello
+
+    def unregister(self, tello):
+        '''
+        Stop routing acknowledges to the given drone
+        '''
+        if self.drones.get(tello.tello_ip) is tello:
+            del self.drones[tello.tello_ip]
+
+    def sendto(self, data, address):
+        '''
+        Send the given bytes to the address of a drone
+        '''
+        self.socket.sendto(data, address)
+
+    def close(self):
+        '''
+        Stop the receive thread and close the socket
+        '''
+        if self.is_closed:
+            return
+        self.is_closed = True
+        self.drones = {}
+
+        # Closing the socket does not interrupt a blocking recvfrom, an empty datagram wakes the thread
+        try:
+            self.socket.sendto(b'', (self.local_ip or '127.0.0.1', self.socket.getsockname()[1]))
+        except OSError:
+            pass
+        if threading.current_thread() is not self.receive_thread:
+            self.receive_thread.join(1.0)
+        self.socket.close()
+
+    def _receive_thread(self):
+        '''
+        Listen to responses from all Tello drones
+        Runs as a thread, passes each response to the drone registered for the source ip
+        '''
+        while True:
+            try:
+                response, ip = self.socket.recvfrom(4096)
+                received_ns = time.monotonic_ns()
+            except socket.error as exc:
+                # Stop listening once the connection has been closed
+                if self.socket.fileno() == -1:
+                    break
+                print('❗  Caught exception socket.error: ' + str(exc))
+                continue
+
+            if self.is_closed:
+                break
+
+            # Drop responses from unknown senders
+            tello = self.drones.get(ip[0])
+            if tello is None:
+                continue
+
+            tello._receive(response, ip, received_ns)
@@ -0,0 +1,177 @@
+from drone.asynctello import AsyncTello, open_state_endpoint
+from drone.logsink import LogSink
+from drone.querycache import QueryCache
+from drone.subscription import AsyncSubscription
+from flightoperator.discovery import DroneDiscovery
+import asyncio
+import os
+import random
+from datetime import datetime
+
+
+class AsyncOperator:
+    '''
+    Operator for a swarm of AsyncTello drones. The whole swarm runs on a single event loop:
+
+        swarm = AsyncOperator()
+        await swarm.scan_for_drones()
+        await swarm.broadcast('takeoff')
+    '''
+
+    def __init__(self):
+        self.swarm = []
+
+        # State endpoint on port 8890 shared by all drones. Opened with the first drone
+        self.state_protocol = None
+        self._state_endpoint = None
+
+        self.path_to_log = 'log'
+        self.start_time = datetime.now().isoformat().replace(':', '-')
+
+        # Completed commands of all drones are appended to a JSON lines file
+        self.log_sink = LogSink(self.path_to_log + os.path.sep + self.start_time + '.jsonl')
+
+        # Read commands like 'battery?' are answered from state strings up to QUERY_MAX_AGE seconds old
+        self.QUERY_MAX_AGE = 0.5
+        self.query_cache = QueryCache(self.QUERY_MAX_AGE)
+
+        self.MAX_COMMAND_RETRIES = 3
+
+        # Retries wait RETRY_BACKOFF seconds, doubled after each retry up to MAX_RETRY_BACKOFF
+        self.RETRY_BACKOFF = 0.1
+        self.MAX_RETRY_BACKOFF = 2.0
+
+        # Timeout for probing the abyss server of a drone
+        self.SCAN_TIME_OUT = 1.0
+
+    async def add_drone(self, tello):
+        '''
+        Add the given drone to the swarm. If an ip address is given the drone is created on the state endpoint of the swarm. Connects the drone if it has not been connected yet
+        '''
+        if not isinstance(tello, AsyncTello):
+            # Several drones may be added concurrently, so all of them wait for the same endpoint
+            if self._state_endpoint is None:
+                self._state_endpoint = asyncio.ensure_future(open_state_endpoint())
+            self.state_protocol = await self._state_endpoint
+            tello = AsyncTello(tello, state_protocol=self.state_protocol,
+                               log_sink=self.log_sink, query_cache=self.query_cache)
+        if tello.transport is None:
+            await tello.connect()
+        self.swarm.append(tello)
+        print('✅  Added drone ' + tello.tello_ip)
+
+    async def remove_drone(self, tello):
+        '''
+        Remove the given drone to the swarm
+        '''
+        await tello.close_connection()
+        if tello in self.swarm:
+            self.swarm.remove(tello)
+        print('✅  Removed drone ' + tello.tello_ip)
+
+    async def broadcast(self, command):
+        '''
+        Execute the command on each drone concurrently. Returns when all drones executed the command or are removed from the swarm.
+        '''
+        await asyncio.gather(*[self._send_command_to_drone(tello, command)
+                               for tello in list(self.swarm)])
+
+    # Same name as the thread-based Operator
+    execute_command = broadcast
+
+    async def _send_command_to_drone(self, tello, command):
+        '''
+        Sends command to the given drone. If drone is disconnected execution is skipped. Retries self.MAX_COMMAND_RETRIES times with exponential backoff. If no response is received the drone is removed from the swarm.
+        '''
+        # Skip execution if tello is disconnected
+        if not tello.state.is_connected:
+            print('❌  Tello ' + tello.tello_ip +
+                  ' is disconnected. Command not sent')
+            await self.remove_drone(tello)
+            return
+
+        # Execute command and retry MAX_COMMAND_RETRIES times
+        response = await tello.send(command)
+        counter = 0
+        while not response.success() and counter < self.MAX_COMMAND_RETRIES:
+            # Random part of the backoff keeps the retries of the swarm apart
+            backoff = min(self.MAX_RETRY_BACKOFF, self.RETRY_BACKOFF * 2 ** counter)
+            await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+
+            counter += 1
+            response = await tello.send(command)
+
+        # If the execution fails try to land drone and change state
+        if not response.success():
+            print('❌  Execution failed. Landing ' + str(tello.tello_sn))
+            await tello.send('land')
+            await self.remove_drone(tello)
+
+    async def scan_for_drones(self, networks=None, interfaces=None):
+        '''
+        Scan the given networks (CIDR strings, default is the /24 network of the outgoing interface) and interfaces for drones. All addresses are probed concurrently on the event loop. Checks if abyss server on port 9999 is available.
+        '''
+        discovery = DroneDiscovery(networks, interfaces, timeout=self.SCAN_TIME_OUT)
+        known = set(tello.tello_ip for tello in self.swarm)
+
+        # Each probe needs a file descriptor
+        probes = asyncio.Semaphore(discovery.max_probes)
+
+        async def probe(ip):
+            async with probes:
+                await self._try_add_drone((ip, discovery.abyss_port))
+
+        await asyncio.gather(*[probe(ip) for ip in discovery.hosts() if ip not in known])
+
+    async def _try_add_drone(self, address):
+        '''
+        Check if ip address is a tello drone by establishing a connection to the abyss server on port 9999. If it is available add it to the swarm.
+        '''
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(*address), self.SCAN_TIME_OUT)
+        except (OSError, asyncio.TimeoutError):
+            return
+
+        writer.close()
+        await self.add_drone(address[0])
+
+    def subscribe(self, fields=None, changes_only=True, max_rate=None, drones=None):
+        '''
+        Return an AsyncSubscription which yields (tello, record) for new state records of the given drones (default is the whole swarm). Records which arrive faster than they are read are replaced by newer ones
+        '''
+        subscription = AsyncSubscription(fields, changes_only, max_rate)
+        for tello in (list(self.swarm) if drones is None else drones):
+            subscription.attach(tello.state, tello)
+        return subscription
+
+    async def land_swarm(self):
+        '''
+        Send the land command to all drones
+        '''
+        await self.broadcast('land')
+
+    async def close(self):
+        '''
+        Land the swarm and end the connection to each drone
+        '''
+        await self.land_swarm()
+        for tello in self.swarm:
+            await tello.close_connection()
+        if self.state_protocol is not None:
+            self.state_protocol.close()
+        self.log_sink.close()
+
+    def save_log(self):
+        '''
+        Print the recent log entries of each drone to the stdout and save them to the log path. The complete log is written continuously by the log sink
+        '''
+        if not os.path.isdir(self.path_to_log):
+            os.mkdir(self.path_to_log)
+
+        with open(self.path_to_log + os.path.sep + self.start_time + '.txt', 'w') as out:
+            for tello in self.swarm:
+                print(tello.tello_sn)
+                for entry in tello.log:
+                    print(entry)
+                    out.write(str(entry))
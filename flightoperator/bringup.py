@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+
+
+class BringUp:
+    '''
+    Concurrent SDK-mode handshake of many drones with a single deadline. Drones are created without blocking and initialized by at most concurrency threads. Drones which are not ready at the deadline are reported and closed instead of being waited on:
+
+        bring_up = BringUp(operator, deadline=10.0)
+        for ip in ips:
+            bring_up.add(ip)
+        report = bring_up.finish()
+    '''
+
+    def __init__(self, operator, deadline=30.0, concurrency=32):
+        self.operator = operator
+        self.CONCURRENCY = concurrency
+        self.start = time.monotonic()
+        self.deadline = self.start + deadline
+
+        self.queue = queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+        self.is_finished = False
+
+        # Time to ready in seconds by ip address, and the addresses of drones which did not answer or missed the deadline
+        self.ready = {}
+        self.failed = []
+        self.missed = []
+        self.pending = {}
+
+    @property
+    def __ready__(self):
+        return self.ready
+
+    def add(self, ip):
+        '''
+        Create the drone at the ip address and queue its handshake. Returns immediately
+        '''
+        tello = self.operator.create_drone(ip, initialize=False)
+        with self.lock:
+            self.pending[ip] = tello
+        self.queue.put(tello)
+
+        if len(self.threads) < self.CONCURRENCY:
+            thread = threading.Thread(target=self._bring_up_thread)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def finish(self):
+        '''
+        Block until all handshakes are done or the deadline has passed. Drones which are not ready by then are excluded. Returns the report of report()
+        '''
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join(max(0.0, self.deadline - time.monotonic()))
+
+        with self.lock:
+            self.is_finished = True
+            late = list(self.pending.values())
+            self.pending = {}
+        for tello in late:
+            self.missed.append(tello.tello_ip)
+            tello.close_connection()
+            print('❌  Drone ' + tello.tello_ip + ' missed the deadline of ' +
+                  '{:.1f}'.format(self.deadline - self.start) + ' s')
+
+        for ip, seconds in sorted(self.ready.items(), key=lambda item: item[1]):
+            print('⏲  ' + ip + ' ready after ' + '{:.2f}'.format(seconds) + ' s')
+
+        report = self.report()
+        print('🚀  ' + str(len(self.ready)) + ' drones ready in ' + '{:.2f}'.format(report['duration']) + ' s' +
+              (', ' + str(len(self.failed) + len(self.missed)) + ' excluded' if self.failed or self.missed else ''))
+        return report
+
+    def report(self):
+        '''
+        Return the time to ready of each drone, the excluded drones and the duration of the bring-up as dict
+        '''
+        return {
+            'ready': dict(self.ready),
+            'failed': list(self.failed),
+            'missed': list(self.missed),
+            'duration': max(list(self.ready.values()) + [0.0])
+        }
+
+    def _bring_up_thread(self):
+        '''
+        Run the handshake of the queued drones one after another
+        Runs as a thread until it takes None from the queue or the deadline has passed
+        '''
+        while True:
+            tello = self.queue.get()
+            if tello is None or time.monotonic() >= self.deadline:
+                return
+
+            is_ready = tello.init_drone(self.deadline)
+            elapsed = time.monotonic() - self.start
+
+            with self.lock:
+                if self.is_finished or self.pending.pop(tello.tello_ip, None) is not tello:
+                    continue
+                if is_ready:
+                    self.ready[tello.tello_ip] = elapsed
+                    self.operator.add_drone(tello)
+                    continue
+                if time.monotonic() >= self.deadline:
+                    self.pending[tello.tello_ip] = tello
+                    continue
+                self.failed.append(tello.tello_ip)
+
+            tello.close_connection()
+            print('❌  Drone ' + tello.tello_ip + ' does not answer')
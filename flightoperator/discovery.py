@@ -0,0 +1,224 @@
+from collections import deque
+import errno
+import ipaddress
+import selectors
+import socket
+import struct
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# ioctl requests for the address and netmask of a network interface on Linux
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891b
+
+
+def local_network(prefix_length=24):
+    '''
+    Return the network of the interface used for outgoing traffic. Unlike gethostbyname(gethostname()) this does not return the loopback address 127.0.1.1 on Linux
+    '''
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        # Connecting a UDP socket sends nothing but selects the outgoing interface
+        probe.connect(('10.255.255.255', 1))
+        ip_address = probe.getsockname()[0]
+    except OSError:
+        ip_address = socket.gethostbyname(socket.gethostname())
+    finally:
+        probe.close()
+
+    return ipaddress.ip_network(ip_address + '/' + str(prefix_length), strict=False)
+
+
+def interface_network(interface):
+    '''
+    Return the network of the given interface (e.g. 'wlan0'). Only available on Linux
+    '''
+    if not sys.platform.startswith('linux'):
+        raise OSError('Reading the network of an interface is only supported on Linux')
+
+    import fcntl
+
+    request = struct.pack('256s', interface.encode('utf-8')[:15])
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        address = socket.inet_ntoa(fcntl.ioctl(probe.fileno(), SIOCGIFADDR, request)[20:24])
+        netmask = socket.inet_ntoa(fcntl.ioctl(probe.fileno(), SIOCGIFNETMASK, request)[20:24])
+    finally:
+        probe.close()
+
+    return ipaddress.ip_network(address + '/' + netmask, strict=False)
+
+
+class DroneDiscovery:
+    '''
+    Scans networks for Tello drones by connecting to the abyss server on TCP port 9999. Thousands of addresses are probed at once with non-blocking sockets from a single thread, so a scan takes about one timeout period. Optionally each drone is confirmed by sending 'command' to UDP port 8889.
+
+        for ip in DroneDiscovery(['192.168.0.0/22']).scan():
+            print(ip)
+    '''
+
+    def __init__(self, networks=None, interfaces=None, confirm=False, timeout=1.0, max_probes=1024):
+
+        # Networks given as CIDR strings or ipaddress networks. Defaults to the /24 network of the outgoing interface
+        self.networks = [ipaddress.ip_network(network, strict=False) for network in networks or []]
+        for interface in interfaces or []:
+            self.networks.append(interface_network(interface))
+        if not self.networks:
+            self.networks.append(local_network())
+
+        self.confirm = confirm
+        self.timeout = timeout
+
+        # Each probe needs a file descriptor. Keep some for the rest of the process
+        if resource is not None:
+            soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+            if soft_limit != resource.RLIM_INFINITY:
+                max_probes = min(max_probes, soft_limit - 64)
+        self.max_probes = max(1, max_probes)
+
+        self.abyss_port = 9999
+        self.command_port = 8889
+
+    def hosts(self):
+        '''
+        Return all addresses to probe
+        '''
+        for network in self.networks:
+            if network.num_addresses == 1:
+                yield str(network.network_address)
+            else:
+                for host in network.hosts():
+                    yield str(host)
+
+    def scan(self):
+        '''
+        Probe all addresses and yield the ip address of each drone as soon as it is found
+        '''
+        selector = selectors.DefaultSelector()
+        hosts = self.hosts()
+        hosts_left = True
+
+        # Probes in the order they were started, so the oldest one times out first
+        probes = deque()
+        active = 0
+
+        # Shared UDP socket for confirming drones. ip address -> deadline
+        confirmations = {}
+        command_socket = None
+        if self.confirm:
+            command_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            command_socket.setblocking(False)
+            command_socket.bind(('', 0))
+            selector.register(command_socket, selectors.EVENT_READ)
+
+        try:
+            while hosts_left or active or confirmations:
+
+                # Start new probes up to the limit
+                while hosts_left and active < self.max_probes:
+                    host = next(hosts, None)
+                    if host is None:
+                        hosts_left = False
+                        break
+                    probe = self._start_probe(host)
+                    if probe is not None:
+                        selector.register(probe, selectors.EVENT_WRITE, host)
+                        probes.append((time.monotonic() + self.timeout, probe))
+                        active += 1
+
+                # The last hosts finished before the addresses were known to be exhausted
+                if not active and not confirmations:
+                    continue
+
+                # Wait until a probe finishes or the oldest one times out
+                deadlines = list(confirmations.values())
+                if probes:
+                    deadlines.append(probes[0][0])
+                wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                events = selector.select(wait)
+
+                for key, _ in events:
+                    if key.fileobj is command_socket:
+                        for ip in self._read_confirmations(command_socket, confirmations):
+                            yield ip
+                        continue
+
+                    probe = key.fileobj
+                    host = key.data
+                    selector.unregister(probe)
+                    connected = probe.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+                    probe.close()
+                    active -= 1
+
+                    if not connected:
+                        continue
+                    if self.confirm:
+                        self._send_confirmation(command_socket, host, confirmations)
+                    else:
+                        yield host
+
+                # Remove finished and timed out probes
+                now = time.monotonic()
+                while probes and (probes[0][1].fileno() == -1 or probes[0][0] <= now):
+                    _, probe = probes.popleft()
+                    if probe.fileno() != -1:
+                        selector.unregister(probe)
+                        probe.close()
+                        active -= 1
+                for host, deadline in list(confirmations.items()):
+                    if deadline <= now:
+                        del confirmations[host]
+
+        finally:
+            for _, probe in probes:
+                if probe.fileno() != -1:
+                    probe.close()
+            if command_socket is not None:
+                command_socket.close()
+            selector.close()
+
+    def _start_probe(self, host):
+        '''
+        Start a non-blocking TCP connection to the abyss server. Returns None if the connection failed immediately
+        '''
+        probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        probe.setblocking(False)
+        result = probe.connect_ex((host, self.abyss_port))
+        if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            probe.close()
+            return None
+        return probe
+
+    def _send_confirmation(self, command_socket, host, confirmations):
+        '''
+        Send 'command' to the drone and wait for its 'ok' within the timeout
+        '''
+        try:
+            command_socket.sendto('command'.encode('utf-8'), (host, self.command_port))
+        except OSError:
+            return
+        confirmations[host] = time.monotonic() + self.timeout
+
+    def _read_confirmations(self, command_socket, confirmations):
+        '''
+        Return the ip addresses of all drones which answered 'command'
+        '''
+        confirmed = []
+        while True:
+            try:
+                response, ip = command_socket.recvfrom(1024)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                continue
+
+            if ip[0] in confirmations and response.strip().lower() == b'ok':
+                del confirmations[ip[0]]
+                confirmed.append(ip[0])
+        return confirmed
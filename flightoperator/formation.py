@@ -0,0 +1,422 @@
+import json
+import math
+
+# Limits of the go and curve commands of the Tello SDK 2.0
+MAX_COORDINATE = 500
+MIN_DISTANCE = 20
+MIN_SPEED = 10
+MAX_SPEED = 100
+MAX_CURVE_SPEED = 60
+MIN_ARC_RADIUS = 50
+MAX_ARC_RADIUS = 1000
+
+# Added to the cost of slots which a go command can not reach
+OUT_OF_RANGE_COST = 1e9
+
+# Points per arc when a curve is checked for separation
+ARC_SEGMENTS = 16
+
+
+def grid(count, spacing=100, columns=None, height=100, origin=(0, 0)):
+    '''
+    Return count slots in rows of columns drones (default: a square), spacing cm apart at the given height
+    '''
+    if columns is None:
+        columns = int(math.ceil(math.sqrt(count)))
+    return [(origin[0] + (index // columns) * spacing, origin[1] + (index % columns) * spacing, height)
+            for index in range(count)]
+
+
+def circle(count, radius=150, height=100, center=(0, 0)):
+    '''
+    Return count slots evenly spaced on a circle around the center
+    '''
+    return [(center[0] + radius * math.cos(2 * math.pi * index / count),
+             center[1] + radius * math.sin(2 * math.pi * index / count), height)
+            for index in range(count)]
+
+
+def line(count, spacing=100, height=100, origin=(0, 0), direction=(0, 1)):
+    '''
+    Return count slots spacing cm apart on a line from the origin in the given direction
+    '''
+    length = math.hypot(direction[0], direction[1])
+    dx, dy = direction[0] / length, direction[1] / length
+    return [(origin[0] + index * spacing * dx, origin[1] + index * spacing * dy, height)
+            for index in range(count)]
+
+
+def load_waypoints(path):
+    '''
+    Read slots from a JSON file with a list of [x, y, z] or from a text file with one 'x y z' or 'x,y,z' per line
+    '''
+    with open(path, 'r', encoding='utf-8') as waypoint_file:
+        if path.endswith('.json'):
+            points = json.load(waypoint_file)
+        else:
+            points = [line.replace(',', ' ').split() for line in waypoint_file
+                      if line.strip() and not line.lstrip().startswith('#')]
+
+    slots = []
+    for number, point in enumerate(points, 1):
+        if len(point) != 3:
+            raise ValueError('waypoint ' + str(number) + ' of ' + path + ' needs x, y and z')
+        slots.append(tuple(float(value) for value in point))
+    return slots
+
+
+def assign(starts, slots, squared=False):
+    '''
+    Return the slot index for each start so the total distance is minimal (Hungarian algorithm, O(n^2 m)). Slots further than MAX_COORDINATE in any direction are avoided. With squared=True the sum of the squared distances is minimized instead, which keeps synchronized straight paths apart
+    '''
+    n = len(starts)
+    m = len(slots)
+    if n > m:
+        raise ValueError(str(n) + ' drones do not fit into ' + str(m) + ' slots')
+    if n == 0:
+        return []
+
+    # Slots out of the range of a single go command are only taken if there is no other way
+    costs = []
+    for x, y, z in starts:
+        row = []
+        for sx, sy, sz in slots:
+            cost = (x - sx) ** 2 + (y - sy) ** 2 + (z - sz) ** 2
+            if not squared:
+                cost = math.sqrt(cost)
+            if abs(x - sx) > MAX_COORDINATE or abs(y - sy) > MAX_COORDINATE or abs(z - sz) > MAX_COORDINATE:
+                cost += OUT_OF_RANGE_COST
+            row.append(cost)
+        costs.append(row)
+
+    # Shortest augmenting paths with potentials u (rows) and v (columns). Column 0 is a virtual start
+    infinity = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    owner = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for row in range(1, n + 1):
+        owner[0] = row
+        column = 0
+        minimum = [infinity] * (m + 1)
+        visited = [0]
+        free = list(range(1, m + 1))
+        while True:
+            current_row = owner[column]
+            cost = costs[current_row - 1]
+            offset = u[current_row]
+            delta = infinity
+            next_column = 0
+            for j in free:
+                reduced = cost[j - 1] - offset - v[j]
+                if reduced < minimum[j]:
+                    minimum[j] = reduced
+                    way[j] = column
+                    if reduced < delta:
+                        delta = reduced
+                        next_column = j
+                elif minimum[j] < delta:
+                    delta = minimum[j]
+                    next_column = j
+            for j in visited:
+                u[owner[j]] += delta
+                v[j] -= delta
+            for j in free:
+                minimum[j] -= delta
+            column = next_column
+            visited.append(column)
+            free.remove(column)
+            if owner[column] == 0:
+                break
+
+        # Flip the assignments along the augmenting path
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    assignment = [0] * n
+    for column in range(1, m + 1):
+        if owner[column]:
+            assignment[owner[column] - 1] = column - 1
+    return assignment
+
+
+class FormationPlan:
+    '''
+    Commands which move a swarm into a formation. Per drone: the assigned slot, the go or curve command (None if the drone is already within MIN_DISTANCE of its slot), the position it ends at and its path as list of (seconds, (x, y, z)). Conflicts are the pairs which come closer than the separation as (drone, drone, distance, seconds)
+    '''
+
+    def __init__(self, starts, slots, assignment, commands, positions, paths, separation):
+        self.starts = starts
+        self.slots = slots
+        self.assignment = assignment
+        self.commands = commands
+        self.positions = positions
+        self.paths = paths
+        self.separation = separation
+        self.conflicts = []
+        self.min_distance = None
+
+    def __len__(self):
+        return len(self.commands)
+
+    @property
+    def __conflicts__(self):
+        return self.conflicts
+
+    @property
+    def duration(self):
+        return max([path[-1][0] for path in self.paths] + [0.0])
+
+    def check_separation(self):
+        '''
+        Find all pairs of drones which come closer than the separation while they fly their paths simultaneously
+        '''
+        self.conflicts, self.min_distance = find_conflicts(self.paths, self.separation)
+        return self.conflicts
+
+
+def plan_formation(starts, slots, speed=50, separation=50, squared=False, lift=60, max_lifts=3):
+    '''
+    Assign the drones at the start positions to the slots and compute their go commands. Positions are in cm in the coordinates of the SDK (x forward, y left, z up), shared by drones which face the same direction. The drones fly simultaneously and arrive together, the slowest at the given speed. Drones whose straight paths come closer than the separation are lifted over the others with curve commands, up to max_lifts times lift cm. Returns a FormationPlan, its conflicts are empty if the paths are safe
+    '''
+    if not MIN_SPEED <= speed <= MAX_SPEED:
+        raise ValueError('speed ' + str(speed) + ' is out of range ' + str(MIN_SPEED) + '..' + str(MAX_SPEED))
+    starts = [tuple(float(value) for value in start) for start in starts]
+    slots = [tuple(float(value) for value in slot) for slot in slots]
+    assignment = assign(starts, slots, squared)
+
+    # Displacements are rounded to the integer cm of the SDK
+    moves = []
+    for start, slot in zip(starts, (slots[index] for index in assignment)):
+        move = tuple(int(round(target - origin)) for origin, target in zip(start, slot))
+        if any(abs(value) > MAX_COORDINATE for value in move):
+            raise ValueError('slot ' + _format(slot) + ' is more than ' + str(MAX_COORDINATE) +
+                             ' cm away from ' + _format(start))
+        moves.append(move)
+
+    # All drones take as long as the longest move at full speed
+    longest = max([_length(move) for move in moves] + [0.0])
+    duration = longest / speed if longest else 0.0
+
+    commands = []
+    positions = []
+    paths = []
+    for start, move in zip(starts, moves):
+        command, path = _straight(start, move, duration, speed)
+        commands.append(command)
+        positions.append(path[-1][1])
+        paths.append(path)
+
+    plan = FormationPlan(starts, slots, assignment, commands, positions, paths, separation)
+    plan.check_separation()
+
+    # Lift one drone of each conflicting pair over the other with an arc through a raised midpoint. Short moves need a higher arc to reach the minimum radius. Pairs which are too close at the start or in their slots can not be helped
+    levels = [0] * len(starts)
+    for _ in range(max_lifts):
+        if not plan.conflicts:
+            break
+        previous = (list(commands), list(paths), list(levels), plan.conflicts, plan.min_distance)
+        lifted = set()
+        for first, second, _, _ in plan.conflicts:
+            if first in lifted or second in lifted:
+                continue
+            if (_length(_difference(starts[first], starts[second])) < separation or
+                    _length(_difference(positions[first], positions[second])) < separation):
+                continue
+            for drone in sorted((first, second), key=lambda index: -_length(moves[index])):
+                curve = None
+                for level in range(levels[drone] + 1, max_lifts + 1):
+                    curve = _curve(starts[drone], moves[drone], level * lift, duration)
+                    if curve is not None:
+                        break
+                if curve is not None:
+                    levels[drone] = level
+                    lifted.add(drone)
+                    commands[drone], paths[drone] = curve
+                    break
+        if not lifted:
+            break
+
+        # Keep the previous paths if the arcs made it worse
+        plan.check_separation()
+        if (len(plan.conflicts), -plan.min_distance) >= (len(previous[3]), -previous[4]):
+            commands[:], paths[:], levels[:] = previous[0], previous[1], previous[2]
+            plan.conflicts, plan.min_distance = previous[3], previous[4]
+            break
+
+    return plan
+
+
+def find_conflicts(paths, separation):
+    '''
+    Return the pairs of paths closer than separation as list of (index, index, distance, seconds) and the smallest distance of all pairs. Paths are lists of (seconds, (x, y, z)), the drones hover at the ends
+    '''
+    # Bounding boxes of the paths skip most pairs without looking at the segments
+    boxes = []
+    for path in paths:
+        xs, ys, zs = zip(*(point for _, point in path))
+        boxes.append((min(xs), max(xs), min(ys), max(ys), min(zs), max(zs)))
+
+    conflicts = []
+    smallest = None
+    count = len(paths)
+    for first in range(count):
+        box = boxes[first]
+        for second in range(first + 1, count):
+            other = boxes[second]
+            if (other[0] - box[1] >= separation or box[0] - other[1] >= separation or
+                    other[2] - box[3] >= separation or box[2] - other[3] >= separation or
+                    other[4] - box[5] >= separation or box[4] - other[5] >= separation):
+                continue
+            distance, seconds = closest_approach(paths[first], paths[second])
+            if smallest is None or distance < smallest:
+                smallest = distance
+            if distance < separation:
+                conflicts.append((first, second, distance, seconds))
+
+    conflicts.sort(key=lambda conflict: conflict[2])
+    return conflicts, smallest
+
+
+def closest_approach(first, second):
+    '''
+    Return the smallest distance between two drones flying the paths at the same time and the time it occurs. Between the points of the paths the drones move linearly, so the distance is minimized in closed form on each interval
+    '''
+    times = sorted(set([time for time, _ in first] + [time for time, _ in second]))
+    best_distance = None
+    best_time = 0.0
+    previous_time = None
+    previous = None
+    for time in times:
+        a = _position(first, time)
+        b = _position(second, time)
+        relative = (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+        if previous is None:
+            best_distance = math.sqrt(_dot(relative, relative))
+            best_time = time
+        else:
+            # Minimum of |previous + s * change| for s in 0..1
+            change = (relative[0] - previous[0], relative[1] - previous[1], relative[2] - previous[2])
+            length = _dot(change, change)
+            fraction = 0.0
+            if length > 0:
+                fraction = min(1.0, max(0.0, -_dot(previous, change) / length))
+            closest = (previous[0] + fraction * change[0], previous[1] + fraction * change[1],
+                       previous[2] + fraction * change[2])
+            distance = math.sqrt(_dot(closest, closest))
+            if distance < best_distance:
+                best_distance = distance
+                best_time = previous_time + fraction * (time - previous_time)
+        previous = relative
+        previous_time = time
+    return best_distance, best_time
+
+
+def _straight(start, move, duration, speed):
+    '''
+    Return the go command and path of a straight move. Speeds are scaled to arrive after duration
+    '''
+    if all(abs(value) <= MIN_DISTANCE for value in move):
+        return None, [(0.0, start)]
+
+    length = _length(move)
+    move_speed = min(speed, max(MIN_SPEED, int(math.ceil(length / duration))))
+    end = tuple(origin + value for origin, value in zip(start, move))
+    command = 'go ' + ' '.join(str(value) for value in move) + ' ' + str(move_speed)
+    return command, [(0.0, start), (length / move_speed, end)]
+
+
+def _curve(start, move, lift, duration):
+    '''
+    Return the curve command and path of an arc through the midpoint of the move raised by lift cm, None if the SDK can not fly the arc
+    '''
+    middle = tuple(int(round(value / 2.0)) for value in move)
+    middle = (middle[0], middle[1], middle[2] + int(lift))
+    if all(abs(value) <= MIN_DISTANCE for value in move) or abs(middle[2]) > MAX_COORDINATE:
+        return None
+
+    arc = _arc(start, middle, move)
+    if arc is None:
+        return None
+    center, radius, u, w, angle = arc
+    if not MIN_ARC_RADIUS <= radius <= MAX_ARC_RADIUS:
+        return None
+
+    length = radius * abs(angle)
+    move_speed = min(MAX_CURVE_SPEED, max(MIN_SPEED, int(math.ceil(length / duration))))
+    path = []
+    for step in range(ARC_SEGMENTS + 1):
+        phi = angle * step / ARC_SEGMENTS
+        point = tuple(c + radius * (math.cos(phi) * a + math.sin(phi) * b) for c, a, b in zip(center, u, w))
+        path.append((length * step / ARC_SEGMENTS / move_speed, point))
+    path[-1] = (path[-1][0], tuple(origin + value for origin, value in zip(start, move)))
+
+    command = 'curve ' + ' '.join(str(value) for value in middle + move) + ' ' + str(move_speed)
+    return command, path
+
+
+def _arc(start, middle, move):
+    '''
+    Return center, radius, in-plane unit vectors and the signed angle of the circle from start through start + middle to start + move
+    '''
+    a = middle
+    b = move
+    normal = _cross(a, b)
+    normal_squared = _dot(normal, normal)
+    if normal_squared == 0:
+        return None
+
+    # Circumcenter of the triangle relative to the start
+    first = _cross(b, normal)
+    second = _cross(normal, a)
+    a_squared = _dot(a, a)
+    b_squared = _dot(b, b)
+    relative = tuple((a_squared * f + b_squared * s) / (2 * normal_squared) for f, s in zip(first, second))
+    center = tuple(origin + value for origin, value in zip(start, relative))
+    radius = math.sqrt(_dot(relative, relative))
+
+    # Angles are measured from the start around the normal
+    u = tuple(-value / radius for value in relative)
+    unit_normal = tuple(value / math.sqrt(normal_squared) for value in normal)
+    w = _cross(unit_normal, u)
+
+    def angle_of(point):
+        offset = tuple(p - r for p, r in zip(point, relative))
+        return math.atan2(_dot(offset, w), _dot(offset, u)) % (2 * math.pi)
+
+    through = angle_of(a)
+    end = angle_of(b)
+    angle = end if through < end else end - 2 * math.pi
+    return center, radius, u, w, angle
+
+
+def _position(path, time):
+    if time <= path[0][0]:
+        return path[0][1]
+    for (start_time, start), (end_time, end) in zip(path, path[1:]):
+        if time <= end_time:
+            fraction = (time - start_time) / (end_time - start_time)
+            return tuple(s + fraction * (e - s) for s, e in zip(start, end))
+    return path[-1][1]
+
+
+def _difference(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+
+def _length(vector):
+    return math.sqrt(_dot(vector, vector))
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+
+def _format(point):
+    return '(' + ', '.join(str(int(round(value))) for value in point) + ')'
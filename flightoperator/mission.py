@@ -0,0 +1,374 @@
+import hashlib
+import json
+import os
+import re
+
+# Incremented when the compiled form changes, so outdated cache files are compiled again
+COMPILER_VERSION = 2
+
+# Reference to a variable in a mission script, e.g. $height
+VARIABLE = re.compile(r'\$(\w+)')
+
+
+class MissionError(ValueError):
+    '''
+    Raised for invalid mission scripts. Holds all errors of the script as list of (line number, message)
+    '''
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('\n'.join('line ' + str(line) + ': ' + message for line, message in errors))
+
+
+def _integer(minimum, maximum):
+    def parse(token):
+        try:
+            value = int(token)
+        except ValueError:
+            raise ValueError('\'' + token + '\' is not an integer')
+        if not minimum <= value <= maximum:
+            raise ValueError(token + ' is out of range ' + str(minimum) + '..' + str(maximum))
+        return str(value)
+    return parse
+
+
+def _choice(*choices):
+    def parse(token):
+        if token not in choices:
+            raise ValueError('\'' + token + '\' is not one of ' + ', '.join(choices))
+        return token
+    return parse
+
+
+def _text(token):
+    return token
+
+
+_DISTANCE = _integer(20, 500)
+_COORDINATE = _integer(-500, 500)
+_SPEED = _integer(10, 100)
+_MISSION_PAD = _choice('m1', 'm2', 'm3', 'm4', 'm5', 'm6', 'm7', 'm8', 'm-1', 'm-2')
+
+# Commands of the Tello SDK 2.0: command -> (required arguments, optional arguments)
+SDK_COMMANDS = {
+    'command': ([], []),
+    'takeoff': ([], []),
+    'land': ([], []),
+    'streamon': ([], []),
+    'streamoff': ([], []),
+    'emergency': ([], []),
+    'stop': ([], []),
+    'mon': ([], []),
+    'moff': ([], []),
+    'up': ([_DISTANCE], []),
+    'down': ([_DISTANCE], []),
+    'left': ([_DISTANCE], []),
+    'right': ([_DISTANCE], []),
+    'forward': ([_DISTANCE], []),
+    'back': ([_DISTANCE], []),
+    'cw': ([_integer(1, 360)], []),
+    'ccw': ([_integer(1, 360)], []),
+    'flip': ([_choice('l', 'r', 'f', 'b')], []),
+    'go': ([_COORDINATE, _COORDINATE, _COORDINATE, _SPEED], [_MISSION_PAD]),
+    'curve': ([_COORDINATE] * 6 + [_integer(10, 60)], [_MISSION_PAD]),
+    'jump': ([_COORDINATE, _COORDINATE, _COORDINATE, _SPEED, _integer(0, 360), _MISSION_PAD, _MISSION_PAD], []),
+    'speed': ([_SPEED], []),
+    'rc': ([_integer(-100, 100)] * 4, []),
+    'wifi': ([_text, _text], []),
+    'ap': ([_text, _text], []),
+    'mdirection': ([_choice('0', '1', '2')], []),
+    'speed?': ([], []),
+    'battery?': ([], []),
+    'time?': ([], []),
+    'wifi?': ([], []),
+    'sdk?': ([], []),
+    'sn?': ([], []),
+    'height?': ([], []),
+    'temp?': ([], []),
+    'attitude?': ([], []),
+    'baro?': ([], []),
+    'acceleration?': ([], []),
+    'tof?': ([], [])
+}
+
+
+def validate_command(command):
+    '''
+    Check the command against the grammar and value ranges of the Tello SDK 2.0. Returns the normalized command, raises a ValueError if it is invalid
+    '''
+    tokens = command.split()
+    if not tokens:
+        raise ValueError('empty command')
+
+    verb = tokens[0].lower()
+    if verb not in SDK_COMMANDS:
+        raise ValueError('unknown command \'' + tokens[0] + '\'')
+
+    required, optional = SDK_COMMANDS[verb]
+    arguments = tokens[1:]
+    if not len(required) <= len(arguments) <= len(required) + len(optional):
+        expected = str(len(required))
+        if optional:
+            expected += ' or ' + str(len(required) + len(optional))
+        raise ValueError(verb + ' expects ' + expected + ' arguments, got ' + str(len(arguments)))
+
+    arguments = [parse(argument) for parse, argument in zip(required + optional, arguments)]
+
+    # The drone refuses targets closer than 20 cm in all directions
+    if verb in ('go', 'curve', 'jump'):
+        points = [arguments[0:3]]
+        if verb == 'curve':
+            points.append(arguments[3:6])
+        for point in points:
+            if all(-20 <= int(value) <= 20 for value in point):
+                raise ValueError(verb + ' needs at least one of x, y, z outside -20..20')
+
+    return ' '.join([verb] + arguments)
+
+
+class Mission:
+    '''
+    Compiled mission script. Each step is a list [kind, targets, value, line] with kind 'command', 'timed', 'delay' or 'sync'. The value of a timed step is [offset, command]. Targets are None for the whole swarm or a list of swarm indices, serial numbers or ip addresses.
+    '''
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def __len__(self):
+        return len(self.steps)
+
+    @property
+    def __steps__(self):
+        return self.steps
+
+    def to_dict(self):
+        return {'version': COMPILER_VERSION, 'steps': self.steps}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != COMPILER_VERSION:
+            raise ValueError('mission was compiled by another version')
+        return cls(data['steps'])
+
+    def run(self, operator):
+        '''
+        Queue all steps on the drones of the operator and block until they are executed. All targets are resolved before the first command is sent. Returns the report of Operator.wait()
+        '''
+        swarm = list(operator.swarm)
+        resolved = []
+        errors = []
+        for kind, targets, value, line in self.steps:
+            try:
+                resolved.append((kind, self._resolve(targets, swarm), value))
+            except ValueError as error:
+                errors.append((line, str(error)))
+        if errors:
+            raise MissionError(errors)
+
+        print('🚀  Running mission of ' + str(len(self.steps)) + ' steps')
+        for kind, drones, value in resolved:
+            if kind == 'command':
+                operator.submit(value, drones)
+            elif kind == 'timed':
+                operator.schedule(value[0], value[1], drones)
+            elif kind == 'delay':
+                operator.delay(value, drones)
+            else:
+                operator.sync(drones)
+        return operator.wait()
+
+    def _resolve(self, targets, swarm):
+        '''
+        Return the drones of the swarm matching the targets. None targets the whole swarm
+        '''
+        if targets is None:
+            return None
+
+        drones = []
+        for target in targets:
+            if target.isdigit():
+                if int(target) >= len(swarm):
+                    raise ValueError('no drone with index ' + target + ' in a swarm of ' + str(len(swarm)))
+                matches = [swarm[int(target)]]
+            else:
+                matches = [tello for tello in swarm if target in (tello.tello_sn, tello.tello_ip)]
+                if not matches:
+                    raise ValueError('no drone ' + target + ' in the swarm')
+            for tello in matches:
+                if tello not in drones:
+                    drones.append(tello)
+        return drones
+
+
+def compile_mission(source):
+    '''
+    Compile the source of a mission script into a Mission. All lines are validated, a MissionError lists every invalid line. The script language:
+
+        set height 50           variable, used as $height
+        takeoff                 command for the whole swarm, all drones wait for each other afterwards
+        @0,SN123 up $height     command for the drones with swarm index 0 and serial number SN123
+        repeat 4                repeat the block 4 times
+          cw 90
+        end
+        parallel                commands of the block run without waiting for the other drones
+          @0 flip l
+          @1 forward 100
+        end
+        delay 2.5               wait 2.5 seconds
+        at 10.5 flip b          send the command 10.5 seconds after the start of the mission
+        sync                    wait for all drones
+    '''
+    variables = {}
+    errors = []
+
+    # Open blocks as [kind, count, steps, line]. The script itself is the outermost block
+    blocks = [['script', 1, [], 0]]
+
+    for number, line in enumerate(source.splitlines(), 1):
+        line = line.partition('#')[0].strip()
+        if not line:
+            continue
+
+        try:
+            tokens = line.split()
+            if tokens[0] == 'set':
+                if len(tokens) < 3 or not re.match(r'^\w+$', tokens[1]):
+                    raise ValueError('expected set <name> <value>')
+                variables[tokens[1]] = _substitute(' '.join(tokens[2:]), variables)
+                continue
+
+            tokens = _substitute(line, variables).split()
+            targets = None
+            if tokens[0].startswith('@'):
+                targets = [target for target in tokens[0][1:].split(',') if target]
+                if not targets:
+                    raise ValueError('expected @<drone>[,<drone>...]')
+                tokens = tokens[1:]
+                if not tokens:
+                    raise ValueError('missing command after ' + line.split()[0])
+
+            keyword = tokens[0]
+            in_parallel = any(block[0] == 'parallel' for block in blocks)
+            steps = blocks[-1][2]
+
+            if keyword in ('repeat', 'parallel', 'end') and targets is not None:
+                raise ValueError(keyword + ' can not be targeted')
+
+            if keyword == 'repeat':
+                if len(tokens) != 2:
+                    raise ValueError('expected repeat <count>')
+                count = int(_integer(0, 100000)(tokens[1]))
+                blocks.append(['repeat', count, [], number])
+
+            elif keyword == 'parallel':
+                if len(tokens) != 1:
+                    raise ValueError('parallel expects no arguments')
+                if in_parallel:
+                    raise ValueError('parallel blocks can not be nested')
+                blocks.append(['parallel', 1, [], number])
+
+            elif keyword == 'end':
+                if len(blocks) == 1:
+                    raise ValueError('end without repeat or parallel')
+                kind, count, block_steps, _ = blocks.pop()
+                steps = blocks[-1][2]
+                if kind == 'repeat':
+                    for _ in range(count):
+                        steps.extend(block_steps)
+                else:
+                    steps.extend(block_steps)
+                    _append_sync(steps, None, number)
+
+            elif keyword == 'sync':
+                if len(tokens) != 1:
+                    raise ValueError('sync expects no arguments')
+                _append_sync(steps, targets, number)
+
+            elif keyword == 'at':
+                if len(tokens) < 3:
+                    raise ValueError('expected at <seconds> <command>')
+                offset = _seconds(tokens[1])
+                steps.append(['timed', targets, [offset, validate_command(' '.join(tokens[2:]))], number])
+                if not in_parallel:
+                    _append_sync(steps, None, number)
+
+            elif keyword == 'delay':
+                if len(tokens) != 2:
+                    raise ValueError('expected delay <seconds>')
+                steps.append(['delay', targets, _seconds(tokens[1]), number])
+                if not in_parallel:
+                    _append_sync(steps, None, number)
+
+            else:
+                steps.append(['command', targets, validate_command(' '.join(tokens)), number])
+                if not in_parallel:
+                    _append_sync(steps, None, number)
+
+        except ValueError as error:
+            errors.append((number, str(error)))
+
+    for kind, _, _, number in blocks[1:]:
+        errors.append((number, kind + ' block without end'))
+    if errors:
+        raise MissionError(sorted(errors))
+
+    return Mission(blocks[0][2])
+
+
+def load_mission(path, cache_directory=None):
+    '''
+    Compile the mission script at the given path. If a cache directory is given the compiled form is stored there as JSON, keyed by the SHA-256 of the script, and reused as long as the script is unchanged
+    '''
+    with open(path, 'r', encoding='utf-8') as mission_file:
+        source = mission_file.read()
+
+    if cache_directory is None:
+        return compile_mission(source)
+
+    key = hashlib.sha256((str(COMPILER_VERSION) + '\n' + source).encode('utf-8')).hexdigest()
+    cache_path = os.path.join(cache_directory, key + '.json')
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as cache_file:
+            return Mission.from_dict(json.load(cache_file))
+    except (OSError, ValueError, KeyError):
+        pass
+
+    mission = compile_mission(source)
+
+    if not os.path.isdir(cache_directory):
+        os.makedirs(cache_directory)
+    temporary_path = cache_path + '.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as cache_file:
+        json.dump(mission.to_dict(), cache_file)
+    os.replace(temporary_path, cache_path)
+    return mission
+
+
+def _seconds(token):
+    try:
+        seconds = float(token)
+    except ValueError:
+        raise ValueError('\'' + token + '\' is not a number')
+    if not 0 <= seconds < float('inf'):
+        raise ValueError('time must not be negative')
+    return seconds
+
+
+def _substitute(text, variables):
+    '''
+    Replace the references to variables in the text by their values
+    '''
+    def value(match):
+        if match.group(1) not in variables:
+            raise ValueError('undefined variable $' + match.group(1))
+        return variables[match.group(1)]
+    return VARIABLE.sub(value, text)
+
+
+def _append_sync(steps, targets, line):
+    '''
+    Append a sync point unless the previous step already is one for the same drones
+    '''
+    if steps and steps[-1][0] == 'sync' and steps[-1][1] == targets:
+        return
+    steps.append(['sync', targets, None, line])
@@ -1,76 +1,364 @@
+from drone.logsink import LogSink
+from drone.metrics import SwarmMetrics
+from drone.querycache import QueryCache
+from drone.rccontrol import RcController
+from drone.recorder import TelemetryRecorder
+from drone.rtt import MOTION, command_class
 from drone.tello import Tello
+from drone.statereceiver import acquire_state_receiver, release_state_receiver
+from drone.subscription import Subscription
+from drone.keepalive import KeepaliveScheduler
+from drone.transport import CommandTransport
+from flightoperator.bringup import BringUp
+from flightoperator.discovery import DroneDiscovery
+from flightoperator.formation import plan_formation
+from flightoperator.pipeline import DroneWorker, SyncPoint
+from flightoperator.positionhold import PositionHold
+from flightoperator.roster import Roster
+from flightoperator.scheduler import ReleaseScheduler, TimedStep, sleep_until_monotonic
 import os
+import random
 from datetime import datetime
-import socket
 import threading
+import time
 
 
 class Operator:
 
-    def __init__(self):
+    def __init__(self, state_port=8890, session=None):
         self.swarm = []
+        self.swarm_lock = threading.Lock()
+
+        # Single command socket and state listener shared by all drones of the swarm. The listener is shared with standalone drones of the process
+        self.transport = CommandTransport()
+        self.state_receiver = acquire_state_receiver(state_port)
+
+        # Keepalives of all idle drones are sent by a single thread
+        self.keepalive = KeepaliveScheduler()
 
         self.path_to_log = 'log'
-        self.start_time = datetime.now().isoformat().replace(':', '-')
+        # Name of the log files. Operators running side by side need different sessions
+        self.start_time = session or datetime.now().isoformat().replace(':', '-')
+
+        # Completed commands of all drones are appended to a JSON lines file
+        self.log_sink = LogSink(self.path_to_log + os.path.sep + self.start_time + '.jsonl')
+
+        # Latency histograms and counters of the commands of all drones
+        self.metrics = SwarmMetrics()
+
+        # Read commands like 'battery?' are answered from state strings up to QUERY_MAX_AGE seconds old. Without a query_cache every read is a round trip
+        self.QUERY_MAX_AGE = 0.5
+        self.query_cache = QueryCache(self.QUERY_MAX_AGE, self.metrics)
+
+        # Drones of previous sessions for a fast reconnect. None if the roster is kept elsewhere
+        self.roster = Roster(self.path_to_log + os.path.sep + 'roster.json')
+        self.startup_time = None
 
         self.MAX_COMMAND_RETRIES = 3
 
+        # Drones are initialized by up to BRING_UP_CONCURRENCY threads. Drones which are not ready after BRING_UP_DEADLINE seconds are left out
+        self.BRING_UP_CONCURRENCY = 32
+        self.BRING_UP_DEADLINE = 30.0
+
+        # Retries wait RETRY_BACKOFF seconds, doubled after each retry up to MAX_RETRY_BACKOFF
+        self.RETRY_BACKOFF = 0.1
+        self.MAX_RETRY_BACKOFF = 2.0
+
+        # Persistent command queue of each drone. tello -> DroneWorker
+        self.workers = {}
+        self.workers_lock = threading.Lock()
+        self.pipeline_start = None
+
+        # Timed commands are sent at their deadline by a single thread
+        self.release_scheduler = ReleaseScheduler()
+        self.timed_steps = []
+
+        # Subscriptions to the state of the drones, closed with the operator
+        self.subscriptions = []
+
+        # Joystick setpoints of all drones are sent by a single thread, started with the first rc_channel
+        self.RC_RATE = 20.0
+        self.RC_STALL_TIMEOUT = 0.5
+        self.rc_controller = None
+
+        self.is_closed = False
+
     def __del__(self):
-        self.close()
-        self.save_log()
+        # Threads can not be started while the interpreter shuts down. Close the operator explicitly before
+        if not self.is_closed:
+            self.close()
+            self.save_log()
 
     def add_drone(self, tello):
         '''
-        Add the given drone to the swarm
+        Add the given drone to the swarm. If an ip address is given the drone is created on the command socket of the swarm
         '''
-        self.swarm.append(tello)
-        if self.swarm.index(tello) != -1:
-            print('✅  Added drone ' + tello.tello_ip)
-        else:
-            print('❌  Failed to add drone ' + tello.tello_ip)
+        if not isinstance(tello, Tello):
+            tello = self.create_drone(tello)
+        with self.swarm_lock:
+            self.swarm.append(tello)
+        print('✅  Added drone ' + tello.tello_ip)
 
     def remove_drone(self, tello):
         '''
         Remove the given drone to the swarm
         '''
         tello.close_connection()
-        self.swarm.remove(tello)
+        with self.swarm_lock:
+            if tello in self.swarm:
+                self.swarm.remove(tello)
+
+        # Queued commands are skipped and sync points no longer wait for the drone
+        worker = self.workers.get(tello)
+        if worker is not None:
+            worker.is_active = False
+        if self.rc_controller is not None:
+            self.rc_controller.remove(tello)
         print('✅  Removed drone ' + tello.tello_ip)
 
-    def execute_command(self, command):
+    def execute_command(self, command, release=None):
         '''
         Execute the command on each drone in parallel. The execution is started in threads for each drone. The script is blocked until all drones executed the command or are removed from the swarm.
+
+        Read commands like 'battery?' are answered from the state of the drones if it is fresh (see QUERY_MAX_AGE). Threads are only started for the drones whose state is too old.
+
+        If a release time on the monotonic clock is given the command is sent to all drones in a single loop at that time and the threads only wait for the responses. The ShardedOperator uses this to start the drones of all workers together. Returns the monotonic times the command was sent to the first and the last drone in that case
         '''
+        entries = {}
+        sent = None
+        with self.swarm_lock:
+            drones = list(self.swarm)
+
+        if release is None and self.query_cache is not None and self.query_cache.is_cached(command):
+            answered = 0
+            missed = []
+            for tello in drones:
+                if not tello.state.is_connected:
+                    missed.append(tello)
+                elif self.query_cache.answer(command, tello) is not None:
+                    answered += 1
+                else:
+                    # Sent right away, the thread only waits for the response
+                    entries[tello] = tello.start_command(command)
+                    missed.append(tello)
+            if answered:
+                print('✅  Answered ' + command + ' for ' + str(answered) + ' drones from the state')
+            drones = missed
+        elif release is not None:
+            sleep_until_monotonic(release)
+            first_sent = time.monotonic()
+            for tello in drones:
+                if tello.state.is_connected:
+                    entries[tello] = tello.start_command(command)
+            sent = (first_sent, time.monotonic())
+
         # Execute commands as thread for each drone
         threads = []
-        for tello in self.swarm:
+        for tello in drones:
             thread = threading.Thread(target=self._send_command_to_drone,
-                                      args=(tello, command))
+                                      args=(tello, command, entries.get(tello)))
             thread.start()
             threads.append(thread)
 
         # Wait for drones to finish execution
         for thread in threads:
             thread.join()
+        return sent
+
+    def submit(self, commands, drones=None):
+        '''
+        Queue the command or list of commands for the given drones (default is the whole swarm) and return immediately. Each drone executes its queue independently of the others, only sync points make the drones wait for each other.
+        '''
+        if isinstance(commands, str):
+            commands = [commands]
+        for worker in self._workers(drones):
+            for command in commands:
+                worker.submit(command)
+
+    def delay(self, seconds, drones=None):
+        '''
+        Queue a pause of the given seconds for the given drones (default is the whole swarm)
+        '''
+        for worker in self._workers(drones):
+            worker.submit(float(seconds))
+
+    def schedule(self, offset, command, drones=None):
+        '''
+        Queue the command for the given drones (default is the whole swarm) to be sent at the offset in seconds after the start of the run on the monotonic clock. The command is sent to all drones which are done with their previous commands at once, a drone which is still busy sends it as soon as it is done. Returns the TimedStep
+        '''
+        workers = self._workers(drones)
+        step = TimedStep(self.pipeline_start + offset, offset, command,
+                         [worker.tello for worker in workers])
+        self.timed_steps.append(step)
+        for worker in workers:
+            worker.submit(step)
+        self.release_scheduler.schedule(step)
+        return step
+
+    def sync(self, drones=None, name=None):
+        '''
+        Queue a sync point for the given drones (default is the whole swarm). Commands queued afterwards are started once all these drones executed their previous commands. Returns the SyncPoint
+        '''
+        workers = self._workers(drones)
+        sync_point = SyncPoint([worker.tello for worker in workers], name)
+        for worker in workers:
+            worker.submit(sync_point)
+        return sync_point
+
+    def fly_formation(self, slots, positions, drones=None, speed=50, separation=50):
+        '''
+        Queue the go and curve commands which move the given drones (default is the whole swarm) from their positions into the slots, e.g. formation.grid(len(operator.swarm)). The drones start together and arrive together. Raises a ValueError if two drones would come closer than separation cm. Returns the FormationPlan, plan.positions are the positions of the drones afterwards
+        '''
+        drones = list(self.swarm) if drones is None else list(drones)
+        plan = plan_formation(positions, slots, speed, separation)
+        if plan.conflicts:
+            raise ValueError('\n'.join(
+                str(drones[first].tello_sn or drones[first].tello_ip) + ' and ' +
+                str(drones[second].tello_sn or drones[second].tello_ip) + ' come ' +
+                '{:.0f}'.format(distance) + ' cm close after ' + '{:.1f}'.format(seconds) + ' s'
+                for first, second, distance, seconds in plan.conflicts))
+
+        self.sync(drones)
+        for tello, command in zip(drones, plan.commands):
+            if command is not None:
+                self.submit(command, [tello])
+        self.sync(drones)
+        print('🚀  Flying ' + str(len(drones)) + ' drones into formation in ' +
+              '{:.1f}'.format(plan.duration) + ' s')
+        return plan
+
+    def wait(self):
+        '''
+        Block until all queued commands were executed and print the completion time of each drone and the swarm. Returns the report of pipeline_report()
+        '''
+        with self.workers_lock:
+            workers = list(self.workers.values())
+        for worker in workers:
+            worker.queue.join()
+
+        report = self.pipeline_report()
+        for drone, timings in report['drones'].items():
+            print('⏲  ' + drone + ' finished ' + str(timings['commands']) + ' commands after ' +
+                  '{:.2f}'.format(timings['finished']) + ' s, waited ' +
+                  '{:.2f}'.format(timings['waiting']) + ' s at sync points and timed steps')
+        for step in report['steps']:
+            if step['skew'] is None:
+                print('⏲  ' + step['command'] + ' at ' + '{:.2f}'.format(step['offset']) +
+                      ' s sent late to all ' + str(step['late']) + ' drones')
+                continue
+            print('⏲  ' + step['command'] + ' at ' + '{:.2f}'.format(step['offset']) + ' s sent ' +
+                  '{:.3f}'.format(step['dispatch_delay'] * 1000) + ' ms after the deadline, skew ' +
+                  '{:.3f}'.format(step['skew'] * 1000) + ' ms across ' + str(step['drones'] - step['late']) +
+                  ' drones, ' + str(step['late']) + ' drones late')
+        print('⏲  Swarm finished after ' + '{:.2f}'.format(report['swarm']) + ' s, ' +
+              '{:.2f}'.format(report['waiting']) + ' s spent waiting at sync points and timed steps')
+
+        # The next submit starts a new run
+        self.pipeline_start = None
+        self.timed_steps = []
+        return report
+
+    def pipeline_report(self):
+        '''
+        Return the timings of the current run in seconds since the first submit: completion time, time spent executing commands and time spent waiting at sync points of each drone, the completion time of the whole swarm and the dispatch timing of each timed step
+        '''
+        with self.workers_lock:
+            workers = list(self.workers.values())
+
+        report = {'drones': {}, 'swarm': 0.0, 'waiting': 0.0,
+                  'steps': [step.report() for step in self.timed_steps]}
+        if self.pipeline_start is None:
+            return report
+
+        for worker in workers:
+            if worker.finish_time is None:
+                continue
+            finished = worker.finish_time - self.pipeline_start
+            report['drones'][worker.tello.tello_sn or worker.tello.tello_ip] = {
+                'commands': worker.commands,
+                'finished': finished,
+                'busy': worker.busy_time,
+                'waiting': worker.wait_time
+            }
+            report['swarm'] = max(report['swarm'], finished)
+            report['waiting'] += worker.wait_time
+        return report
+
+    def _workers(self, drones=None):
+        '''
+        Return the workers of the given drones, started on first use. A new run is started if no commands are queued
+        '''
+        if drones is None:
+            with self.swarm_lock:
+                drones = list(self.swarm)
+
+        with self.workers_lock:
+            if self.pipeline_start is None:
+                self.pipeline_start = time.perf_counter()
+                for worker in self.workers.values():
+                    worker.reset()
+
+            workers = []
+            for tello in drones:
+                worker = self.workers.get(tello)
+                if worker is None:
+                    worker = DroneWorker(self, tello)
+                    self.workers[tello] = worker
+                workers.append(worker)
+        return workers
 
-    def _send_command_to_drone(self, tello, command):
+    def _stop_workers(self):
         '''
-        Sends command to the given drone. If drone is disconnected execution is skipped. Tries to execute self.MAX_COMMAND_RETRIES times. If no response is received the drone is removed from the swarm.
+        Execute the remaining queued commands and stop the workers
+        '''
+        with self.workers_lock:
+            workers = list(self.workers.values())
+            self.workers = {}
+        for worker in workers:
+            worker.stop()
+
+    def _send_command_to_drone(self, tello, command, entry=None):
+        '''
+        Sends command to the given drone. If drone is disconnected execution is skipped. Retries self.MAX_COMMAND_RETRIES times with exponential backoff. If no response is received the drone is removed from the swarm. If a LogEntry is given the command was already sent and only its response is awaited first.
+
+        Maneuvers are never sent again after a timeout, the drone may still be flying them. Their answer is awaited for up to MAX_COMMAND_RETRIES more timeouts instead.
         '''
         # Skip execution if tello is disconnected
-        if not tello.state.is_connected:
+        if entry is None and not tello.state.is_connected:
             print('❌  Tello ' + tello.tello_ip +
                   ' is disconnected. Command not sent')
             self.remove_drone(tello)
             return
 
         # Execute command and retry MAX_COMMAND_RETRIES times
+        is_maneuver = command_class(command) == MOTION
+        if entry is None and is_maneuver:
+            entry = tello.start_command(command)
+        if entry is None:
+            response = tello.send_command(command)
+        else:
+            response = tello.finish_command(entry)
         counter = 0
-        while not tello.send_command(command).success() and counter < self.MAX_COMMAND_RETRIES:
+        while not response.success() and counter < self.MAX_COMMAND_RETRIES:
             counter += 1
+            if is_maneuver and _is_timeout(response):
+                print('⏲  Waiting for ' + command + ' of ' + tello.tello_ip + ', the drone may still be flying')
+                response = tello.resume_command(entry)
+                continue
+
+            # Random part of the backoff keeps the retries of the swarm apart
+            backoff = min(self.MAX_RETRY_BACKOFF, self.RETRY_BACKOFF * 2 ** (counter - 1))
+            time.sleep(backoff * random.uniform(0.5, 1.0))
+
+            self.metrics.count(tello.tello_ip, command, 'retries')
+            if is_maneuver:
+                entry = tello.start_command(command)
+                response = tello.finish_command(entry)
+            else:
+                response = tello.send_command(command)
 
         # If the execution fails try to land drone and change state
-        if counter == self.MAX_COMMAND_RETRIES:
+        if not response.success():
             print('❌  Execution failed. Landing ' + tello.tello_sn)
             tello.send_command('land')
             self.remove_drone(tello)
@@ -79,51 +367,159 @@ class Operator:
         '''
         Register drone with the given ssid and password to the given access point.
         '''
-        tello = Tello(ip)
+        tello = self.create_drone(ip)
         while not tello.send_command('ap ' + wifi + ' ' + password).success():
             print('Drone not found. Retrying...')
         print('✅  Registered drone ' + tello.tello_sn + ' to ' + wifi)
 
-    def scan_for_drones(self):
+        # The drone restarts in station mode. Release its address for the next drone
+        tello.close_connection()
+
+    def connect_swarm(self, networks=None, interfaces=None):
         '''
-        Get the current ip network and check each ip address if its a drone. Started with 253 separate threads to speed up the process. Checks if abyss server on port 9999 is available.
+        Reconnect the drones of the roster in parallel. The networks are only scanned if drones of the roster are missing or the roster is empty. Drones which are too old or missed too many connects are dropped from the roster (see Roster). Returns the time in seconds until the swarm was ready
         '''
+        start = time.monotonic()
+        for serial_number in self.roster.prune():
+            print('❗  Dropped drone ' + serial_number + ' from the roster, not seen for a long time')
 
-        ip_address = socket.gethostbyname(socket.gethostname())
+        # Probe only the last known addresses first
+        cached = self.roster.addresses()
+        if cached:
+            print('🔍  Reconnecting ' + str(len(cached)) + ' drones of the roster')
+            self.scan_for_drones([ip + '/32' for ip in cached], confirm=True)
 
-        network_prefix = ''
-        for segment in ip_address.split('.')[0:3]:
-            network_prefix += segment
-            network_prefix += '.'
+        with self.swarm_lock:
+            serial_numbers = set(tello.tello_sn for tello in self.swarm)
+        missing = [sn for sn in self.roster.drones if sn not in serial_numbers]
 
-        # Start scan for all adresses in subnet 255.255.255.0
-        threads = []
-        for i in range(2, 254):
-            address = (network_prefix + str(i), 9999)
-            thread = threading.Thread(
-                target=self._try_add_drone, args=(address,), daemon=True)
-            thread.start()
-            threads.append(thread)
+        if not cached or missing:
+            print('🔍  Scanning for ' + (str(len(missing)) + ' missing drones' if cached else 'drones'))
+            self.scan_for_drones(networks, interfaces)
 
-        # Wait for all threads to terminate
-        for thread in threads:
-            thread.join()
+        # Drones which are still missing after the scan count a miss, the roster is saved with the operator
+        with self.swarm_lock:
+            serial_numbers = set(tello.tello_sn for tello in self.swarm)
+        for serial_number in missing:
+            if serial_number not in serial_numbers and self.roster.miss(serial_number):
+                print('❗  Dropped drone ' + serial_number + ' from the roster, missed ' +
+                      str(self.roster.MAX_MISSES) + ' connects')
+
+        self.startup_time = time.monotonic() - start
+        print('🚀  Swarm of ' + str(len(self.swarm)) + ' drones ready in ' +
+              '{:.2f}'.format(self.startup_time) + ' s')
+        return self.startup_time
+
+    def save_roster(self):
+        '''
+        Store the serial number and ip address of each connected drone in the roster
+        '''
+        if self.roster is None:
+            return
+        with self.swarm_lock:
+            for tello in self.swarm:
+                if tello.state.is_connected:
+                    self.roster.update(tello)
+        self.roster.save()
+
+    def scan_for_drones(self, networks=None, interfaces=None, confirm=False, deadline=None):
+        '''
+        Scan the given networks (CIDR strings, default is the /24 network of the outgoing interface) and interfaces for drones. Checks if abyss server on port 9999 is available, optionally confirmed by a 'command' on port 8889. Drones are initialized concurrently as soon as they are found, drones which are not ready within the deadline (default BRING_UP_DEADLINE seconds) are excluded. Returns the report of BringUp.finish()
+        '''
+        discovery = DroneDiscovery(networks, interfaces, confirm)
+        bring_up = BringUp(self, self.BRING_UP_DEADLINE if deadline is None else deadline, self.BRING_UP_CONCURRENCY)
+
+        with self.swarm_lock:
+            known = set(tello.tello_ip for tello in self.swarm)
+
+        for ip in discovery.scan():
+            if ip in known:
+                continue
+            known.add(ip)
+            bring_up.add(ip)
+
+        return bring_up.finish()
 
-    def _try_add_drone(self, address):
+    def bring_up(self, ips, deadline=None):
         '''
-        Check if ip address is a tello drone by establishing a connection to the abyss server on port 99999. If it is available add it to the swarm.
+        Initialize the drones at the given ip addresses concurrently and add those which are ready within the deadline (default BRING_UP_DEADLINE seconds) to the swarm. Drones already in the swarm are skipped. Returns the report of BringUp.finish() with the time to ready of each drone
         '''
+        bring_up = BringUp(self, self.BRING_UP_DEADLINE if deadline is None else deadline, self.BRING_UP_CONCURRENCY)
 
-        # Create socket
-        ping_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        ping_socket.settimeout(1)
+        with self.swarm_lock:
+            known = set(tello.tello_ip for tello in self.swarm)
 
-        # Test if abyss server of drone is available
-        if ping_socket.connect_ex(address) == 0:
-            self.swarm.append(Tello(address[0]))
+        for ip in ips:
+            if ip in known:
+                continue
+            known.add(ip)
+            bring_up.add(ip)
+        return bring_up.finish()
 
-        # Close connection
-        ping_socket.close()
+    def create_drone(self, ip, initialize=True):
+        '''
+        Create the drone at the given ip address on the sockets of the swarm without adding it to the swarm
+        '''
+        return Tello(ip, transport=self.transport, state_receiver=self.state_receiver, log_sink=self.log_sink,
+                     metrics=self.metrics, keepalive=self.keepalive, initialize=initialize,
+                     query_cache=self.query_cache)
+
+    def start_recording(self, path_prefix=None):
+        '''
+        Record the state stream of all drones to binary files in the log path. Returns the recorder
+        '''
+        if path_prefix is None:
+            path_prefix = self.path_to_log + os.path.sep + self.start_time + '-telemetry'
+        self.state_receiver.recorder = TelemetryRecorder(path_prefix)
+        print('✅  Recording telemetry to ' + path_prefix)
+        return self.state_receiver.recorder
+
+    def stop_recording(self):
+        '''
+        Stop recording the state stream and close the files
+        '''
+        recorder = self.state_receiver.recorder
+        if recorder is None:
+            return
+        self.state_receiver.recorder = None
+        recorder.close()
+        print('✅  Saved telemetry to ' + ', '.join(recorder.paths))
+
+    def rc_channel(self, tello):
+        '''
+        Return the RcChannel of the drone. Its newest setpoint is sent RC_RATE times per second without waiting for acknowledges, the drone hovers if it is not updated for RC_STALL_TIMEOUT seconds:
+
+            channel = operator.rc_channel(tello)
+            channel.set(0, 30, 0, 0)
+        '''
+        if self.rc_controller is None:
+            self.rc_controller = RcController(self.RC_RATE, self.RC_STALL_TIMEOUT)
+        return self.rc_controller.channel(tello)
+
+    def hold_position(self, drones=None, gain=1.0, damping=0.3, max_speed=40):
+        '''
+        Start the position hold of the given drones (default is the whole swarm) over mission pads. The drones are controlled after hold() or track(), e.g. hold_position().hold(tello, (0, 0, 100)). Returns the started PositionHold, stop() lets the drones hover
+        '''
+        position_hold = PositionHold(self, drones, gain, damping, max_speed)
+        position_hold.start()
+        return position_hold
+
+    def subscribe(self, callback, fields=None, changes_only=True, max_rate=None, drones=None):
+        '''
+        Call callback(tello, record) from a separate thread for new state records of the given drones (default is the whole swarm), e.g. subscribe(show, ('height', 'battery'), max_rate=5). A slow callback only skips records, it never delays the state stream. Returns the Subscription, close() ends it
+        '''
+        subscription = Subscription(callback, fields, changes_only, max_rate)
+        for tello in (list(self.swarm) if drones is None else drones):
+            subscription.attach(tello.state, tello)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def serve_metrics(self, port=9100, address='127.0.0.1'):
+        '''
+        Serve the latency histograms and counters of all drones as Prometheus text on http://address:port/metrics while the swarm flies
+        '''
+        self.metrics.serve(port, address)
+        print('✅  Serving metrics on http://' + address + ':' + str(port) + '/metrics')
 
     def land_swarm(self):
         '''
@@ -135,22 +531,41 @@ class Operator:
         '''
         End the socket connection to each drone
         '''
+        self.is_closed = True
+        self.save_roster()
+        self._stop_workers()
+        self.release_scheduler.close()
+        if self.rc_controller is not None:
+            self.rc_controller.close()
         self.land_swarm()
         for tello in self.swarm:
             tello.close_connection()
             del tello
+        for subscription in self.subscriptions:
+            subscription.close()
+        self.keepalive.close()
+        self.transport.close()
+        self.stop_recording()
+        release_state_receiver(self.state_receiver)
+        self.log_sink.close()
+        self.metrics.close()
 
     def save_log(self):
         '''
-        Print the log for each drone to the stdout and save it to the log path
+        Print the recent log entries of each drone to the stdout and save them to the log path. The complete log is written continuously by the log sink
         '''
         if not os.path.isdir(self.path_to_log):
             os.mkdir(self.path_to_log)
-        out = open('log' + os.path.sep + self.start_time + '.txt', 'w')
 
-        for tello in self.swarm:
-            log = tello.log
-            print(tello.tello_sn)
-            for entry in log:
-                print(entry)
-                out.write(str(entry))
+        with open(self.path_to_log + os.path.sep + self.start_time + '.txt', 'w') as out:
+            for tello in self.swarm:
+                log = tello.log
+                print(tello.tello_sn)
+                for entry in log:
+                    print(entry)
+                    out.write(str(entry))
+        print('✅  Complete log saved to ' + self.log_sink.path)
+
+
+def _is_timeout(response):
+    return response.returnvalue == 'error timeout'
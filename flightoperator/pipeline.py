@@ -0,0 +1,133 @@
+import queue
+import threading
+import time
+from flightoperator.scheduler import TimedStep, sleep_until
+
+
+class SyncPoint:
+    '''
+    Barrier between the command queues of several drones. Drones which leave the swarm are withdrawn, so the remaining drones are not blocked.
+    '''
+
+    def __init__(self, parties, name=None):
+        self.name = name
+        self.parties = set(parties)
+        self.arrived = set()
+        self.condition = threading.Condition()
+        self.release_time = None
+
+    def arrive(self, tello):
+        '''
+        Block until all other drones arrived or were withdrawn. Returns the time in seconds the drone waited
+        '''
+        start = time.perf_counter()
+        with self.condition:
+            self.arrived.add(tello)
+            self._release_if_complete()
+            while self.release_time is None:
+                self.condition.wait()
+        return time.perf_counter() - start
+
+    def withdraw(self, tello):
+        '''
+        Remove the drone from the parties of the sync point
+        '''
+        with self.condition:
+            self.parties.discard(tello)
+            self._release_if_complete()
+
+    def _release_if_complete(self):
+        if self.release_time is None and self.parties <= self.arrived:
+            self.release_time = time.perf_counter()
+            self.condition.notify_all()
+
+
+class DroneWorker:
+    '''
+    Persistent command queue of a single drone. A thread executes the queued commands one after another, independent of the other drones, and only waits at sync points.
+    '''
+
+    def __init__(self, operator, tello):
+        self.operator = operator
+        self.tello = tello
+        self.queue = queue.Queue()
+
+        # Timings of the current run in seconds
+        self.commands = 0
+        self.busy_time = 0.0
+        self.wait_time = 0.0
+        self.finish_time = None
+
+        # Thread for executing the queued commands
+        self.is_active = True
+        self.worker_thread = threading.Thread(target=self._worker_thread)
+        self.worker_thread.daemon = True
+        self.worker_thread.start()
+
+    def submit(self, item):
+        '''
+        Queue a command, a pause in seconds as float, a SyncPoint or a TimedStep
+        '''
+        if not self.is_active:
+            if isinstance(item, (SyncPoint, TimedStep)):
+                item.withdraw(self.tello)
+            return
+        self.queue.put(item)
+
+    def reset(self):
+        '''
+        Reset the timings for a new run
+        '''
+        self.commands = 0
+        self.busy_time = 0.0
+        self.wait_time = 0.0
+        self.finish_time = None
+
+    def stop(self):
+        '''
+        Stop the thread after the queued commands were executed
+        '''
+        self.queue.put(None)
+        self.worker_thread.join()
+
+    def _worker_thread(self):
+        '''
+        Execute the queued commands of the drone
+        Runs as a thread until None is queued
+        '''
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                break
+
+            if not self.is_active:
+                if isinstance(item, (SyncPoint, TimedStep)):
+                    item.withdraw(self.tello)
+            elif isinstance(item, SyncPoint):
+                self.wait_time += item.arrive(self.tello)
+            elif isinstance(item, float):
+                sleep_until(time.perf_counter() + item)
+            elif isinstance(item, TimedStep):
+                start = time.perf_counter()
+                entry = item.arrive(self.tello)
+                self.wait_time += time.perf_counter() - start
+                self._execute(item.command, entry)
+            else:
+                self._execute(item)
+
+            self.finish_time = time.perf_counter()
+            self.queue.task_done()
+
+    def _execute(self, command, entry=None):
+        '''
+        Execute the command, optionally already sent as LogEntry, and deactivate the worker if the drone was removed
+        '''
+        start = time.perf_counter()
+        self.operator._send_command_to_drone(self.tello, command, entry)
+        self.busy_time += time.perf_counter() - start
+        self.commands += 1
+
+        # The drone is removed from the swarm if the command failed
+        if self.tello not in self.operator.swarm:
+            self.is_active = False
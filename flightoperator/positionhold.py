@@ -0,0 +1,314 @@
+import math
+import threading
+import time
+from drone.metrics import LatencyHistogram
+
+# Standard deviation of the mission pad position in cm and of the velocity in cm/s. The velocity is sent in dm/s
+POSITION_NOISE = 5.0
+VELOCITY_NOISE = 10.0
+
+# Standard deviation of the acceleration in cm/s^2 which the filter expects between two state strings
+ACCELERATION_NOISE = 100.0
+
+# Longest gap in seconds between two state strings of a drone before its estimate is started again
+MAX_GAP = 1.0
+
+# Step in seconds for the velocity of a trajectory
+TRAJECTORY_STEP = 0.05
+
+
+class PositionFilter:
+    '''
+    Kalman filter of the position and velocity of many drones along x, y and z. The state of all drones is kept in flat arrays with one slot per drone and axis, a state string updates the slots of its drone with the mission pad position (if the pad is detected) and the velocity.
+    '''
+
+    def __init__(self, capacity=64):
+        self.capacity = 0
+        self.position = []
+        self.velocity = []
+
+        # Covariance [[p_pp, p_pv], [p_pv, p_vv]] of each slot
+        self.p_pp = []
+        self.p_pv = []
+        self.p_vv = []
+        self.timestamps = []
+        self.is_initialized = []
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        added = capacity - self.capacity
+        if added <= 0:
+            return
+        self.position += [0.0] * (3 * added)
+        self.velocity += [0.0] * (3 * added)
+        self.p_pp += [0.0] * (3 * added)
+        self.p_pv += [0.0] * (3 * added)
+        self.p_vv += [0.0] * (3 * added)
+        self.timestamps += [None] * added
+        self.is_initialized += [False] * added
+        self.capacity = capacity
+
+    def reset(self, index):
+        '''
+        Forget the estimate of the drone in the slot
+        '''
+        self._grow(max(index + 1, 2 * self.capacity))
+        self.timestamps[index] = None
+        self.is_initialized[index] = False
+
+    def update(self, index, timestamp, position, velocity):
+        '''
+        Predict the estimate of the drone to the timestamp in seconds and correct it with the position in cm (None without a mission pad) and the velocity in cm/s
+        '''
+        if index >= self.capacity:
+            self._grow(max(index + 1, 2 * self.capacity))
+
+        previous = self.timestamps[index]
+        if not self.is_initialized[index] or previous is None or timestamp - previous > MAX_GAP:
+            if position is None:
+                return False
+            self._initialize(index, timestamp, position, velocity)
+            return True
+
+        dt = max(0.0, timestamp - previous)
+        self.timestamps[index] = timestamp
+        q = ACCELERATION_NOISE * ACCELERATION_NOISE
+        r_position = POSITION_NOISE * POSITION_NOISE
+        r_velocity = VELOCITY_NOISE * VELOCITY_NOISE
+
+        for slot in range(3 * index, 3 * index + 3):
+            axis = slot - 3 * index
+
+            # Predict with constant velocity
+            p = self.position[slot] + self.velocity[slot] * dt
+            v = self.velocity[slot]
+            p_pp = self.p_pp[slot] + dt * (2 * self.p_pv[slot] + dt * self.p_vv[slot]) + q * dt ** 4 / 4
+            p_pv = self.p_pv[slot] + dt * self.p_vv[slot] + q * dt ** 3 / 2
+            p_vv = self.p_vv[slot] + q * dt * dt
+
+            # Correct with the position
+            if position is not None:
+                s = p_pp + r_position
+                k_p = p_pp / s
+                k_v = p_pv / s
+                innovation = position[axis] - p
+                p += k_p * innovation
+                v += k_v * innovation
+                p_pp, p_pv, p_vv = (1 - k_p) * p_pp, (1 - k_p) * p_pv, p_vv - k_v * p_pv
+
+            # Correct with the velocity
+            s = p_vv + r_velocity
+            k_p = p_pv / s
+            k_v = p_vv / s
+            innovation = velocity[axis] - v
+            p += k_p * innovation
+            v += k_v * innovation
+            p_pp, p_pv, p_vv = p_pp - k_p * p_pv, (1 - k_v) * p_pv, (1 - k_v) * p_vv
+
+            self.position[slot] = p
+            self.velocity[slot] = v
+            self.p_pp[slot] = p_pp
+            self.p_pv[slot] = p_pv
+            self.p_vv[slot] = p_vv
+        return True
+
+    def estimate(self, index):
+        '''
+        Return the position and velocity of the drone as (x, y, z, vx, vy, vz) or None
+        '''
+        if index >= self.capacity or not self.is_initialized[index]:
+            return None
+        return tuple(self.position[3 * index:3 * index + 3]) + tuple(self.velocity[3 * index:3 * index + 3])
+
+    def _initialize(self, index, timestamp, position, velocity):
+        for axis in range(3):
+            slot = 3 * index + axis
+            self.position[slot] = float(position[axis])
+            self.velocity[slot] = float(velocity[axis])
+            self.p_pp[slot] = POSITION_NOISE * POSITION_NOISE
+            self.p_pv[slot] = 0.0
+            self.p_vv[slot] = VELOCITY_NOISE * VELOCITY_NOISE
+        self.timestamps[index] = timestamp
+        self.is_initialized[index] = True
+
+
+class PositionHold:
+    '''
+    Holds drones at positions relative to the mission pad below them or lets them track a trajectory. Each state string updates the estimate of its drone and sets a new rc setpoint right away, so the loop runs at the state rate. Without a detected mission pad the setpoint is not updated and the rc stall watchdog lets the drone hover.
+
+        hold = PositionHold(operator)
+        hold.start()
+        hold.hold(tello, (0, 0, 100))
+        hold.track(tello, lambda seconds: (50 * math.cos(seconds), 50 * math.sin(seconds), 100))
+
+    Positions are in cm in the coordinates of the mission pad (x forward, y right, z up). The velocities of the state string are taken in the frame of the drone and rotated by the yaw of the drone over the pad.
+    '''
+
+    def __init__(self, operator, drones=None, gain=1.0, damping=0.3, max_speed=40, tolerance=3.0):
+        self.operator = operator
+        self.drones = list(operator.swarm) if drones is None else list(drones)
+
+        # Setpoint velocity in cm/s = target velocity + gain * error in cm - damping * velocity error, limited to max_speed. Errors below tolerance cm are ignored
+        self.GAIN = gain
+        self.DAMPING = damping
+        self.MAX_SPEED = max_speed
+        self.TOLERANCE = tolerance
+
+        self.filter = PositionFilter(len(self.drones))
+        self.slots = dict((tello, index) for index, tello in enumerate(self.drones))
+        self.targets = {}
+        self.channels = {}
+        self.start_time = time.monotonic()
+        self.subscription = None
+        self.lock = threading.Lock()
+
+        # Time from parsing a state string to setting the rc setpoint and time of the computation, in ns
+        self.latency = LatencyHistogram()
+        self.compute_time = LatencyHistogram()
+
+        # Counters
+        self.updates = 0
+        self.corrections = 0
+        self.without_pad = 0
+
+    @property
+    def __targets__(self):
+        return self.targets
+
+    def start(self):
+        '''
+        Enable the mission pads of the drones and follow their state
+        '''
+        for tello in self.drones:
+            if not tello.state.missionpads_enabled:
+                tello.enable_missionpads()
+        self.subscription = self.operator.subscribe(self._on_state, changes_only=False, drones=self.drones)
+
+    def stop(self):
+        '''
+        Stop following the state. All controlled drones hover and no longer receive rc setpoints
+        '''
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
+        with self.lock:
+            drones = list(self.channels)
+            self.channels = {}
+            self.targets = {}
+        for tello in drones:
+            self.operator.rc_controller.remove(tello)
+
+    def hold(self, tello, position=None):
+        '''
+        Hold the drone at the position (default: the current estimate)
+        '''
+        if position is None:
+            estimate = self.estimate(tello)
+            if estimate is None:
+                raise ValueError('no position of ' + tello.tello_ip + ', is a mission pad below the drone?')
+            position = estimate[:3]
+        self._control(tello, tuple(position))
+
+    def track(self, tello, trajectory):
+        '''
+        Let the drone follow trajectory(seconds since the start) -> (x, y, z)
+        '''
+        self._control(tello, trajectory)
+
+    def release(self, tello):
+        '''
+        Stop controlling the drone, it hovers and no longer receives rc setpoints
+        '''
+        with self.lock:
+            self.targets.pop(tello, None)
+            channel = self.channels.pop(tello, None)
+        if channel is not None:
+            self.operator.rc_controller.remove(tello)
+
+    def estimate(self, tello):
+        '''
+        Return the estimated position and velocity of the drone as (x, y, z, vx, vy, vz) or None
+        '''
+        return self.filter.estimate(self.slots[tello])
+
+    def statistics(self):
+        '''
+        Return the counters and the latency percentiles in ms from parsing a state string to the new setpoint
+        '''
+        statistics = {
+            'updates': self.updates,
+            'corrections': self.corrections,
+            'without_pad': self.without_pad,
+        }
+        if self.latency.count:
+            statistics['latency_p50_ms'] = self.latency.percentile(50) / 1e6
+            statistics['latency_p99_ms'] = self.latency.percentile(99) / 1e6
+            statistics['latency_max_ms'] = self.latency.maximum / 1e6
+            statistics['compute_p50_us'] = self.compute_time.percentile(50) / 1e3
+        return statistics
+
+    def _control(self, tello, target):
+        if tello not in self.slots:
+            raise ValueError('drone ' + tello.tello_ip + ' is not controlled by this position hold')
+        channel = self.operator.rc_channel(tello)
+        with self.lock:
+            self.channels[tello] = channel
+            self.targets[tello] = target
+
+    def _on_state(self, tello, record):
+        '''
+        Update the estimate of the drone and set its rc setpoint
+        Called by the subscription for each state string
+        '''
+        started = time.perf_counter_ns()
+        self.updates += 1
+
+        # The velocities are sent in dm/s in the frame of the drone
+        yaw = math.radians(record.mpry[2]) if record.mpry is not None else 0.0
+        cos_yaw = math.cos(yaw)
+        sin_yaw = math.sin(yaw)
+        forward = (record.vgx or 0) * 10.0
+        right = (record.vgy or 0) * 10.0
+        velocity = (forward * cos_yaw - right * sin_yaw, forward * sin_yaw + right * cos_yaw, (record.vgz or 0) * 10.0)
+
+        position = None
+        if record.mid is not None and record.mid > 0:
+            position = (record.mx, record.my, record.mz)
+        else:
+            self.without_pad += 1
+
+        index = self.slots[tello]
+        if not self.filter.update(index, record.timestamp, position, velocity) or position is None:
+            return
+
+        target = self.targets.get(tello)
+        channel = self.channels.get(tello)
+        if target is None or channel is None:
+            return
+        target_velocity = (0.0, 0.0, 0.0)
+        if callable(target):
+            # The velocity of the trajectory is fed forward, so the drone does not lag behind it
+            seconds = record.timestamp - self.start_time
+            ahead = target(seconds + TRAJECTORY_STEP)
+            target = target(seconds)
+            target_velocity = tuple((ahead[axis] - target[axis]) / TRAJECTORY_STEP for axis in range(3))
+
+        # Proportional-derivative control in the frame of the pad, rotated into the frame of the drone
+        estimate = self.filter.estimate(index)
+        command = []
+        for axis in range(3):
+            error = target[axis] - estimate[axis]
+            if abs(error) < self.TOLERANCE:
+                error = 0.0
+            velocity_error = estimate[3 + axis] - target_velocity[axis]
+            command.append(max(-self.MAX_SPEED, min(self.MAX_SPEED, target_velocity[axis] +
+                                                    self.GAIN * error - self.DAMPING * velocity_error)))
+
+        pitch = command[0] * cos_yaw + command[1] * sin_yaw
+        roll = -command[0] * sin_yaw + command[1] * cos_yaw
+        channel.set(roll, pitch, command[2], 0)
+        self.corrections += 1
+
+        finished = time.perf_counter_ns()
+        self.compute_time.record(finished - started)
+        self.latency.record(int((time.monotonic() - record.timestamp) * 1e9))
@@ -0,0 +1,93 @@
+import json
+import os
+import time
+
+
+class Roster:
+    '''
+    Drones of previous sessions stored as JSON file. Maps the serial number of each drone to its last ip address, the time it was last seen and the number of connects it missed since
+    '''
+
+    def __init__(self, path, max_age=30 * 24 * 3600, max_misses=3):
+        self.path = path
+        self.drones = {}
+
+        # Drones which were not seen for MAX_AGE seconds or missed MAX_MISSES connects in a row are dropped, so a retired drone does not force a network scan on every start
+        self.MAX_AGE = max_age
+        self.MAX_MISSES = max_misses
+        self.load()
+
+    @property
+    def __drones__(self):
+        return self.drones
+
+    def load(self):
+        '''
+        Read the roster from the file. A missing or damaged file results in an empty roster
+        '''
+        try:
+            with open(self.path, 'r', encoding='utf-8') as roster_file:
+                self.drones = json.load(roster_file)
+        except (OSError, ValueError):
+            self.drones = {}
+
+    def save(self):
+        '''
+        Write the roster to the file. The file is replaced at once, so it is never left half written
+        '''
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as roster_file:
+            json.dump(self.drones, roster_file, indent=2, sort_keys=True)
+        os.replace(temporary_path, self.path)
+
+    def update(self, tello):
+        '''
+        Store the ip address of the given drone and the current time
+        '''
+        if tello.tello_sn is None:
+            return
+        self.add(tello.tello_sn, tello.tello_ip)
+
+    def add(self, serial_number, ip):
+        '''
+        Store the ip address of the drone with the given serial number and the current time
+        '''
+        self.drones[serial_number] = {
+            'ip': ip,
+            'last_seen': time.time(),
+            'misses': 0
+        }
+
+    def miss(self, serial_number):
+        '''
+        Count a connect the drone with the given serial number missed. Returns True if the drone was dropped from the roster
+        '''
+        drone = self.drones.get(serial_number)
+        if drone is None:
+            return False
+        drone['misses'] = drone.get('misses', 0) + 1
+        if drone['misses'] < self.MAX_MISSES:
+            return False
+        del self.drones[serial_number]
+        return True
+
+    def prune(self):
+        '''
+        Drop the drones which were not seen for MAX_AGE seconds. Returns their serial numbers
+        '''
+        oldest = time.time() - self.MAX_AGE
+        pruned = [serial_number for serial_number, drone in self.drones.items() if drone['last_seen'] < oldest]
+        for serial_number in pruned:
+            del self.drones[serial_number]
+        return pruned
+
+    def addresses(self):
+        '''
+        Return the ip addresses of all drones in the roster, most recently seen first
+        '''
+        drones = sorted(self.drones.values(), key=lambda drone: drone['last_seen'], reverse=True)
+        return [drone['ip'] for drone in drones]
@@ -0,0 +1,157 @@
+import heapq
+import itertools
+import threading
+import time
+
+# Time in seconds before a deadline at which sleeping ends and spinning starts. Sleeping alone overshoots by up to a scheduler tick
+SPIN_TIME = 0.002
+
+
+def sleep_until(deadline, spin_time=SPIN_TIME, clock=time.perf_counter):
+    '''
+    Block until the deadline on the given clock (default time.perf_counter()). Sleeps until shortly before the deadline and spins for the rest, so the deadline is met within microseconds
+    '''
+    remaining = deadline - clock()
+    if remaining > spin_time:
+        time.sleep(remaining - spin_time)
+    while clock() < deadline:
+        pass
+
+
+def sleep_until_monotonic(deadline, spin_time=SPIN_TIME):
+    '''
+    Block until the time.monotonic() deadline, e.g. a release time shared by several processes
+    '''
+    sleep_until(deadline, spin_time, time.monotonic)
+
+
+class TimedStep:
+    '''
+    Command which is released to several drones at a fixed time. The command workers of the drones arrive at the step once their previous commands are done, the ReleaseScheduler sends the command to all waiting drones at the deadline in a single loop. Drones arriving after the deadline send the command themselves and are reported as late.
+    '''
+
+    def __init__(self, deadline, offset, command, parties):
+        self.deadline = deadline
+        self.offset = offset
+        self.command = command
+        self.parties = set(parties)
+
+        # Drones waiting for the release and the LogEntry of each drone the command was sent to
+        self.ready = []
+        self.entries = {}
+        self.late = set()
+        self.released = False
+        self.condition = threading.Condition()
+
+        # time.perf_counter() after the command was sent to each drone
+        self.sent = {}
+
+    def arrive(self, tello):
+        '''
+        Block until the command was sent to the drone. Returns the LogEntry of the command
+        '''
+        with self.condition:
+            if self.released:
+                self.late.add(tello)
+                self._send(tello)
+            else:
+                self.ready.append(tello)
+                while tello not in self.entries:
+                    self.condition.wait()
+            return self.entries[tello]
+
+    def withdraw(self, tello):
+        '''
+        Remove the drone from the parties of the step
+        '''
+        with self.condition:
+            self.parties.discard(tello)
+
+    def release(self):
+        '''
+        Send the command to all waiting drones. Called by the ReleaseScheduler at the deadline
+        '''
+        with self.condition:
+            self.released = True
+            for tello in self.ready:
+                self._send(tello)
+            self.condition.notify_all()
+
+    def report(self):
+        '''
+        Return the dispatch timing of the step in seconds: delay of the first send after the deadline and skew between the first and last drone released on time
+        '''
+        on_time = [sent for tello, sent in self.sent.items() if tello not in self.late]
+        return {
+            'offset': self.offset,
+            'command': self.command,
+            'drones': len(self.sent),
+            'late': len(self.late),
+            'dispatch_delay': min(on_time) - self.deadline if on_time else None,
+            'skew': max(on_time) - min(on_time) if on_time else None
+        }
+
+    def _send(self, tello):
+        self.entries[tello] = tello.start_command(self.command)
+        self.sent[tello] = time.perf_counter()
+
+
+class ReleaseScheduler:
+    '''
+    Releases TimedSteps at their deadline from a single thread
+    '''
+
+    def __init__(self, spin_time=SPIN_TIME):
+        self.spin_time = spin_time
+
+        # Heap of (deadline, order, step)
+        self.steps = []
+        self.order = itertools.count()
+        self.condition = threading.Condition()
+
+        # Thread for releasing the steps
+        self.is_running = True
+        self.release_thread = threading.Thread(target=self._release_thread)
+        self.release_thread.daemon = True
+        self.release_thread.start()
+
+    def schedule(self, step):
+        '''
+        Release the TimedStep at its deadline
+        '''
+        with self.condition:
+            heapq.heappush(self.steps, (step.deadline, next(self.order), step))
+            self.condition.notify()
+
+    def close(self):
+        '''
+        Release the remaining steps immediately and stop the thread
+        '''
+        with self.condition:
+            self.is_running = False
+            self.condition.notify()
+        self.release_thread.join()
+
+    def _release_thread(self):
+        '''
+        Sleep until shortly before the next deadline, spin until it is reached and release the step
+        Runs as a thread until the scheduler is closed
+        '''
+        while True:
+            with self.condition:
+                while self.is_running and not self.steps:
+                    self.condition.wait()
+                if not self.steps:
+                    break
+
+                # Wake up early if an earlier step is scheduled meanwhile
+                deadline = self.steps[0][0]
+                remaining = deadline - time.perf_counter()
+                if self.is_running and remaining > self.spin_time:
+                    self.condition.wait(remaining - self.spin_time)
+                    continue
+                _, _, step = heapq.heappop(self.steps)
+
+            if self.is_running:
+                sleep_until(deadline, self.spin_time)
+            step.release()
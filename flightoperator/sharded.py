@@ -0,0 +1,300 @@
+import multiprocessing
+import os
+from datetime import datetime
+import threading
+import time
+from drone.sharedtelemetry import SharedTelemetry
+from flightoperator.operator import Operator
+from flightoperator.roster import Roster
+
+# Default ports of the drones
+DEFAULT_STATE_PORT = 8890
+VIDEO_PORT = 11111
+
+
+class ShardedOperator:
+    '''
+    Operator for very large swarms which partitions the drones across worker processes. Each worker runs an Operator with its own command socket, state port, keepalives and log, so parsing and logging of one shard never competes with another for the GIL. The coordinator only sends commands through pipes and reads the telemetry of all drones from a shared memory block.
+
+        with ShardedOperator(workers=4) as operator:
+            operator.bring_up(ips)
+            operator.execute_command('takeoff')
+            operator.telemetry_of(ips[0])['height']
+
+    Broadcasts are released on the monotonic clock, which all processes share: every worker sleeps until the same release time and sends the command to its drones in a single loop. With more than one worker new drones are told to send their state to port 8890 + worker with 'port', which needs SDK 3.0 (Tello EDU). SDK 2.0 drones reject it and can only be flown with a single worker.
+
+    Scripts which create a ShardedOperator need an if __name__ == '__main__' guard on platforms which spawn the workers.
+    '''
+
+    def __init__(self, workers=None, capacity=1024, state_port=DEFAULT_STATE_PORT):
+        self.WORKERS = workers or os.cpu_count() or 1
+
+        # Time in seconds between sending a broadcast to the workers and its release. Covers the delivery through the pipes
+        self.RELEASE_LEAD = 0.02
+
+        self.path_to_log = 'log'
+        self.start_time = datetime.now().isoformat().replace(':', '-')
+        self.roster = Roster(self.path_to_log + os.path.sep + 'roster.json')
+
+        # Latest state of each drone, written by the workers
+        self.telemetry = SharedTelemetry(capacity)
+
+        # Worker index and telemetry slot of each drone by ip address
+        self.shards = {}
+        self.slots = {}
+        self.free_slots = list(range(capacity - 1, -1, -1))
+
+        # Timing of the last broadcast, see execute_command
+        self.last_broadcast = None
+
+        # Requests to the workers are answered in order, one request at a time
+        self.lock = threading.Lock()
+        self.connections = []
+        self.processes = []
+        context = multiprocessing.get_context()
+        for index in range(self.WORKERS):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_worker_main, name='dronella-worker-' + str(index),
+                                      args=(worker_connection, self.telemetry.name, state_port + index,
+                                            self.WORKERS > 1, self.start_time + '-worker' + str(index)))
+            process.daemon = True
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+        self.is_closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def swarm(self):
+        '''
+        Ip addresses of all drones of the swarm
+        '''
+        return sorted(self.shards, key=self.slots.get)
+
+    def bring_up(self, ips, deadline=30.0):
+        '''
+        Assign the drones at the given ip addresses to the workers with the fewest drones and initialize them concurrently. Drones which are not ready within the deadline are left out. Returns the merged report of BringUp.finish(). Raises a RuntimeError if drones of a worker without the default state port reject 'port', they stay in the swarm without telemetry
+        '''
+        batches = {}
+        with self.lock:
+            counts = [0] * self.WORKERS
+            for index in self.shards.values():
+                counts[index] += 1
+            for ip in ips:
+                if ip in self.shards:
+                    continue
+                if not self.free_slots:
+                    raise ValueError('the shared telemetry has no slot left for ' + ip)
+                index = counts.index(min(counts))
+                counts[index] += 1
+                self.shards[ip] = index
+                self.slots[ip] = self.free_slots.pop()
+                batches.setdefault(index, []).append((ip, self.slots[ip]))
+
+            replies = self._request(dict((index, ('bring_up', batch, deadline)) for index, batch in batches.items()))
+
+        report = {'ready': {}, 'failed': [], 'missed': [], 'unported': [], 'duration': 0.0}
+        for index, result in replies.items():
+            report['ready'].update(result['ready'])
+            report['failed'] += result['failed']
+            report['missed'] += result['missed']
+            report['unported'] += result['unported']
+            report['duration'] = max(report['duration'], result['duration'])
+        print('🚀  ' + str(len(self.shards)) + ' drones ready on ' + str(self.WORKERS) + ' workers after ' +
+              '{:.2f}'.format(report['duration']) + ' s')
+
+        if report['unported']:
+            raise RuntimeError('drones ' + ', '.join(report['unported']) + " rejected 'port', which needs SDK 3.0 (Tello EDU). " +
+                               'Their state is not sent to their worker, use ShardedOperator(workers=1) for these drones')
+        return report
+
+    def execute_command(self, command):
+        '''
+        Execute the command on all drones of all workers. The command is released on all workers at the same time on the monotonic clock. Blocks until every drone executed it or was removed. Returns the timing of the broadcast in seconds: delay of the first send after the release, skew between the first and the last drone and the duration until all workers were done
+        '''
+        with self.lock:
+            release = time.monotonic() + self.RELEASE_LEAD
+            replies = self._request(dict((index, ('execute', command, release)) for index in self._active()))
+            finished = time.monotonic()
+
+        sent = [result for result in replies.values() if result is not None]
+        report = {
+            'command': command,
+            'workers': len(replies),
+            'dispatch_delay': min(first for first, _ in sent) - release if sent else None,
+            'skew': max(last for _, last in sent) - min(first for first, _ in sent) if sent else None,
+            'duration': finished - release
+        }
+        self.last_broadcast = report
+        return report
+
+    def submit(self, commands):
+        '''
+        Queue the command or list of commands for all drones and return immediately. The drones of each worker execute their queues independently, barrier() waits for all of them
+        '''
+        with self.lock:
+            self._request(dict((index, ('submit', commands)) for index in self._active()))
+
+    def barrier(self):
+        '''
+        Block until the drones of all workers executed their queued commands. Returns the pipeline reports of the workers
+        '''
+        with self.lock:
+            replies = self._request(dict((index, ('wait',)) for index in self._active()))
+        return [replies[index] for index in sorted(replies)]
+
+    def telemetry_of(self, ip):
+        '''
+        Return the latest state values of the drone as dict including the 'timestamp' and 'age' in seconds. None before its first state string
+        '''
+        return self.telemetry.read(self.slots[ip])
+
+    def statistics(self):
+        '''
+        Return the number of drones and the state receiver counters of each worker
+        '''
+        with self.lock:
+            replies = self._request(dict((index, ('statistics',)) for index in range(self.WORKERS)))
+        return [replies[index] for index in range(self.WORKERS)]
+
+    def land_swarm(self):
+        '''
+        Send the land command to all drones
+        '''
+        return self.execute_command('land')
+
+    def close(self):
+        '''
+        Close the operators of all workers, which lands their drones, and stop the workers
+        '''
+        if self.is_closed:
+            return
+        self.is_closed = True
+        with self.lock:
+            replies = self._request(dict((index, ('close',)) for index in range(self.WORKERS)))
+        for process in self.processes:
+            process.join(5.0)
+        for connection in self.connections:
+            connection.close()
+
+        for drones in replies.values():
+            for serial_number, ip in drones:
+                self.roster.add(serial_number, ip)
+        self.roster.save()
+        self.telemetry.close()
+
+    def _active(self):
+        '''
+        Return the indices of the workers with drones
+        '''
+        return sorted(set(self.shards.values()))
+
+    def _request(self, messages):
+        '''
+        Send the message of each worker index and return the result of each worker. Requires the lock. Drones which a worker removed from its swarm are removed from the shards
+        '''
+        for index, message in messages.items():
+            self.connections[index].send(message)
+
+        results = {}
+        errors = []
+        for index in messages:
+            try:
+                status, result, drones = self.connections[index].recv()
+            except EOFError:
+                status, result, drones = 'error', 'worker ' + str(index) + ' stopped', None
+            if status == 'error':
+                errors.append(result)
+            results[index] = result
+
+            # Free the slots of drones the worker no longer has
+            if drones is None:
+                continue
+            drones = set(drones)
+            for ip in [ip for ip, shard in self.shards.items() if shard == index and ip not in drones]:
+                del self.shards[ip]
+                slot = self.slots.pop(ip)
+                self.telemetry.clear(slot)
+                self.free_slots.append(slot)
+
+        if errors:
+            raise RuntimeError('\n'.join(errors))
+        return results
+
+
+def _worker_main(connection, telemetry_name, state_port, set_port, session):
+    '''
+    Run an Operator for a shard of the swarm and execute the requests of the coordinator
+    Runs as a worker process until the coordinator sends 'close'
+    '''
+    operator = Operator(state_port, session)
+
+    # The coordinator keeps the roster of all workers
+    operator.roster = None
+    telemetry = SharedTelemetry(name=telemetry_name)
+    slots = {}
+
+    def publish(tello, record):
+        slot = slots.get(tello.tello_ip)
+        if slot is not None:
+            telemetry.write(slot, record)
+
+    subscription = operator.subscribe(publish, changes_only=False, drones=[])
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            message = ('close',)
+        verb = message[0]
+        if verb == 'close':
+            break
+
+        try:
+            result = None
+            if verb == 'bring_up':
+                _, batch, deadline = message
+                known = set(operator.swarm)
+                slots.update(batch)
+                result = operator.bring_up([ip for ip, _ in batch], deadline)
+                added = [tello for tello in operator.swarm if tello not in known]
+                for tello in added:
+                    subscription.attach(tello.state, tello)
+
+                # Move the state stream of the new drones to the port of this worker. The drones keep the port until they restart. A rejected 'port' is not retried and the drone stays in the swarm, it only misses the telemetry unless this worker listens on the default port
+                result['unported'] = []
+                if set_port:
+                    for tello in added:
+                        response = tello.send_command('port ' + str(state_port) + ' ' + str(VIDEO_PORT))
+                        if not response.success() and state_port != DEFAULT_STATE_PORT:
+                            result['unported'].append(tello.tello_ip)
+            elif verb == 'execute':
+                _, command, release = message
+                result = operator.execute_command(command, release)
+            elif verb == 'submit':
+                operator.submit(message[1])
+            elif verb == 'wait':
+                result = operator.wait()
+            elif verb == 'statistics':
+                result = operator.state_receiver.statistics()
+                result['drones'] = len(operator.swarm)
+            connection.send(('ok', result, [tello.tello_ip for tello in operator.swarm]))
+        except Exception as exc:
+            connection.send(('error', repr(exc), [tello.tello_ip for tello in operator.swarm]))
+
+    drones = [(tello.tello_sn, tello.tello_ip) for tello in operator.swarm if tello.tello_sn is not None]
+    subscription.close()
+    operator.close()
+    telemetry.close()
+    try:
+        connection.send(('ok', drones, None))
+    except OSError:
+        pass
+    connection.close()
@@ -1,26 +1,36 @@
-from drone.tello import Tello
+from flightoperator.mission import MissionError, load_mission, validate_command
 from flightoperator.operator import Operator
 import sys
 import time
 import os
 
 
-def execute_commands_from_file(command_file_name):
-    print('Command file found. Executing script')
-    f = open(command_file_name, 'r')
-    commands = f.readlines()
+def compile_command_file(command_file_name):
+    '''
+    Compile the command file before any drone is connected, so errors are found before takeoff
+    '''
+    start = time.monotonic()
+    try:
+        mission = load_mission(command_file_name, 'log' + os.path.sep + 'missions')
+    except MissionError as error:
+        print('❌  ' + command_file_name + ' is invalid:\n' + str(error))
+        sys.exit(1)
+    print('✅  Compiled ' + command_file_name + ' into ' + str(len(mission)) + ' steps in ' +
+          '{:.3f}'.format(time.monotonic() - start) + ' s')
+    return mission
 
-    for command in commands:
-        if command != '' and command != '\n':
-            command = command.rstrip()
 
-            if command.find('delay') != -1:
-                sec = float(command.partition('delay')[2])
-                print('✅  Delaying ' + sec)
-                time.sleep(sec)
-            else:
-                operator.execute_command(command)
+# Try to get the command file from argument list
+command_file = 'command.txt'
+try:
+    command_file = sys.argv[2]
+# If no parameter was given try standard file
+except IndexError:
+    print('No command file given by startupt. Trying command.txt')
 
+mission = None
+if os.path.isfile(command_file):
+    mission = compile_command_file(command_file)
 
 operator = Operator()
 
@@ -47,22 +57,17 @@ if (connect_to_multiple_drones):
                 operator.register_drone('192.168.10.1', wifi, password)
         input('Connect to the management wifi now and press Enter')
 
-# Scan for drones on local network
+# Reconnect the drones of the last session or scan the local network
 while (operator.swarm == []):
-    operator.scan_for_drones()
-
-# Try to get the command file from argument list
-command_file = 'command.txt'
-try:
-    command_file = sys.argv[2]
-# If no parameter was given try standard file
-except IndexError:
-    print('No command file given by startupt. Trying command.txt')
+    operator.connect_swarm()
 
 # Check if command file has been found
-if os.path.isfile(command_file):
-    print('command.txt found. Executing...')
-    execute_commands_from_file(command_file)
+if mission is not None:
+    print(command_file + ' found. Executing...')
+    try:
+        mission.run(operator)
+    except MissionError as error:
+        print('❌  ' + command_file + ' does not match the swarm:\n' + str(error))
 
 # If no command file has been given start in interactive mode
 else:
@@ -79,7 +84,14 @@ else:
         if not command or 'end' in command:
             break
 
+        try:
+            command = validate_command(command)
+        except ValueError as error:
+            print('❌  ' + str(error))
+            continue
+
         # Send command to tello drone. If return is None end communication
         operator.execute_command(command)
 
+operator.close()
 operator.save_log()
@@ -0,0 +1,42 @@
+'''
+Start virtual Tello drones on loopback addresses until Ctrl+C is pressed.
+
+Usage: python -m simulator [-n DRONES] [--latency SECONDS] [--jitter SECONDS] [--loss RATE] [--error-rate RATE] [--state-rate HZ] [--time-scale FACTOR]
+'''
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulator.swarm import SimulatedSwarm  # noqa: E402
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python -m simulator', description='Simulate a swarm of Tello EDU drones')
+    parser.add_argument('-n', '--drones', type=int, default=5, help='number of drones')
+    parser.add_argument('--first-ip', default='127.0.0.2', help='address of the first drone')
+    parser.add_argument('--latency', type=float, default=0.005, help='response latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='additional random latency in seconds')
+    parser.add_argument('--loss', type=float, default=0.0, help='probability of losing a command')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='probability of an error response')
+    parser.add_argument('--state-rate', type=float, default=10.0, help='state strings per second and drone')
+    parser.add_argument('--time-scale', type=float, default=0.0, help='duration of maneuvers, 1 is real time')
+    arguments = parser.parse_args(argv)
+
+    swarm = SimulatedSwarm(arguments.drones, arguments.first_ip, arguments.latency, arguments.jitter,
+                           arguments.loss, arguments.error_rate, arguments.state_rate, arguments.time_scale)
+    print('🚀  Simulating ' + str(arguments.drones) + ' drones from ' + swarm.ips[0] + ' to ' + swarm.ips[-1])
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    swarm.close()
+    print('✅  Answered ' + str(swarm.commands_received - swarm.commands_lost) + ' commands, sent ' +
+          str(swarm.states_sent) + ' state strings')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,198 @@
+import heapq
+import ipaddress
+import itertools
+import random
+import selectors
+import socket
+import threading
+import time
+from simulator.virtualtello import VirtualTello
+
+
+class SimulatedSwarm:
+    '''
+    Virtual Tello drones on consecutive loopback addresses (127.0.0.2, 127.0.0.3, ...). Each drone answers SDK commands on UDP port 8889, pushes its state to port 8890 (or the port set with 'port') of the address which sent 'command' and accepts TCP connections on port 9999 like the abyss server of the real drone. All drones are served by a single thread.
+
+        with SimulatedSwarm(10, latency=0.01, loss=0.02) as swarm:
+            operator.scan_for_drones(['127.0.0.0/27'])
+
+    Addresses other than 127.0.0.1 need loopback aliases on macOS and Windows (e.g. ifconfig lo0 alias 127.0.0.2). Linux routes the whole 127.0.0.0/8 to the loopback interface.
+    '''
+
+    def __init__(self, count, first_ip='127.0.0.2', latency=0.0, jitter=0.0, loss=0.0, error_rate=0.0,
+                 state_rate=10.0, time_scale=0.0, command_port=8889, state_port=8890, abyss_port=9999, seed=None):
+
+        # Responses are delayed by latency plus a uniform random part of up to jitter seconds
+        self.latency = latency
+        self.jitter = jitter
+
+        # Probability of losing a command and of answering a control command with 'error'
+        self.loss = loss
+        self.error_rate = error_rate
+
+        # State strings per second and drone. 0 disables the state stream
+        self.state_rate = state_rate
+        self.state_port = state_port
+        self.random = random.Random(seed)
+
+        self.selector = selectors.DefaultSelector()
+        self.drones = []
+        self.sockets = []
+
+        # Address of the controller of each drone, set by 'command'
+        self.controllers = {}
+
+        # Timed events as (time, order, function, arguments)
+        self.events = []
+        self.order = itertools.count()
+
+        first = ipaddress.ip_address(first_ip)
+        for index in range(count):
+            ip = str(first + index)
+            drone = VirtualTello('0TQSIM' + str(index).zfill(8), error_rate=error_rate,
+                                 time_scale=time_scale, seed=self.random.random())
+            drone.ip = ip
+            drone.busy_until = 0.0
+            drone.last_advance = time.monotonic()
+            self.drones.append(drone)
+
+            command_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            command_socket.bind((ip, command_port))
+            command_socket.setblocking(False)
+            self.selector.register(command_socket, selectors.EVENT_READ, (self._read_command, drone))
+            drone.command_socket = command_socket
+            self.sockets.append(command_socket)
+
+            if abyss_port:
+                abyss_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                abyss_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                abyss_socket.bind((ip, abyss_port))
+                abyss_socket.listen(16)
+                abyss_socket.setblocking(False)
+                self.selector.register(abyss_socket, selectors.EVENT_READ, (self._accept, drone))
+                self.sockets.append(abyss_socket)
+
+        # Counters
+        self.commands_received = 0
+        self.commands_lost = 0
+        self.states_sent = 0
+
+        # Thread for serving all drones
+        self.is_running = True
+        self.serve_thread = threading.Thread(target=self._serve_thread)
+        self.serve_thread.daemon = True
+        self.serve_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def ips(self):
+        return [drone.ip for drone in self.drones]
+
+    def close(self):
+        '''
+        Stop the thread and close all sockets
+        '''
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.serve_thread.join()
+        for sock in self.sockets:
+            sock.close()
+        self.selector.close()
+
+    def _schedule(self, delay, function, *arguments):
+        heapq.heappush(self.events, (time.monotonic() + delay, next(self.order), function, arguments))
+
+    def _serve_thread(self):
+        '''
+        Answer commands, accept abyss connections and send the state strings
+        Runs as a thread until the swarm is closed
+        '''
+        while self.is_running:
+            timeout = 0.1
+            if self.events:
+                timeout = min(timeout, max(0.0, self.events[0][0] - time.monotonic()))
+
+            for key, _ in self.selector.select(timeout):
+                handler, drone = key.data
+                handler(key.fileobj, drone)
+
+            now = time.monotonic()
+            while self.events and self.events[0][0] <= now:
+                _, _, function, arguments = heapq.heappop(self.events)
+                function(*arguments)
+
+    def _read_command(self, command_socket, drone):
+        while True:
+            try:
+                data, address = command_socket.recvfrom(1024)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                continue
+
+            self.commands_received += 1
+            if self.loss and self.random.random() < self.loss:
+                self.commands_lost += 1
+                continue
+
+            command = data.decode('utf-8', 'replace')
+            now = time.monotonic()
+            drone.advance(now - drone.last_advance)
+            drone.last_advance = now
+
+            # Like the real drone, control commands are refused during a maneuver
+            is_control = not command.endswith('?') and not command.startswith('rc ') and command != 'command'
+            if is_control and now < drone.busy_until:
+                response, duration = 'error Not joystick', 0.0
+            else:
+                was_in_sdk_mode = drone.in_sdk_mode
+                response, duration = drone.handle_command(command)
+                if is_control:
+                    drone.busy_until = now + duration
+
+                # The state is sent to the host which entered the SDK mode
+                if command == 'command':
+                    self.controllers[drone.ip] = address[0]
+                    if not was_in_sdk_mode and self.state_rate > 0:
+                        self._schedule(self.random.random() / self.state_rate, self._send_state, drone)
+
+            if response is None:
+                continue
+            delay = duration + self.latency
+            if self.jitter:
+                delay += self.random.uniform(0.0, self.jitter)
+            self._schedule(delay, self._send_response, command_socket, response.encode('utf-8'), address)
+
+    def _send_response(self, command_socket, response, address):
+        try:
+            command_socket.sendto(response, address)
+        except OSError:
+            pass
+
+    def _send_state(self, drone):
+        if not self.is_running:
+            return
+        now = time.monotonic()
+        drone.advance(now - drone.last_advance)
+        drone.last_advance = now
+
+        try:
+            drone.command_socket.sendto(drone.state_string().encode('utf-8'),
+                                        (self.controllers[drone.ip], drone.state_port or self.state_port))
+            self.states_sent += 1
+        except OSError:
+            pass
+        self._schedule(1.0 / self.state_rate, self._send_state, drone)
+
+    def _accept(self, abyss_socket, drone):
+        try:
+            connection, _ = abyss_socket.accept()
+        except OSError:
+            return
+        connection.close()
@@ -0,0 +1,264 @@
+import math
+import random
+
+# Commands which move the drone by a distance in cm: command -> (direction relative to the heading in degrees, vertical direction)
+MOVE_COMMANDS = {
+    'forward': (0, 0),
+    'back': (180, 0),
+    'left': (-90, 0),
+    'right': (90, 0),
+    'up': (None, 1),
+    'down': (None, -1)
+}
+
+
+class VirtualTello:
+    '''
+    Flight model and command interpreter of a single simulated Tello EDU. Knows nothing about sockets: handle_command returns the response and the time the maneuver takes, state_string returns the state in the format of the real drone.
+
+    Positions are in cm relative to the takeoff point, x points to the initial heading and y to the right, the yaw grows clockwise. Velocities in the state string are in dm/s like on the real drone.
+    '''
+
+    def __init__(self, serial_number, battery=100, error_rate=0.0, time_scale=0.0, seed=None):
+        self.serial_number = serial_number
+        self.error_rate = error_rate
+
+        # Factor for the duration of maneuvers. 0 answers immediately, 1 takes as long as a real drone
+        self.time_scale = time_scale
+        self.random = random.Random(seed)
+
+        self.in_sdk_mode = False
+        self.is_flying = False
+        self.missionpads_enabled = False
+        self.speed = 100.0
+        self.battery = float(battery)
+        self.motor_time = 0.0
+
+        # Position in cm, heading in degrees and velocity of rc commands in cm/s
+        self.x = 0.0
+        self.y = 0.0
+        self.z = 0.0
+        self.yaw = 0.0
+        self.velocity = (0.0, 0.0, 0.0)
+        self.yaw_rate = 0.0
+
+        # Ports set with 'port' (SDK 3.0). None sends the state to the default port of the swarm
+        self.state_port = None
+        self.video_port = 11111
+
+    def handle_command(self, command):
+        '''
+        Execute the command. Returns (response, duration in seconds). The response is None for commands the real drone does not answer
+        '''
+        tokens = command.strip().split()
+        if not tokens:
+            return 'error', 0.0
+        verb = tokens[0].lower()
+        arguments = tokens[1:]
+
+        if verb == 'command':
+            self.in_sdk_mode = True
+            return 'ok', 0.0
+        if not self.in_sdk_mode:
+            return None, 0.0
+
+        if verb.endswith('?'):
+            return self._read(verb), 0.0
+
+        if verb == 'rc':
+            self._rc(arguments)
+            return None, 0.0
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            return 'error', 0.0
+
+        try:
+            return self._control(verb, [int(argument) if _is_integer(argument) else argument
+                                        for argument in arguments])
+        except (ValueError, IndexError, TypeError):
+            return 'error', 0.0
+
+    def advance(self, seconds):
+        '''
+        Move the drone along the velocity of the last rc command and drain the battery
+        '''
+        if not self.is_flying:
+            return
+        vx, vy, vz = self.velocity
+        heading = math.radians(self.yaw)
+        self.x += (vx * math.cos(heading) - vy * math.sin(heading)) * seconds
+        self.y += (vx * math.sin(heading) + vy * math.cos(heading)) * seconds
+        self.z = max(0.0, self.z + vz * seconds)
+        self.yaw = _wrap(self.yaw + self.yaw_rate * seconds)
+        self.motor_time += seconds
+
+        # A battery lasts about 13 minutes of flight
+        self.battery = max(0.0, self.battery - seconds * 100 / 780)
+
+    def state_string(self):
+        '''
+        Return the state string as sent by a Tello EDU with SDK 2.0
+        '''
+        if not self.missionpads_enabled:
+            mid, mx, my, mz = -2, -200, -200, -200
+        elif self.is_flying:
+            # A single mission pad at the takeoff point
+            mid, mx, my, mz = 1, int(self.x), int(self.y), int(self.z)
+        else:
+            mid, mx, my, mz = -1, -100, -100, -100
+
+        vx, vy, vz = self.velocity if self.is_flying else (0.0, 0.0, 0.0)
+        height = int(self.z)
+        return ('mid:' + str(mid) + ';x:' + str(mx) + ';y:' + str(my) + ';z:' + str(mz) +
+                ';mpry:0,0,' + str(int(self.yaw)) +
+                ';pitch:0;roll:0;yaw:' + str(int(self.yaw)) +
+                ';vgx:' + str(int(vx / 10)) + ';vgy:' + str(int(vy / 10)) + ';vgz:' + str(int(vz / 10)) +
+                ';templ:60;temph:63;tof:' + str(height + 10 if self.is_flying else 10) +
+                ';h:' + str(height) + ';bat:' + str(int(self.battery)) +
+                ';baro:' + '{:.2f}'.format(200.0 + self.z / 100) + ';time:' + str(int(self.motor_time)) +
+                ';agx:0.00;agy:0.00;agz:-1000.00;\r\n')
+
+    def _read(self, verb):
+        if verb == 'sn?':
+            return self.serial_number
+        if verb == 'battery?':
+            return str(int(self.battery))
+        if verb == 'speed?':
+            return '{:.1f}'.format(self.speed)
+        if verb == 'time?':
+            return str(int(self.motor_time)) + 's'
+        if verb == 'height?':
+            return str(int(self.z / 10)) + 'dm'
+        if verb == 'temp?':
+            return '60~63C'
+        if verb == 'attitude?':
+            return 'pitch:0;roll:0;yaw:' + str(int(self.yaw)) + ';'
+        if verb == 'baro?':
+            return '{:.2f}'.format(200.0 + self.z / 100)
+        if verb == 'acceleration?':
+            return 'agx:0.00;agy:0.00;agz:-1000.00;'
+        if verb == 'tof?':
+            return str(int(self.z * 10) + 100) + 'mm'
+        if verb == 'wifi?':
+            return '90'
+        if verb == 'sdk?':
+            return '20'
+        return 'error'
+
+    def _rc(self, arguments):
+        if len(arguments) != 4 or not all(_is_integer(argument) for argument in arguments):
+            return
+        roll, pitch, throttle, yaw = [max(-100, min(100, int(argument))) for argument in arguments]
+
+        # Full stick is about 1 m/s and 100 degrees per second
+        self.velocity = (float(pitch), float(roll), float(throttle))
+        self.yaw_rate = float(yaw)
+
+    def _control(self, verb, arguments):
+        '''
+        Execute a control or set command. Returns (response, duration in seconds)
+        '''
+        if verb == 'takeoff':
+            if self.is_flying:
+                return 'error', 0.0
+            self.is_flying = True
+            self.z = 80.0
+            return 'ok', self._duration(5.0)
+
+        if verb == 'land':
+            self.is_flying = False
+            self.z = 0.0
+            self.velocity = (0.0, 0.0, 0.0)
+            self.yaw_rate = 0.0
+            return 'ok', self._duration(4.0)
+
+        if verb == 'emergency':
+            self.is_flying = False
+            self.z = 0.0
+            return 'ok', 0.0
+
+        if verb in ('streamon', 'streamoff', 'wifi', 'ap', 'mdirection'):
+            return 'ok', 0.0
+
+        if verb == 'mon':
+            self.missionpads_enabled = True
+            return 'ok', 0.0
+
+        if verb == 'moff':
+            self.missionpads_enabled = False
+            return 'ok', 0.0
+
+        if verb == 'speed':
+            self.speed = float(arguments[0])
+            return 'ok', 0.0
+
+        if verb == 'port':
+            if not all(1 <= argument <= 65535 for argument in arguments[0:2]):
+                return 'error', 0.0
+            self.state_port, self.video_port = arguments[0], arguments[1]
+            return 'ok', 0.0
+
+        if not self.is_flying:
+            return 'error Not flying', 0.0
+
+        if verb == 'stop':
+            self.velocity = (0.0, 0.0, 0.0)
+            self.yaw_rate = 0.0
+            return 'ok', 0.0
+
+        if verb in MOVE_COMMANDS:
+            distance = arguments[0]
+            direction, vertical = MOVE_COMMANDS[verb]
+            if vertical:
+                self.z = max(0.0, self.z + vertical * distance)
+            else:
+                self._move(direction, distance)
+            return 'ok', self._duration(distance / self.speed)
+
+        if verb in ('cw', 'ccw'):
+            angle = arguments[0] if verb == 'ccw' else -arguments[0]
+            self.yaw = _wrap(self.yaw - angle)
+            return 'ok', self._duration(abs(angle) / 90.0)
+
+        if verb == 'flip':
+            return 'ok', self._duration(2.0)
+
+        if verb in ('go', 'jump'):
+            x, y, z, speed = arguments[0:4]
+            return 'ok', self._displace(x, y, z, speed)
+
+        if verb == 'curve':
+            x, y, z, speed = arguments[3], arguments[4], arguments[5], arguments[6]
+            return 'ok', self._displace(x, y, z, speed)
+
+        return 'error', 0.0
+
+    def _move(self, direction, distance):
+        heading = math.radians(self.yaw + direction)
+        self.x += distance * math.cos(heading)
+        self.y += distance * math.sin(heading)
+
+    def _displace(self, x, y, z, speed):
+        '''
+        Move by x, y, z in the coordinates of the SDK, where y points to the left
+        '''
+        y = -y
+        heading = math.radians(self.yaw)
+        self.x += x * math.cos(heading) - y * math.sin(heading)
+        self.y += x * math.sin(heading) + y * math.cos(heading)
+        self.z = max(0.0, self.z + z)
+        return self._duration(math.sqrt(x * x + y * y + z * z) / speed)
+
+    def _duration(self, seconds):
+        return seconds * self.time_scale
+
+
+def _is_integer(token):
+    return token.lstrip('-').isdigit()
+
+
+def _wrap(angle):
+    '''
+    Wrap an angle in degrees to -180..180 like the yaw of the drone
+    '''
+    return (angle + 180.0) % 360.0 - 180.0
@@ -0,0 +1,18 @@
+import os
+import sys
+import pytest
+
+# The packages of the repository are imported from its root like in the scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flightoperator.operator import Operator  # noqa: E402
+
+
+@pytest.fixture
+def operator(tmp_path, monkeypatch):
+    # The operator writes its log and roster to the working directory
+    monkeypatch.chdir(tmp_path)
+    operator = Operator()
+    yield operator
+    if not operator.is_closed:
+        operator.close()
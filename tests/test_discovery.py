@@ -0,0 +1,27 @@
+import time
+from flightoperator.discovery import DroneDiscovery
+from simulator.swarm import SimulatedSwarm
+
+
+def test_hosts_of_networks_and_single_addresses():
+    discovery = DroneDiscovery(['127.0.0.0/30', '127.0.0.9/32'])
+    assert list(discovery.hosts()) == ['127.0.0.1', '127.0.0.2', '127.0.0.9']
+
+
+def test_scan_finds_the_simulated_drones():
+    with SimulatedSwarm(3) as simulator:
+        # Fewer probes than addresses, so probes are started while others are running
+        discovery = DroneDiscovery(['127.0.0.0/29'], timeout=0.5, max_probes=2)
+        start = time.monotonic()
+        found = list(discovery.scan())
+        assert sorted(found) == simulator.ips
+        assert time.monotonic() - start < 2.0
+
+
+def test_confirmed_scan_only_yields_drones_answering_command():
+    with SimulatedSwarm(2) as simulator:
+        with SimulatedSwarm(1, first_ip='127.0.0.4', command_port=0) as silent:
+            # Accepts the abyss connection but does not answer 'command'
+            found = list(DroneDiscovery(['127.0.0.0/29'], confirm=True, timeout=0.5).scan())
+            assert sorted(found) == simulator.ips
+            assert silent.ips[0] not in found
@@ -0,0 +1,47 @@
+import itertools
+import math
+import random
+import pytest
+from flightoperator.formation import assign, plan_formation
+
+
+def total_distance(starts, slots, assignment):
+    return sum(math.dist(start, slots[slot]) for start, slot in zip(starts, assignment))
+
+
+def test_assign_is_optimal_on_small_cases():
+    generator = random.Random(7)
+    for _ in range(50):
+        count = generator.randint(1, 5)
+        extra = generator.randint(0, 2)
+        starts = [tuple(generator.uniform(-200, 200) for _ in range(3)) for _ in range(count)]
+        slots = [tuple(generator.uniform(-200, 200) for _ in range(3)) for _ in range(count + extra)]
+
+        assignment = assign(starts, slots)
+        assert len(set(assignment)) == count
+        best = min(total_distance(starts, slots, permutation)
+                   for permutation in itertools.permutations(range(len(slots)), count))
+        assert total_distance(starts, slots, assignment) == pytest.approx(best)
+
+
+def test_assign_swaps_crossing_drones():
+    starts = [(0, 0, 100), (100, 0, 100)]
+    slots = [(100, 0, 100), (0, 0, 100)]
+    assert assign(starts, slots) == [1, 0]
+
+
+def test_assign_needs_enough_slots():
+    with pytest.raises(ValueError):
+        assign([(0, 0, 0), (100, 0, 0)], [(0, 0, 0)])
+
+
+@pytest.mark.parametrize('speed', [0, 5, 101, 150])
+def test_plan_rejects_speed_outside_sdk_range(speed):
+    with pytest.raises(ValueError):
+        plan_formation([(0, 0, 100)], [(100, 0, 100)], speed)
+
+
+def test_drones_arrive_together():
+    plan = plan_formation([(0, 0, 100), (0, 100, 100)], [(200, 0, 100), (100, 100, 100)], speed=50)
+    assert plan.commands == ['go 200 0 0 50', 'go 100 0 0 25']
+    assert plan.duration == pytest.approx(4.0)
@@ -0,0 +1,52 @@
+import time
+import pytest
+from drone.keepalive import KeepaliveScheduler
+from drone.statereceiver import StateReceiver
+from drone.tello import Tello
+from simulator.swarm import SimulatedSwarm
+
+
+@pytest.fixture
+def swarm():
+    # Two simulated drones which share a keepalive scheduler with a short interval
+    with SimulatedSwarm(2) as simulator:
+        receiver = StateReceiver(local_port=0)
+        keepalive = KeepaliveScheduler(interval=0.2)
+        drones = [Tello(ip, state_receiver=receiver, keepalive=keepalive) for ip in simulator.ips]
+        yield drones, keepalive
+        for tello in drones:
+            tello.close_connection()
+        keepalive.close()
+        receiver.close()
+
+
+def test_idle_drones_receive_keepalives(swarm):
+    drones, keepalive = swarm
+    time.sleep(0.5)
+
+    assert keepalive.keepalives_sent >= 2 * len(drones)
+    assert keepalive.replies_discarded >= len(drones)
+
+    # The replies never reach the command connection
+    for tello in drones:
+        assert [entry.command for entry in tello.log] == ['command', 'sn?']
+        assert tello.stale_responses == 0
+
+
+def test_busy_drones_receive_no_keepalives(swarm):
+    drones, keepalive = swarm
+    end = time.monotonic() + 0.5
+    while time.monotonic() < end:
+        for tello in drones:
+            assert tello.send_command('speed 50').success()
+        time.sleep(0.05)
+    assert keepalive.keepalives_sent == 0
+
+
+def test_unregistered_drones_receive_no_keepalives(swarm):
+    drones, keepalive = swarm
+    for tello in drones:
+        keepalive.unregister(tello)
+    time.sleep(0.5)
+    assert keepalive.keepalives_sent == 0
+    assert keepalive.drones == set()
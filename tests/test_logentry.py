@@ -0,0 +1,33 @@
+import threading
+import time
+from drone.logentry import LogEntry
+from drone.response import Response
+
+
+def test_wait_returns_once_the_response_is_added():
+    entry = LogEntry('battery?', 0)
+    timer = threading.Timer(0.05, entry.add_response, (Response(b'87'),))
+    timer.start()
+
+    started = time.monotonic()
+    assert entry.wait_for_response(5.0)
+    assert time.monotonic() - started < 1.0
+    assert entry.got_response()
+    assert entry.response.returnvalue == '87'
+    assert entry.duration == (entry.end_ns - entry.start_ns) / 1e9 > 0
+
+
+def test_wait_times_out_without_response():
+    entry = LogEntry('battery?', 0)
+    started = time.monotonic()
+    assert not entry.wait_for_response(0.05)
+    assert time.monotonic() - started >= 0.05
+    assert not entry.got_response()
+
+
+def test_receive_timestamp_is_kept():
+    entry = LogEntry('command', 3)
+    entry.add_response(Response(b'ok'), entry.start_ns + 2000000)
+    assert entry.duration == 0.002
+    assert entry.to_dict()['id'] == 3
+    assert entry.to_dict()['response'] == 'ok'
@@ -0,0 +1,41 @@
+import json
+from drone.logentry import LogEntry
+from drone.logsink import LogSink
+from drone.response import Response
+from simulator.swarm import SimulatedSwarm
+
+
+def test_sink_writes_all_entries_on_close(tmp_path):
+    sink = LogSink(str(tmp_path / 'log' / 'flight.jsonl'))
+    for index in range(600):
+        entry = LogEntry('speed 50', index)
+        entry.add_response(Response(b'ok'))
+        sink.write('127.0.0.2', entry, '0TQDG2KEDB4RV')
+    sink.close()
+    sink.write('127.0.0.2', LogEntry('land', 600))
+
+    with open(sink.path) as file:
+        lines = [json.loads(line) for line in file]
+    assert sink.entries_written == 600
+    assert [line['id'] for line in lines] == list(range(600))
+    assert lines[0]['drone'] == '127.0.0.2' and lines[0]['serial_number'] == '0TQDG2KEDB4RV'
+    assert lines[0]['response'] == 'ok'
+
+
+def test_history_is_bounded_but_the_sink_is_complete(operator):
+    with SimulatedSwarm(1) as simulator:
+        operator.bring_up(simulator.ips, deadline=5.0)
+        tello = operator.swarm[0]
+        for _ in range(tello.LOG_HISTORY + 20):
+            assert tello.send_command('speed 50').success()
+
+        assert len(tello.log) == tello.LOG_HISTORY
+        assert tello.log[-1].command == 'speed 50'
+        operator.close()
+
+    with open(operator.log_sink.path) as file:
+        lines = [json.loads(line) for line in file]
+    speeds = [line for line in lines if line['command'] == 'speed 50']
+    assert len(speeds) == tello.LOG_HISTORY + 20
+    assert {line['drone'] for line in lines} == set(simulator.ips)
+    assert {line['serial_number'] for line in speeds} == {tello.tello_sn}
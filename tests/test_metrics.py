@@ -0,0 +1,86 @@
+import pytest
+from drone.metrics import SWARM, LatencyHistogram, SwarmMetrics
+
+
+def test_percentiles_of_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record(value)
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(99) == 99
+    assert histogram.percentile(100) == 100
+    assert histogram.mean() == 50.5
+    assert (histogram.minimum, histogram.maximum) == (1, 100)
+
+
+def test_percentiles_of_large_values_within_one_percent():
+    histogram = LatencyHistogram()
+    values = [1000 * value for value in range(1, 10001)]
+    for value in values:
+        histogram.record(value)
+    for percent in (50, 90, 99):
+        exact = values[int(len(values) * percent / 100) - 1]
+        assert abs(histogram.percentile(percent) - exact) <= exact * 0.01
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    assert histogram.mean() is None
+
+
+def test_merge_equals_recording_all_values():
+    first = LatencyHistogram()
+    second = LatencyHistogram()
+    combined = LatencyHistogram()
+    for value in range(1, 5000, 7):
+        first.record(value * 1000)
+        combined.record(value * 1000)
+    for value in range(3, 9000, 11):
+        second.record(value * 1000)
+        combined.record(value * 1000)
+
+    first.merge(second)
+    assert first.buckets == combined.buckets
+    assert (first.count, first.total) == (combined.count, combined.total)
+    assert (first.minimum, first.maximum) == (combined.minimum, combined.maximum)
+    for percent in (50, 90, 99):
+        assert first.percentile(percent) == combined.percentile(percent)
+
+
+def test_merge_into_empty_histogram():
+    histogram = LatencyHistogram()
+    other = LatencyHistogram()
+    other.record(42)
+    histogram.merge(other)
+    assert (histogram.count, histogram.minimum, histogram.maximum) == (1, 42, 42)
+
+
+def test_serial_number_labels_all_series_of_a_drone():
+    metrics = SwarmMetrics()
+    metrics.count('127.0.0.2', 'command', 'commands')
+    metrics.identify('127.0.0.2', 'SN1')
+    metrics.observe('127.0.0.2', 'go 50 0 0 50', 1000000)
+
+    assert set(metrics.snapshot()) == {'127.0.0.2', SWARM}
+    text = metrics.to_prometheus()
+    assert 'dronella_commands_total{drone="127.0.0.2",serial_number="SN1",command="command"} 1' in text
+    assert 'dronella_command_latency_seconds_count{drone="127.0.0.2",serial_number="SN1",command="go"} 1' in text
+
+
+def test_snapshot_combines_all_drones():
+    metrics = SwarmMetrics()
+    for value in range(1, 51):
+        metrics.observe('127.0.0.2', 'go 50 0 0 50', value * 1000000)
+        metrics.observe('127.0.0.3', 'go 50 0 0 50', (value + 50) * 1000000)
+    metrics.count('127.0.0.2', 'go', 'commands', 50)
+    metrics.count('127.0.0.3', 'go', 'commands', 50)
+    metrics.count('127.0.0.3', 'go', 'timeouts')
+
+    swarm = metrics.snapshot()[SWARM]['go']
+    assert swarm['commands'] == 100
+    assert swarm['timeouts'] == 1
+    assert swarm['p50_ms'] == pytest.approx(50, rel=0.01)
+    assert swarm['max_ms'] == 100
+    assert swarm['mean_ms'] == pytest.approx(50.5)
@@ -0,0 +1,50 @@
+import pytest
+from flightoperator.mission import MissionError, compile_mission, validate_command
+
+
+def errors_of(source):
+    with pytest.raises(MissionError) as info:
+        compile_mission(source)
+    return info.value.errors
+
+
+def test_valid_mission():
+    mission = compile_mission('set height 50\ntakeoff\n@0 up $height\ndelay 1\nland\n')
+    kinds = [step[0] for step in mission.steps]
+    assert kinds == ['command', 'sync', 'command', 'sync', 'delay', 'sync', 'command', 'sync']
+    assert mission.steps[2][1:3] == [['0'], 'up 50']
+
+
+@pytest.mark.parametrize('command', [
+    'fly',                      # unknown command
+    'up',                       # missing argument
+    'up 10',                    # below 20 cm
+    'forward 501',              # above 500 cm
+    'cw 0',                     # below 1 degree
+    'go 10 10 10 50',           # target within 20 cm
+    'go 100 0 0 150',           # speed above 100
+    'curve 10 10 10 100 0 0 80',  # curve speed above 60
+    'flip x',                   # unknown direction
+    'up ten',                   # not an integer
+])
+def test_invalid_commands_are_rejected(command):
+    with pytest.raises(ValueError):
+        validate_command(command)
+    assert errors_of(command)[0][0] == 1
+
+
+def test_all_invalid_lines_are_reported():
+    errors = errors_of('takeoff\nup 10\nland\nrepeat x\n@ forward 100\ndelay -1\nat 1\n')
+    assert [line for line, _ in errors] == [2, 4, 5, 6, 7]
+
+
+def test_undefined_variable():
+    errors = errors_of('up $height\n')
+    assert errors == [(1, 'undefined variable $height')]
+
+
+def test_unbalanced_blocks():
+    assert errors_of('repeat 2\nup 50\n') == [(1, 'repeat block without end')]
+    assert errors_of('end\n') == [(1, 'end without repeat or parallel')]
+    assert errors_of('parallel\nparallel\nend\nend\n')[0] == (2, 'parallel blocks can not be nested')
+    assert errors_of('@0 repeat 2\nend\n')[0] == (1, 'repeat can not be targeted')
@@ -0,0 +1,45 @@
+from drone.metrics import SWARM
+from simulator.swarm import SimulatedSwarm
+
+
+def test_bring_up_against_simulator(operator):
+    with SimulatedSwarm(3, state_rate=20.0, seed=1) as simulator:
+        report = operator.bring_up(simulator.ips, deadline=5.0)
+
+        assert sorted(report['ready']) == simulator.ips
+        assert report['failed'] == [] and report['missed'] == []
+        assert sorted(tello.tello_ip for tello in operator.swarm) == simulator.ips
+        assert sorted(tello.tello_sn for tello in operator.swarm) == [drone.serial_number for drone in simulator.drones]
+        assert all(tello.state.is_connected for tello in operator.swarm)
+
+        operator.execute_command('takeoff')
+        assert len(operator.swarm) == 3
+
+        # The handshake and the commands after it are counted under the same drone
+        snapshot = operator.metrics.snapshot()
+        assert sorted(snapshot) == simulator.ips + [SWARM]
+        for ip in simulator.ips:
+            assert set(snapshot[ip]) >= {'command', 'sn?', 'takeoff'}
+        operator.close()
+
+
+def test_unreachable_drone_is_left_out(operator):
+    with SimulatedSwarm(1) as simulator:
+        report = operator.bring_up(simulator.ips + ['127.0.0.250'], deadline=1.0)
+        assert list(report['ready']) == simulator.ips
+        assert report['failed'] + report['missed'] == ['127.0.0.250']
+        operator.close()
+
+
+def test_bring_up_skips_drones_in_the_swarm(operator):
+    with SimulatedSwarm(2) as simulator:
+        operator.bring_up(simulator.ips[:1], deadline=5.0)
+        tello = operator.swarm[0]
+        report = operator.bring_up(simulator.ips, deadline=5.0)
+
+        assert list(report['ready']) == simulator.ips[1:]
+        assert len(operator.swarm) == 2
+        assert operator.swarm[0] is tello
+        assert operator.transport.drones[tello.tello_ip] is tello
+        assert tello.send_command('battery?').success()
+        operator.close()
@@ -0,0 +1,56 @@
+import threading
+import time
+from flightoperator.pipeline import SyncPoint
+from simulator.swarm import SimulatedSwarm
+
+
+def arrive_later(sync_point, party, seconds):
+    thread = threading.Thread(target=lambda: (time.sleep(seconds), sync_point.arrive(party)))
+    thread.start()
+    return thread
+
+
+def test_sync_point_waits_for_all_parties():
+    sync_point = SyncPoint(['a', 'b'])
+    thread = arrive_later(sync_point, 'b', 0.2)
+    waited = sync_point.arrive('a')
+    thread.join()
+    assert waited >= 0.15
+    assert sync_point.arrived == {'a', 'b'}
+
+
+def test_withdrawn_party_does_not_block():
+    sync_point = SyncPoint(['a', 'b'])
+    thread = threading.Thread(target=lambda: (time.sleep(0.1), sync_point.withdraw('b')))
+    thread.start()
+    assert sync_point.arrive('a') < 1.0
+    thread.join()
+    assert sync_point.release_time is not None
+
+
+def test_drones_only_wait_at_sync_points(operator):
+    with SimulatedSwarm(2) as simulator:
+        operator.bring_up(simulator.ips, deadline=5.0)
+        slow, fast = operator.swarm
+
+        # The fast drone runs ahead until the sync point
+        operator.delay(0.3, [slow])
+        operator.submit(['speed 50', 'speed 60'], [fast])
+        operator.sync()
+        operator.submit('speed 70')
+        report = operator.wait()
+
+        slow_timings = report['drones'][slow.tello_sn]
+        fast_timings = report['drones'][fast.tello_sn]
+        assert fast_timings['commands'] == 3 and slow_timings['commands'] == 1
+        assert fast_timings['waiting'] > 0.2
+        assert slow_timings['waiting'] < 0.1
+        assert report['swarm'] >= 0.3
+        assert [entry.command for entry in fast.log][-3:] == ['speed 50', 'speed 60', 'speed 70']
+
+        # The next run starts with new timings
+        operator.submit('speed 80')
+        report = operator.wait()
+        assert report['drones'][fast.tello_sn]['commands'] == 1
+        assert report['swarm'] < 0.3
+        operator.close()
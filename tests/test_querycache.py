@@ -0,0 +1,69 @@
+import time
+from types import SimpleNamespace
+from drone.metrics import SwarmMetrics
+from drone.querycache import QueryCache
+from drone.staterecord import StateRecord
+from simulator.swarm import SimulatedSwarm
+
+
+def drone(age, **values):
+    record = StateRecord(time.monotonic() - age)
+    for name, value in values.items():
+        setattr(record, name, value)
+    return SimpleNamespace(tello_ip='127.0.0.2', state=SimpleNamespace(record=record))
+
+
+def test_fresh_state_answers_in_the_format_of_the_drone():
+    cache = QueryCache(max_age=0.5)
+    tello = drone(0.1, height=120, tof_in_cm=130, battery=87, templ=60, temph=63)
+    assert cache.answer('battery?', tello).returnvalue == '87'
+    assert cache.answer('height?', tello).returnvalue == '12dm'
+    assert cache.answer('tof?', tello).returnvalue == '1300mm'
+    assert cache.answer('temp?', tello).returnvalue == '60~63C'
+    assert cache.answer('speed?', tello) is None
+    assert not cache.is_cached('speed?')
+
+
+def test_stale_or_incomplete_state_is_a_miss():
+    metrics = SwarmMetrics()
+    cache = QueryCache(max_age=0.5, metrics=metrics)
+    assert cache.answer('battery?', drone(0.6, battery=87)) is None
+    assert cache.answer('battery?', drone(0.0)) is None
+    assert cache.answer('battery?', SimpleNamespace(tello_ip='127.0.0.2', state=SimpleNamespace(record=StateRecord()))) is None
+    assert cache.answer('battery?', drone(0.0, battery=87)) is not None
+
+    statistics = cache.statistics()
+    assert statistics['hits'] == 1 and statistics['misses'] == 3
+    assert statistics['hit_rate'] == 0.25
+    assert statistics['queries'] == {'battery?': {'hits': 1, 'misses': 3}}
+    counters = metrics.snapshot()['127.0.0.2']['battery?']
+    assert counters['cache_hits'] == 1 and counters['cache_misses'] == 3
+    metrics.close()
+
+
+def test_queries_are_answered_from_the_state_stream(operator):
+    with SimulatedSwarm(2, state_rate=20.0) as simulator:
+        operator.bring_up(simulator.ips, deadline=5.0)
+        time.sleep(0.2)
+        received = simulator.commands_received
+
+        operator.execute_command('battery?')
+        for tello in operator.swarm:
+            assert tello.send_command('height?').returnvalue == '0dm'
+            assert tello.log[-1].command == 'sn?'
+        assert simulator.commands_received == received
+        assert operator.query_cache.statistics()['hits'] == 4
+        operator.close()
+
+
+def test_queries_without_state_are_sent_to_the_drone(operator):
+    with SimulatedSwarm(1, state_rate=0) as simulator:
+        operator.bring_up(simulator.ips, deadline=5.0)
+        tello = operator.swarm[0]
+        received = simulator.commands_received
+
+        assert tello.send_command('battery?').returnvalue == '100'
+        assert tello.log[-1].command == 'battery?'
+        assert simulator.commands_received == received + 1
+        assert operator.query_cache.statistics()['misses'] == 1
+        operator.close()
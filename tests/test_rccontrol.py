@@ -0,0 +1,82 @@
+import time
+from drone.rccontrol import RcController
+from simulator.swarm import SimulatedSwarm
+
+
+class Transport:
+    '''
+    Records the datagrams instead of sending them
+    '''
+
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data, address):
+        self.sent.append((time.monotonic(), data))
+
+
+class Drone:
+    def __init__(self):
+        self.transport = Transport()
+        self.tello_ip = '127.0.0.2'
+        self.tello_address = (self.tello_ip, 8889)
+        self.last_command_ns = 0
+
+
+def test_stalled_setpoint_hovers():
+    drone = Drone()
+    controller = RcController(rate=50.0, stall_timeout=0.2)
+    channel = controller.channel(drone)
+    channel.set(0, 40.4, -150, 0)
+    time.sleep(0.1)
+    assert not channel.is_stalled
+    time.sleep(0.3)
+    assert channel.is_stalled and channel.stalls == 1
+
+    # The setpoint is sent until it stalls, hovering afterwards
+    channel.set(10, 0, 0, 0)
+    time.sleep(0.1)
+    controller.close()
+
+    commands = [data for _, data in drone.transport.sent]
+    assert commands[0] == b'rc 0 40 -100 0'
+    stalled = commands.index(b'rc 0 0 0 0')
+    assert set(commands[:stalled]) == {b'rc 0 40 -100 0'}
+    assert b'rc 10 0 0 0' in commands[stalled:]
+    assert commands[-1] == b'rc 0 0 0 0'
+    assert drone.last_command_ns > 0
+    assert channel.sent == len(commands)
+
+
+def test_rate_is_kept_for_many_drones():
+    drones = [Drone() for _ in range(50)]
+    controller = RcController(rate=20.0, stall_timeout=1.0)
+    for drone in drones:
+        controller.channel(drone).set(0, 0, 10, 0)
+    time.sleep(0.5)
+    controller.close()
+    assert 8 <= controller.ticks <= 12
+
+    # The first tick may run before the channels were added. Closing sends the hover command once more
+    counts = [len(drone.transport.sent) for drone in drones]
+    assert controller.ticks - 1 <= min(counts) <= max(counts) <= controller.ticks + 1
+
+
+def test_simulated_drone_hovers_after_stall(operator):
+    with SimulatedSwarm(1) as simulator:
+        operator.bring_up(simulator.ips, deadline=5.0)
+        drone = simulator.drones[0]
+        tello = operator.swarm[0]
+        operator.RC_STALL_TIMEOUT = 0.2
+        channel = operator.rc_channel(tello)
+
+        channel.set(0, 40, 0, 0)
+        time.sleep(0.1)
+        assert drone.velocity == (40.0, 0.0, 0.0)
+        time.sleep(0.3)
+        assert drone.velocity == (0.0, 0.0, 0.0)
+        assert channel.stalls == 1
+
+        # Rc commands are never answered and not logged
+        assert not any(entry.command.startswith('rc') for entry in tello.log)
+        operator.close()
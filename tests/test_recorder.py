@@ -0,0 +1,64 @@
+import math
+import time
+from drone.recorder import TelemetryRecorder, TelemetryRecording
+from drone.staterecord import StateRecord
+from simulator.swarm import SimulatedSwarm
+
+
+def record(timestamp, height, mpry=None):
+    record = StateRecord(timestamp)
+    record.height = height
+    record.mpry = mpry
+    return record
+
+
+def test_replay_across_blocks_and_files(tmp_path):
+    # Small blocks and files so that the recording is split into several of both
+    recorder = TelemetryRecorder(str(tmp_path / 'flight'), block_rows=4, max_file_size=4096)
+    for row in range(50):
+        recorder.record('a', record(float(row), row, mpry=(row, -row, 0)))
+        if row % 2 == 0:
+            recorder.record('b', record(float(row), 1000 + row))
+    recorder.close()
+    assert len(recorder.paths) > 1
+
+    with TelemetryRecording(recorder.paths) as recording:
+        assert sorted(recording.drones) == ['a', 'b']
+        assert recording.field('a', 'height').tolist() == list(range(50))
+        assert list(recording.field('a', 'mpry_roll')) == [-row for row in range(50)]
+        assert recording.field('b', 'height')[-1] == 1048
+        assert len(recording.field('b', 'timestamp')) == 25
+        assert all(math.isnan(value) for value in recording.field('b', 'mpry_pitch'))
+
+
+def test_truncated_last_block_is_ignored(tmp_path):
+    recorder = TelemetryRecorder(str(tmp_path / 'flight'), block_rows=4)
+    for row in range(10):
+        recorder.record('a', record(float(row), row))
+    recorder.close()
+
+    # Cut the last, partially filled block like a crash while writing would
+    path = recorder.paths[0]
+    with open(path, 'rb+') as file:
+        file.seek(0, 2)
+        file.truncate(file.tell() - 8)
+
+    with TelemetryRecording(path) as recording:
+        assert recording.field('a', 'height').tolist() == list(range(8))
+
+
+def test_record_the_state_stream(operator, tmp_path):
+    with SimulatedSwarm(2, state_rate=50.0) as simulator:
+        operator.bring_up(simulator.ips, deadline=5.0)
+        recorder = operator.start_recording(str(tmp_path / 'telemetry'))
+        time.sleep(0.5)
+        operator.stop_recording()
+        operator.close()
+
+    with TelemetryRecording(recorder.paths) as recording:
+        assert sorted(recording.drones) == simulator.ips
+        for ip in simulator.ips:
+            timestamps = recording.field(ip, 'timestamp').tolist()
+            assert len(timestamps) > 5
+            assert timestamps == sorted(timestamps)
+            assert set(recording.field(ip, 'battery')) == {100}
@@ -0,0 +1,76 @@
+import time
+from flightoperator.roster import Roster
+from simulator.swarm import SimulatedSwarm
+
+
+def test_roster_survives_a_restart(tmp_path):
+    roster = Roster(str(tmp_path / 'log' / 'roster.json'))
+    roster.add('A', '127.0.0.2')
+    roster.add('B', '127.0.0.3')
+    roster.drones['A']['last_seen'] -= 10
+    roster.save()
+
+    restored = Roster(roster.path)
+    assert restored.drones == roster.drones
+    assert restored.addresses() == ['127.0.0.3', '127.0.0.2']
+
+
+def test_damaged_roster_is_empty(tmp_path):
+    path = tmp_path / 'roster.json'
+    path.write_text('{"A": {"ip"')
+    assert Roster(str(path)).drones == {}
+
+
+def test_old_drones_are_pruned(tmp_path):
+    roster = Roster(str(tmp_path / 'roster.json'), max_age=60)
+    roster.add('A', '127.0.0.2')
+    roster.add('B', '127.0.0.3')
+    roster.drones['A']['last_seen'] = time.time() - 61
+    assert roster.prune() == ['A']
+    assert list(roster.drones) == ['B']
+
+
+def test_drones_are_dropped_after_missed_connects(tmp_path):
+    roster = Roster(str(tmp_path / 'roster.json'), max_misses=2)
+    roster.add('A', '127.0.0.2')
+    assert not roster.miss('A')
+    assert roster.miss('A')
+    assert 'A' not in roster.drones
+    assert not roster.miss('A')
+
+    # Seeing the drone again resets its misses
+    roster.add('B', '127.0.0.3')
+    roster.miss('B')
+    roster.add('B', '127.0.0.3')
+    assert roster.drones['B']['misses'] == 0
+
+
+def test_connect_swarm_from_the_roster(operator):
+    with SimulatedSwarm(2) as simulator:
+        first, second = simulator.drones
+        operator.roster.add(first.serial_number, first.ip)
+        operator.roster.add(second.serial_number, second.ip)
+        operator.roster.add('RETIRED', '127.0.0.250')
+        operator.roster.drones['RETIRED']['misses'] = operator.roster.MAX_MISSES - 1
+
+        operator.connect_swarm(networks=['127.0.0.0/29'])
+
+        assert sorted(tello.tello_ip for tello in operator.swarm) == simulator.ips
+        assert 'RETIRED' not in operator.roster.drones
+        assert operator.roster.drones[first.serial_number]['misses'] == 0
+        operator.close()
+
+    restored = Roster(operator.roster.path)
+    assert sorted(restored.drones) == sorted([first.serial_number, second.serial_number])
+
+
+def test_moved_drone_is_found_by_the_scan(operator):
+    with SimulatedSwarm(1) as simulator:
+        drone = simulator.drones[0]
+        operator.roster.add(drone.serial_number, '127.0.0.5')
+
+        operator.connect_swarm(networks=['127.0.0.0/29'])
+
+        assert [tello.tello_ip for tello in operator.swarm] == simulator.ips
+        operator.close()
+    assert operator.roster.drones[drone.serial_number]['ip'] == drone.ip
@@ -0,0 +1,155 @@
+import time
+import pytest
+from drone import rtt
+from drone.rtt import DURATION_MARGIN, MANEUVER_DURATIONS, MOTION, QUERY, RttEstimator, plausible_response
+from drone.response import Response
+from drone.statereceiver import StateReceiver
+from drone.tello import Tello
+from simulator.swarm import SimulatedSwarm
+
+
+@pytest.fixture
+def tello():
+    # Nothing answers on the loopback address, responses are fed to _receive by the test
+    receiver = StateReceiver(local_port=0)
+    tello = Tello('127.0.0.1', send_keepalives=False, state_receiver=receiver, initialize=False)
+    yield tello
+    tello.close_connection()
+    receiver.close()
+
+
+def test_timeouts_back_off_until_the_next_sample():
+    rtt = RttEstimator()
+    initial = rtt.timeout('battery?')
+    rtt.timed_out('battery?')
+    assert rtt.timeout('battery?') == pytest.approx(2 * initial)
+    rtt.timed_out('battery?')
+    assert rtt.timeout('battery?') == pytest.approx(4 * initial)
+
+    # The backoff is limited and only affects the class of the command
+    for _ in range(10):
+        rtt.timed_out('battery?')
+    assert rtt.backoff[QUERY] == rtt.MAX_BACKOFF
+    assert MOTION not in rtt.backoff
+
+    rtt.sample('battery?', 0.1)
+    assert rtt.backoff[QUERY] == 1
+    assert rtt.timeout('battery?') == pytest.approx(0.1 + 4 * 0.05)
+
+
+def test_estimate_follows_rfc_6298():
+    rtt = RttEstimator()
+    rtt.sample('speed?', 0.1)
+    rtt.sample('speed?', 0.2)
+    srtt = 0.875 * 0.1 + 0.125 * 0.2
+    rttvar = 0.75 * 0.05 + 0.25 * 0.1
+    assert rtt.estimates[QUERY] == pytest.approx((srtt, rttvar))
+
+
+def test_maneuver_duration_is_added_to_the_timeout():
+    rtt = RttEstimator()
+    rtt.sample('forward 100', 2.1)
+    assert rtt.estimates[MOTION][0] == pytest.approx(0.1)
+    assert rtt.timeout('forward 50') == pytest.approx(rtt.MIN_MOTION_SLACK + DURATION_MARGIN * 1.0)
+
+
+def test_fast_acks_do_not_shrink_maneuver_timeouts():
+    rtt = RttEstimator()
+    rtt.sample('takeoff', 5.5)
+    rtt.speed = 100
+    for _ in range(30):
+        rtt.sample('up 20', 0.3)
+    assert rtt.timeout('flip l') >= rtt.MIN_MOTION_SLACK + MANEUVER_DURATIONS['flip']
+    assert rtt.timeout('land') >= rtt.MIN_MOTION_SLACK + MANEUVER_DURATIONS['land']
+    assert rtt.timeout('forward 400') >= rtt.MIN_MOTION_SLACK + 4.0
+
+    # The backoff starts from the minimum slack
+    timeout = rtt.timeout('land')
+    rtt.timed_out('land')
+    assert rtt.timeout('land') == pytest.approx(timeout + rtt.MIN_MOTION_SLACK)
+
+
+def test_plausible_response():
+    assert plausible_response('battery?', Response(b'87'))
+    assert not plausible_response('battery?', Response(b'ok'))
+    assert plausible_response('takeoff', Response(b'ok'))
+    assert not plausible_response('takeoff', Response(b'87'))
+    assert plausible_response('takeoff', Response(b'error Not joystick'))
+
+    # A maneuver sent while an earlier answer may still arrive is only answered by 'ok'
+    assert not plausible_response('takeoff', Response(b'error Not joystick'), ambiguous=True)
+    assert plausible_response('takeoff', Response(b'ok'), ambiguous=True)
+    assert plausible_response('battery?', Response(b'error'), ambiguous=True)
+
+
+def test_stale_ack_is_dropped(tello):
+    entry = tello.start_command('battery?')
+
+    # A late 'ok' of an earlier command does not answer the query
+    tello._receive(b'ok', ('127.0.0.1', 8889))
+    assert tello.stale_responses == 1
+    assert not entry.completed.is_set()
+
+    tello._receive(b'87', ('127.0.0.1', 8889))
+    assert tello.finish_command(entry).returnvalue == '87'
+
+    # Nothing is pending anymore
+    tello._receive(b'87', ('127.0.0.1', 8889))
+    assert tello.stale_responses == 2
+
+
+def test_karn_rule_skips_ambiguous_samples(tello):
+    # A command sent while the answer to a timed out command may still arrive is not sampled
+    tello.abandoned_until_ns = time.monotonic_ns() + int(10e9)
+    entry = tello.start_command('battery?')
+    assert entry.ambiguous
+    tello._receive(b'87', ('127.0.0.1', 8889))
+    tello.finish_command(entry)
+    assert QUERY not in tello.rtt.estimates
+
+    tello.abandoned_until_ns = 0
+    entry = tello.start_command('battery?')
+    tello._receive(b'86', ('127.0.0.1', 8889))
+    tello.finish_command(entry)
+    assert QUERY in tello.rtt.estimates
+
+
+def test_timeout_backs_off_and_marks_later_commands_ambiguous(tello):
+    tello.rtt.INITIAL_TIMEOUTS[QUERY] = 0.01
+    tello.rtt.MIN_TIMEOUT = 0.01
+    response = tello.finish_command(tello.start_command('battery?'))
+    assert response.returnvalue == 'error timeout'
+    assert tello.rtt.backoff[QUERY] == 2
+    assert tello.start_command('battery?').ambiguous
+
+
+def test_late_answer_completes_a_resumed_command(tello):
+    tello.rtt.INITIAL_TIMEOUTS[MOTION] = 0.01
+    tello.rtt.MIN_MOTION_SLACK = 0.01
+    entry = tello.start_command('forward 20')
+    entry.timeout = 0.01
+    assert tello.finish_command(entry).returnvalue == 'error timeout'
+
+    # The answer arrives after the timeout, nothing else is pending
+    tello._receive(b'ok', ('127.0.0.1', 8889))
+    assert tello.stale_responses == 0
+    assert tello.resume_command(entry).returnvalue == 'ok'
+    assert MOTION not in tello.rtt.estimates
+
+
+def test_maneuver_is_not_sent_again_after_a_timeout(operator, monkeypatch):
+    # The simulated takeoff takes 0.5 s, the timeout expects 0.1 s. A second takeoff would be refused with 'error'
+    monkeypatch.setitem(rtt.MANEUVER_DURATIONS, 'takeoff', 0.1)
+    with SimulatedSwarm(1, time_scale=0.1, state_rate=0) as simulator:
+        operator.bring_up(simulator.ips, deadline=5.0)
+        tello = operator.swarm[0]
+        tello.rtt.INITIAL_TIMEOUTS[rtt.MOTION] = 0.1
+        tello.rtt.MIN_MOTION_SLACK = 0.1
+
+        received = simulator.commands_received
+        operator.execute_command('takeoff')
+        assert simulator.commands_received - received == 1
+        assert operator.metrics.snapshot()[tello.tello_ip]['takeoff']['timeouts'] >= 1
+        assert operator.swarm == [tello]
+        assert tello.log[-1].response.returnvalue == 'ok'
+        operator.close()
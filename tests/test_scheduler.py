@@ -0,0 +1,86 @@
+import threading
+import time
+from flightoperator.scheduler import ReleaseScheduler, TimedStep, sleep_until, sleep_until_monotonic
+from simulator.swarm import SimulatedSwarm
+
+
+class Drone:
+    '''
+    Stands in for a Tello, start_command returns the time the command was sent
+    '''
+
+    def start_command(self, command):
+        return time.perf_counter()
+
+
+def test_sleep_until_meets_the_deadline():
+    for clock, sleep in ((time.perf_counter, sleep_until), (time.monotonic, sleep_until_monotonic)):
+        deadline = clock() + 0.05
+        sleep(deadline)
+        assert 0.0 <= clock() - deadline < 0.01
+
+
+def test_steps_are_released_in_deadline_order():
+    scheduler = ReleaseScheduler()
+    drone = Drone()
+    now = time.perf_counter()
+    late_step = TimedStep(now + 0.2, 0.2, 'land', [drone])
+    early_step = TimedStep(now + 0.1, 0.1, 'takeoff', [drone])
+    scheduler.schedule(late_step)
+    scheduler.schedule(early_step)
+
+    assert early_step.arrive(drone) >= early_step.deadline
+    assert late_step.arrive(drone) >= late_step.deadline
+    assert early_step.released and late_step.released
+    assert early_step.report()['dispatch_delay'] < 0.01
+    scheduler.close()
+
+
+def test_waiting_drones_are_released_together_and_late_drones_reported():
+    scheduler = ReleaseScheduler()
+    drones = [Drone() for _ in range(3)]
+    step = TimedStep(time.perf_counter() + 0.1, 0.1, 'takeoff', drones)
+
+    threads = [threading.Thread(target=step.arrive, args=(drone,)) for drone in drones[:2]]
+    for thread in threads:
+        thread.start()
+    scheduler.schedule(step)
+    for thread in threads:
+        thread.join()
+
+    # Arrives after the deadline and sends the command itself
+    step.arrive(drones[2])
+    report = step.report()
+    assert report['drones'] == 3 and report['late'] == 1
+    assert report['skew'] < 0.01
+    scheduler.close()
+
+
+def test_close_releases_the_remaining_steps():
+    scheduler = ReleaseScheduler()
+    drone = Drone()
+    step = TimedStep(time.perf_counter() + 60.0, 60.0, 'land', [drone])
+    scheduler.schedule(step)
+    scheduler.close()
+    assert step.released
+    assert step.arrive(drone) < step.deadline
+
+
+def test_scheduled_commands_against_simulator(operator):
+    with SimulatedSwarm(3) as simulator:
+        operator.bring_up(simulator.ips, deadline=5.0)
+        operator.submit('speed 50')
+        operator.schedule(0.2, 'speed 60')
+        report = operator.wait()
+
+        step = report['steps'][0]
+        assert step['drones'] == 3 and step['late'] == 0
+        assert 0.0 <= step['dispatch_delay'] < 0.01
+        assert report['swarm'] >= 0.2
+        assert all(tello.log[-1].command == 'speed 60' for tello in operator.swarm)
+
+        # Released to all drones in a single loop at the given monotonic time
+        release = time.monotonic() + 0.1
+        first_sent, last_sent = operator.execute_command('speed 70', release=release)
+        assert release <= first_sent <= last_sent < release + 0.01
+        operator.close()
@@ -0,0 +1,127 @@
+import socket
+import threading
+import time
+import pytest
+from drone import statereceiver
+from drone.state import State
+from drone.statereceiver import StateReceiver, acquire_state_receiver, release_state_receiver
+from drone.tello import Tello
+from simulator.swarm import SimulatedSwarm
+from simulator.virtualtello import VirtualTello
+
+STATE = VirtualTello('0TQSIM00000000').state_string().encode('utf-8')
+
+
+@pytest.fixture
+def receiver():
+    receiver = StateReceiver('127.0.0.1', local_port=0)
+    yield receiver
+    receiver.close()
+
+
+def send_from(ip, port, *datagrams):
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.bind((ip, 0))
+    for datagram in datagrams:
+        sender.sendto(datagram, ('127.0.0.1', port))
+    sender.close()
+
+
+def test_state_strings_are_routed_by_source_ip(receiver):
+    port = receiver.socket.getsockname()[1]
+    first, second = State(), State()
+    receiver.register('127.0.0.2', first)
+    receiver.register('127.0.0.3', second)
+
+    send_from('127.0.0.2', port, STATE, STATE)
+    send_from('127.0.0.3', port, STATE.replace(b'bat:100', b'bat:42'))
+    send_from('127.0.0.4', port, STATE)
+    send_from('127.0.0.2', port, b'mid:x;')
+    time.sleep(0.2)
+
+    assert first.battery == 100 and second.battery == 42
+    assert len(first.telemetry) == 2 and len(second.telemetry) == 1
+    statistics = receiver.statistics()
+    assert statistics['received'] == 5
+    assert statistics['unknown'] == 1 and statistics['invalid'] == 1
+    assert statistics['dropped'] == 2
+
+    # Only the registered state itself can be unregistered
+    receiver.unregister('127.0.0.2', State())
+    assert receiver.states['127.0.0.2'] is first
+    receiver.unregister('127.0.0.2', first)
+    assert '127.0.0.2' not in receiver.states
+
+
+def test_kernel_drops_are_counted(receiver):
+    if not receiver.reports_overflow:
+        pytest.skip('the kernel does not report dropped datagrams')
+    port = receiver.socket.getsockname()[1]
+    receiver.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+
+    # Blocks the receive thread while the buffer of the socket fills up
+    blocked = threading.Event()
+
+    class SlowState(State):
+        def update(self, response):
+            if not blocked.is_set():
+                blocked.set()
+                time.sleep(0.3)
+            super().update(response)
+
+    receiver.register('127.0.0.2', SlowState())
+    send_from('127.0.0.2', port, STATE)
+    blocked.wait(1.0)
+    send_from('127.0.0.2', port, *[STATE] * 200)
+    time.sleep(0.5)
+
+    # The kernel reports the drops with the next datagram queued after them
+    send_from('127.0.0.2', port, STATE)
+    time.sleep(0.1)
+
+    assert receiver.packets_overflowed > 0
+    assert receiver.packets_received + receiver.packets_overflowed == 202
+    assert receiver.statistics()['dropped'] == receiver.packets_overflowed
+
+
+def test_bound_port_raises_a_clear_error(receiver):
+    with pytest.raises(OSError, match='share a StateReceiver'):
+        StateReceiver('127.0.0.1', local_port=receiver.socket.getsockname()[1])
+
+
+def test_drones_of_a_process_share_the_receiver():
+    # A free port instead of 8890, which may be used by the operator of another test
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(('', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+
+    first = acquire_state_receiver(port)
+    second = acquire_state_receiver(port)
+    assert first is second
+    release_state_receiver(second)
+    assert statereceiver._shared_receivers[port][0] is first and first.is_running
+    release_state_receiver(first)
+    assert port not in statereceiver._shared_receivers and not first.is_running
+
+    # Releasing twice or a receiver of its own does nothing
+    release_state_receiver(first)
+    release_state_receiver(StateReceiver(local_port=0))
+
+
+def test_state_stream_of_the_simulated_swarm(operator):
+    with SimulatedSwarm(3, state_rate=50.0) as simulator:
+        operator.bring_up(simulator.ips, deadline=5.0)
+        time.sleep(0.3)
+
+        statistics = operator.state_receiver.statistics()
+        assert statistics['received'] >= 3 * 5
+        assert statistics['dropped'] == 0
+        assert all(tello.state.battery == 100 for tello in operator.swarm)
+        assert sorted(operator.state_receiver.states) == simulator.ips
+
+        # The drones without a receiver of their own share the one of the operator
+        tello = Tello(simulator.ips[0], send_keepalives=False, initialize=False)
+        assert tello.state_receiver is operator.state_receiver
+        tello.close_connection()
+        operator.close()
@@ -0,0 +1,45 @@
+from drone.staterecord import StateRecord, parse_state
+
+EDU_STATE = (b'mid:1;x:10;y:-20;z:100;mpry:0,1,-90;pitch:2;roll:-3;yaw:45;vgx:4;vgy:-5;vgz:6;templ:60;temph:62;'
+             b'tof:110;h:100;bat:87;baro:123.45;time:12;agx:-1.00;agy:2.50;agz:-998.00;\r\n')
+
+
+def test_edu_layout_is_parsed_into_typed_values():
+    record = parse_state(EDU_STATE, 1.5)
+    assert isinstance(record, StateRecord)
+    assert (record.mid, record.mx, record.my, record.mz) == (1, 10, -20, 100)
+    assert record.mpry == (0, 1, -90)
+    assert (record.pitch, record.roll, record.yaw) == (2, -3, 45)
+    assert (record.vgx, record.vgy, record.vgz) == (4, -5, 6)
+    assert (record.templ, record.temph, record.tof_in_cm, record.height) == (60, 62, 110, 100)
+    assert record.battery == 87
+    assert record.barometer == 123.45
+    assert record.motor_time == 12
+    assert (record.agx, record.agy, record.agz) == (-1.0, 2.5, -998.0)
+    assert record.timestamp == 1.5
+
+
+def test_fast_path_matches_generic_parser():
+    # Moving the first field to the end leaves the fast path
+    fields = EDU_STATE.rstrip(b';\r\n').split(b';')
+    reordered = b';'.join(fields[1:] + fields[:1]) + b';\r\n'
+
+    fast = parse_state(EDU_STATE)
+    generic = parse_state(reordered)
+    for attribute in StateRecord.__slots__:
+        assert getattr(fast, attribute) == getattr(generic, attribute), attribute
+
+
+def test_missing_and_unknown_fields():
+    record = parse_state(b'pitch:1;roll:2;foo:3;bat:50;\r\n')
+    assert (record.pitch, record.roll, record.battery) == (1, 2, 50)
+    assert record.mid is None
+    assert record.height is None
+
+
+def test_invalid_value_raises_value_error():
+    try:
+        parse_state(EDU_STATE.replace(b'bat:87', b'bat:high'))
+    except ValueError:
+        return
+    assert False, 'expected a ValueError'
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from drone.staterecord import StateRecord
+from drone.subscription import AsyncSubscription, Subscription
+from simulator.swarm import SimulatedSwarm
+
+
+def record(height, battery=100):
+    record = StateRecord(time.monotonic())
+    record.height = height
+    record.battery = battery
+    return record
+
+
+def test_slow_callback_gets_the_latest_record():
+    delivered = []
+    started = threading.Event()
+
+    def slow(key, record):
+        delivered.append((key, record.height))
+        started.set()
+        time.sleep(0.1)
+
+    with Subscription(slow, ('height',)) as subscription:
+        subscription.offer('a', record(0))
+        started.wait(1.0)
+
+        # Offered while the callback is busy, only the newest one is delivered
+        for height in range(1, 11):
+            subscription.offer('a', record(height))
+        time.sleep(0.3)
+
+    assert delivered == [('a', 0), ('a', 10)]
+    statistics = subscription.statistics()
+    assert statistics['offered'] == 11 and statistics['coalesced'] == 9 and statistics['delivered'] == 2
+
+
+def test_unchanged_records_are_skipped():
+    delivered = []
+    with Subscription(lambda key, record: delivered.append(record.height), ('height',)) as subscription:
+        for height in (10, 10, 20, 20, 20):
+            subscription.offer('a', record(height, battery=height))
+            time.sleep(0.02)
+    assert delivered == [10, 20]
+    assert subscription.unchanged == 3
+
+
+def test_max_rate_limits_deliveries_per_drone():
+    delivered = []
+    with Subscription(lambda key, record: delivered.append(key), changes_only=False, max_rate=10) as subscription:
+        end = time.monotonic() + 0.5
+        while time.monotonic() < end:
+            subscription.offer('a', record(0))
+            subscription.offer('b', record(0))
+            time.sleep(0.005)
+    assert 2 * 4 <= len(delivered) <= 2 * 7
+    assert delivered.count('a') == delivered.count('b')
+
+
+def test_failing_callback_is_counted():
+    def failing(key, record):
+        raise ValueError(key)
+
+    with Subscription(failing) as subscription:
+        subscription.offer('a', record(0))
+        time.sleep(0.1)
+    assert subscription.errors == 1 and subscription.delivered == 0
+
+
+def test_async_subscription_from_the_receive_thread():
+    async def receive():
+        subscription = AsyncSubscription(('height',))
+        thread = threading.Thread(target=lambda: [subscription.offer('a', record(height)) for height in range(3)])
+        thread.start()
+        thread.join()
+        key, latest = await subscription.__anext__()
+        subscription.close()
+        remaining = [item async for item in subscription]
+        return key, latest.height, remaining
+
+    key, height, remaining = asyncio.run(receive())
+    assert key == 'a' and height == 2 and remaining == []
+
+
+def test_subscribe_to_the_simulated_swarm(operator):
+    with SimulatedSwarm(2, state_rate=50.0) as simulator:
+        operator.bring_up(simulator.ips, deadline=5.0)
+        batteries = []
+        heights = []
+
+        def slow(tello, record):
+            heights.append(tello)
+            time.sleep(0.05)
+
+        battery = operator.subscribe(lambda tello, record: batteries.append((tello, record.battery)), ('battery',))
+        height = operator.subscribe(slow, changes_only=False)
+        time.sleep(0.5)
+        operator.close()
+
+    # The battery does not change, each drone is delivered once
+    assert sorted(tello.tello_ip for tello, _ in batteries) == simulator.ips
+    assert {value for _, value in batteries} == {100}
+    assert battery.unchanged > 0
+
+    # The slow callback falls behind the state stream without delaying it
+    assert height.coalesced > 0
+    assert height.delivered < height.offered
+    assert set(heights) == set(operator.swarm)
+    assert battery.is_closed and height.is_closed
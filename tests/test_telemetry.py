@@ -0,0 +1,65 @@
+import math
+import pytest
+from drone.staterecord import StateRecord
+from drone.telemetry import TelemetryBuffer
+
+
+def record(timestamp, height, battery=None, mpry=None):
+    record = StateRecord(timestamp)
+    record.height = height
+    record.battery = battery
+    record.mpry = mpry
+    return record
+
+
+def test_ring_keeps_the_newest_records():
+    buffer = TelemetryBuffer(capacity=5)
+    for second in range(12):
+        buffer.append(record(float(second), second * 10))
+
+    assert len(buffer) == 5
+    assert buffer.count == 12
+    assert buffer.latest()['height'] == 110
+    window = buffer.window(100.0, ('height',))
+    assert list(window['timestamp']) == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert list(window['height']) == [70, 80, 90, 100, 110]
+
+
+def test_window_is_relative_to_the_last_timestamp():
+    buffer = TelemetryBuffer(capacity=100)
+    for tick in range(50):
+        buffer.append(record(tick * 0.1, tick))
+    assert list(buffer.window(0.25, ('height',))['height']) == [47, 48, 49]
+
+
+def test_missing_values_are_nan_and_ignored():
+    buffer = TelemetryBuffer(capacity=10)
+    buffer.append(record(0.0, 10, battery=90, mpry=(1, 2, 3)))
+    buffer.append(record(1.0, 20))
+
+    latest = buffer.latest()
+    assert math.isnan(latest['battery'])
+    assert math.isnan(latest['mpry_yaw'])
+    assert buffer.window(10.0, ('mpry_roll',))['mpry_roll'][0] == 2
+    assert buffer.mean('battery') == 90
+    assert (buffer.min('height'), buffer.max('height')) == (10, 20)
+
+
+def test_slope_and_downsample():
+    buffer = TelemetryBuffer(capacity=100)
+    for tick in range(40):
+        buffer.append(record(tick * 0.1, 100 + 5 * tick * 0.1, battery=100 - tick // 10))
+
+    assert buffer.slope('height') == pytest.approx(5.0)
+    assert buffer.slope('battery') < 0
+
+    buckets = buffer.downsample(1.0, fields=('battery',))
+    assert list(buckets['battery']) == [100, 99, 98, 97]
+    assert list(buckets['timestamp']) == pytest.approx([0.0, 1.0, 2.0, 3.0])
+
+
+def test_empty_buffer():
+    buffer = TelemetryBuffer(capacity=3)
+    assert buffer.latest() is None
+    assert len(buffer.window(1.0)['timestamp']) == 0
+    assert math.isnan(buffer.slope('height'))
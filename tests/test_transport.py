@@ -0,0 +1,89 @@
+import socket
+import threading
+import time
+from drone.statereceiver import StateReceiver
+from drone.tello import Tello
+from drone.transport import CommandTransport
+from simulator.swarm import SimulatedSwarm
+
+
+class Drone:
+    '''
+    Collects the acknowledges routed to it
+    '''
+
+    def __init__(self, tello_ip):
+        self.tello_ip = tello_ip
+        self.responses = []
+
+    def _receive(self, response, ip, received_ns=None):
+        self.responses.append((response, ip[0], received_ns))
+
+
+def send_from(ip, data, port):
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.bind((ip, 0))
+    sender.sendto(data, ('127.0.0.1', port))
+    sender.close()
+
+
+def test_acknowledges_are_routed_by_source_ip():
+    transport = CommandTransport('127.0.0.1')
+    port = transport.socket.getsockname()[1]
+    first, second = Drone('127.0.0.2'), Drone('127.0.0.3')
+    transport.register(first)
+    transport.register(second)
+
+    send_from('127.0.0.2', b'ok', port)
+    send_from('127.0.0.3', b'error', port)
+    send_from('127.0.0.4', b'ok', port)
+    time.sleep(0.1)
+
+    assert [response for response, _, _ in first.responses] == [b'ok']
+    assert [response for response, _, _ in second.responses] == [b'error']
+    assert all(ip == drone.tello_ip and received_ns is not None
+               for drone in (first, second) for _, ip, received_ns in drone.responses)
+
+    # Only the registered drone itself can be unregistered
+    transport.unregister(Drone('127.0.0.2'))
+    assert transport.drones['127.0.0.2'] is first
+    transport.unregister(first)
+    send_from('127.0.0.2', b'ok', port)
+    time.sleep(0.1)
+    assert len(first.responses) == 1
+
+    transport.close()
+    transport.receive_thread.join(1.0)
+    assert not transport.receive_thread.is_alive()
+
+
+def test_concurrent_commands_share_one_socket():
+    with SimulatedSwarm(4, latency=0.01, jitter=0.02, seed=3) as simulator:
+        for index, drone in enumerate(simulator.drones):
+            drone.battery = 50 + index
+
+        transport = CommandTransport()
+        receiver = StateReceiver(local_port=0)
+        drones = [Tello(ip, send_keepalives=False, transport=transport, state_receiver=receiver)
+                  for ip in simulator.ips]
+        batteries = {}
+
+        def query(tello):
+            batteries[tello.tello_ip] = [tello.send_command('battery?').returnvalue for _ in range(10)]
+
+        threads = [threading.Thread(target=query, args=(tello,)) for tello in drones]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for index, ip in enumerate(simulator.ips):
+            assert batteries[ip] == [str(50 + index)] * 10
+        assert all(tello.stale_responses == 0 for tello in drones)
+        assert all(tello.local_port == transport.local_port for tello in drones)
+
+        for tello in drones:
+            tello.close_connection()
+        assert transport.drones == {}
+        transport.close()
+        receiver.close()